@@ -0,0 +1,68 @@
+"""
+Benchmark of the HTTP tagger against a local stand-in for the malvinnsla API.
+
+IcePaHC-like lines are tagged one line per request without concurrency, as the scripts used to do, and then with
+the default batching and concurrency of HTTPTagger, and the throughput of each is shown in lines per second. That
+both give the same output is tested in tests/test_taggers.py.
+
+Run with: python bench_http_tagger.py [number of lines] [delay per request in seconds]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts")
+)
+from lemmafreq.taggers import HTTPTagger
+from malvinnsla_standin import Handler, start_server
+
+words = ["Hestur", "kona", "fara", "og", "sjá", "maður", "saga", ",", "."]
+
+
+def make_lines(n_lines, seed=0):
+    """
+    Function to make random lines of text
+    """
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(words) for i in range(rng.randint(3, 25))) + " .\n"
+        for line in range(n_lines)
+    ]
+
+
+def run(tagger, lines):
+    """
+    Function to tag lines with a tagger, returns the output, the time taken and the number of requests sent
+    """
+    requests_before = Handler.requests
+    start = time.perf_counter()
+    tagged = tagger.tag_batch(lines)
+    return tagged, time.perf_counter() - start, Handler.requests - requests_before
+
+
+if __name__ == "__main__":
+    n_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.005
+    server, url = start_server(delay=delay)
+    lines = make_lines(n_lines)
+
+    serial, serial_time, serial_requests = run(
+        HTTPTagger(url, lines_per_request=1, concurrency=1), lines
+    )
+    pooled, pooled_time, pooled_requests = run(HTTPTagger(url), lines)
+
+    print("{} lines, {:.3f} s delay per request".format(n_lines, delay))
+    print(
+        "line by line: {:.0f} lines/s ({} requests)".format(
+            n_lines / serial_time, serial_requests
+        )
+    )
+    print(
+        "batched:      {:.0f} lines/s ({} requests)".format(
+            n_lines / pooled_time, pooled_requests
+        )
+    )
+    server.shutdown()
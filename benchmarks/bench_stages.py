@@ -0,0 +1,519 @@
+"""
+Benchmark of each stage of the scripts on synthetic corpora, see synthetic.py.
+
+Each stage is run in a separate process and timed on its own, with the input it needs prepared beforehand:
+
+    giga_parse: streaming the sentences of the Gigaword files with iter_sentences()
+    giga_extract: parsing the Gigaword files and interning each lemma, as text_sentences() in giga_get_lemma_freq.py
+    mim_extract: the same for the MÍM files
+    icepahc_tag: tagging IcePaHC with the HTTP tagger, against the stand-in for the API in malvinnsla_standin.py
+    icepahc_ids: reading the sentence IDs and metadata of IcePaHC from the .psd and .info files
+    icepahc_index: the same from an up-to-date SentenceIndex, see lemmafreq/icepahc.py
+    count_ids: counting the IDs of the Gigaword sentences in a Counts object, as the *_get_lemma_freq.py scripts do
+    count_keys: counting "lemma\\ttag" strings in a Counter, as the *_simple_freq.py scripts do
+    spool: writing the Gigaword sentences to a sentence spool and reading them back
+    annotate_tokens: looking up and formatting the counts of three corpora for each token of the Gigaword
+    sentences, as the writers do without numpy
+    annotate_numpy: the same for batches of sentences with an Annotator, see lemmafreq/annotate.py
+    write_tsv: writing the Gigaword sentences with the counts of three corpora as tab separated text
+    write_parquet: the same as a Parquet file, if pyarrow is installed
+    write_freq_list: writing the simple frequency list of the Gigaword Corpus
+
+For each stage the number of lemma tokens processed, the time taken, the throughput in tokens per second and the
+peak memory use (maximum resident set size) of the stage's process are reported. The peak memory includes the
+input prepared for the stage. The results are written to a JSON file along with the commit of the repository, so
+the results of two commits can be compared:
+
+    python bench_stages.py --size medium --output results-new.json
+    python bench_stages.py --compare results-old.json results-new.json
+
+Run with: python bench_stages.py [--size small|medium|large] [--corpora DIR] [--stages STAGE ...] [--output FILE]
+"""
+
+from array import array
+from collections import Counter
+import argparse
+import csv
+import glob
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+repo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(repo_dir, "scripts"))
+from lemmafreq import annotate
+from lemmafreq.freqlist import write_freq_list
+from lemmafreq.icepahc import SentenceIndex, read_info, sentence_ids, text_path
+from lemmafreq.instrument import peak_rss_mb
+from lemmafreq.spool import SentenceSpool
+from lemmafreq.tei import iter_sentences
+from lemmafreq.vocab import Counts, Vocabulary
+from lemmafreq.writers import ParquetWriter, TSVWriter
+from synthetic import sizes, write_corpora
+
+
+def giga_files(root):
+    """
+    Function to get the paths of the Gigaword files in root, sorted
+    """
+    return sorted(glob.glob(os.path.join(root, "rmh", "**", "*.xml"), recursive=True))
+
+
+def mim_files(root):
+    """
+    Function to get the paths of the MÍM files in root from the corpus's file list
+    """
+    files = []
+    with open(os.path.join(root, "MIM", "fileList.txt"), encoding="utf-8") as f:
+        for item in csv.DictReader(f, delimiter="\t"):
+            files.append(os.path.join(root, "MIM", item["Folder"], item["File Name"]))
+    return files
+
+
+def icepahc_basedir(root):
+    """
+    Function to get the directory of the IcePaHC .txt files in root
+    """
+    return os.path.join(root, "icepahc-v0.9", "txt") + "/"
+
+
+def reduce_tag(tag):
+    """
+    Function to keep the gender of a noun's tag and the word category of other tags
+    """
+    if tag[0] == "n":
+        return tag[:2]
+    return tag[0]
+
+
+def giga_sentences(root, vocab):
+    """
+    Function to extract the text and the array of vocabulary IDs of each sentence in the Gigaword files
+    """
+    sentences = []
+    for file in giga_files(root):
+        for sent_id, words in iter_sentences(file):
+            text = []
+            ids = array("i")
+            for token, lemma, tag in words:
+                text.append(token)
+                if lemma is not None and tag is not None:
+                    ids.append(vocab.intern(lemma, reduce_tag(tag)))
+            sentences.append((sent_id, " ".join(text), ids))
+    return sentences
+
+
+def stage_giga_parse(root):
+    """
+    Function to run the giga_parse stage, returns the time taken and the number of tokens and sentences processed
+    """
+    tokens = 0
+    sentences = 0
+    start = time.perf_counter()
+    for file in giga_files(root):
+        for sent_id, words in iter_sentences(file):
+            sentences += 1
+            tokens += len(words)
+    return time.perf_counter() - start, tokens, sentences
+
+
+def stage_giga_extract(root):
+    """
+    Function to run the giga_extract stage, returns the time taken and the number of tokens and sentences processed
+    """
+    vocab = Vocabulary()
+    start = time.perf_counter()
+    sentences = giga_sentences(root, vocab)
+    seconds = time.perf_counter() - start
+    return seconds, sum(len(ids) for sent_id, text, ids in sentences), len(sentences)
+
+
+def stage_mim_extract(root):
+    """
+    Function to run the mim_extract stage, returns the time taken and the number of tokens and sentences processed
+    """
+    vocab = Vocabulary()
+    tokens = 0
+    sentences = 0
+    start = time.perf_counter()
+    for file in mim_files(root):
+        for sent_no, words in iter_sentences(file, tag_attr="type", id_attr="n"):
+            ids = array("i")
+            for token, lemma, tag in words:
+                if tag != "punctuation":
+                    ids.append(vocab.intern(lemma, reduce_tag(tag)))
+            sentences += 1
+            tokens += len(ids)
+    return time.perf_counter() - start, tokens, sentences
+
+
+def stage_icepahc_tag(root):
+    """
+    Function to run the icepahc_tag stage, returns the time taken and the number of tokens and sentences processed
+    """
+    from lemmafreq.taggers import HTTPTagger
+    from malvinnsla_standin import start_server
+
+    server, url = start_server()
+    basedir = icepahc_basedir(root)
+    lines = []
+    for file in sorted(os.listdir(basedir)):
+        with open(basedir + file, encoding="utf-8") as f:
+            lines.extend(f.readlines())
+    tagger = HTTPTagger(url)
+    tokens = 0
+    start = time.perf_counter()
+    for tagged in tagger.tag_batch(lines):
+        for paragraph in tagged["paragraphs"]:
+            for sentence in paragraph["sentences"]:
+                tokens += len(sentence)
+    seconds = time.perf_counter() - start
+    server.shutdown()
+    return seconds, tokens, len(lines)
+
+
+def stage_icepahc_ids(root):
+    """
+    Function to run the icepahc_ids stage, returns the time taken and the number of tokens and sentences processed
+    """
+    basedir = icepahc_basedir(root)
+    files = sorted(os.listdir(basedir))
+    sentences = 0
+    start = time.perf_counter()
+    for file in files:
+        sentences += len(sentence_ids(basedir, file))
+        read_info(text_path(basedir, file, "info", ".info"))
+    return time.perf_counter() - start, 0, sentences
+
+
+def stage_icepahc_index(root):
+    """
+    Function to run the icepahc_index stage, returns the time taken and the number of tokens and sentences processed
+    """
+    basedir = icepahc_basedir(root)
+    files = sorted(os.listdir(basedir))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.sqlite")
+        SentenceIndex(path, basedir, files).close()
+        sentences = 0
+        start = time.perf_counter()
+        index = SentenceIndex(path, basedir, files)
+        for file in files:
+            sentences += len(index.sentence_ids(file))
+            index.info(file)
+        seconds = time.perf_counter() - start
+        index.close()
+    return seconds, 0, sentences
+
+
+def stage_count_ids(root):
+    """
+    Function to run the count_ids stage, returns the time taken and the number of tokens and sentences processed
+    """
+    vocab = Vocabulary()
+    sentences = giga_sentences(root, vocab)
+    c = Counts(vocab)
+    start = time.perf_counter()
+    for sent_id, text, ids in sentences:
+        c.update(ids)
+    seconds = time.perf_counter() - start
+    return seconds, sum(len(ids) for sent_id, text, ids in sentences), len(sentences)
+
+
+def stage_count_keys(root):
+    """
+    Function to run the count_keys stage, returns the time taken and the number of tokens and sentences processed
+    """
+    vocab = Vocabulary()
+    sentences = [
+        [vocab.key(i).replace(", ", "\t") for i in ids]
+        for sent_id, text, ids in giga_sentences(root, vocab)
+    ]
+    c = Counter()
+    start = time.perf_counter()
+    for keys in sentences:
+        c.update(keys)
+    seconds = time.perf_counter() - start
+    return seconds, sum(len(keys) for keys in sentences), len(sentences)
+
+
+def stage_spool(root):
+    """
+    Function to run the spool stage, returns the time taken and the number of tokens and sentences processed
+    """
+    vocab = Vocabulary()
+    sentences = giga_sentences(root, vocab)
+    start = time.perf_counter()
+    spool = SentenceSpool(2)
+    for sent_id, text, ids in sentences:
+        spool.write([sent_id, text], ids)
+    tokens = 0
+    for fields, ids in spool:
+        tokens += len(ids)
+    spool.close()
+    return time.perf_counter() - start, tokens, len(sentences)
+
+
+def counted_sentences(root):
+    """
+    Function to get the vocabulary and Gigaword sentences of count_ids, and the counts of three corpora, with
+    the counts of the Gigaword Corpus and two scaled copies of them standing in for the counts of all three
+    """
+    vocab = Vocabulary()
+    sentences = giga_sentences(root, vocab)
+    c = Counts(vocab)
+    for sent_id, text, ids in sentences:
+        c.update(ids)
+    counters = [c]
+    for scale in (7, 3):
+        scaled = Counts(vocab)
+        for i, count in enumerate(c.counts):
+            scaled[i] = count * scale // 5
+        counters.append(scaled)
+    return vocab, sentences, counters
+
+
+def stage_annotate_tokens(root):
+    """
+    Function to run the annotate_tokens stage, returns the time taken and the number of tokens and sentences processed
+    """
+    vocab, sentences, counters = counted_sentences(root)
+    start = time.perf_counter()
+    for sent_id, text, ids in sentences:
+        annotate.annotate_tokens(vocab, ids, [c.lookup(ids) for c in counters])
+    seconds = time.perf_counter() - start
+    return seconds, sum(len(ids) for sent_id, text, ids in sentences), len(sentences)
+
+
+def stage_annotate_numpy(root):
+    """
+    Function to run the annotate_numpy stage, returns the time taken and the number of tokens and sentences processed
+    """
+    vocab, sentences, counters = counted_sentences(root)
+    start = time.perf_counter()
+    annotator = annotate.Annotator(vocab, counters)
+    for i in range(0, len(sentences), annotate.batch_size):
+        annotator.annotate(
+            [ids for sent_id, text, ids in sentences[i : i + annotate.batch_size]]
+        )
+    seconds = time.perf_counter() - start
+    return seconds, sum(len(ids) for sent_id, text, ids in sentences), len(sentences)
+
+
+def write_sentences(root, open_writer):
+    """
+    Function to write the Gigaword sentences with a writer opened by open_writer(vocab, directory, counters), with
+    the counts of counted_sentences()
+    """
+    vocab, sentences, counters = counted_sentences(root)
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        out = open_writer(vocab, directory, counters)
+        for sent_id, text, ids in sentences:
+            out.write("text", sent_id, sent_id, "News1", "2020", "", "", text, ids)
+        out.close()
+        seconds = time.perf_counter() - start
+    return seconds, sum(len(ids) for sent_id, text, ids in sentences), len(sentences)
+
+
+def stage_write_tsv(root):
+    """
+    Function to run the write_tsv stage, returns the time taken and the number of tokens and sentences processed
+    """
+    return write_sentences(
+        root,
+        lambda vocab, directory, counters: TSVWriter(
+            os.path.join(directory, "out.tsv"), vocab, counters=counters
+        ),
+    )
+
+
+def stage_write_parquet(root):
+    """
+    Function to run the write_parquet stage, returns the time taken and the number of tokens and sentences processed
+    """
+    return write_sentences(
+        root,
+        lambda vocab, directory, counters: ParquetWriter(
+            os.path.join(directory, "out.parquet"),
+            vocab,
+            ("giga", "icepahc", "mim"),
+            counters=counters,
+        ),
+    )
+
+
+def stage_write_freq_list(root):
+    """
+    Function to run the write_freq_list stage, returns the time taken and the number of tokens and sentences processed
+    """
+    vocab = Vocabulary()
+    c = Counts(vocab)
+    for sent_id, text, ids in giga_sentences(root, vocab):
+        c.update(ids)
+    simple_c = Counter({key.replace(", ", "\t"): count for key, count in c.items()})
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        write_freq_list(simple_c, os.path.join(directory, "freq.tsv"))
+        seconds = time.perf_counter() - start
+    return seconds, sum(simple_c.values()), 0
+
+
+stages = {
+    "giga_parse": stage_giga_parse,
+    "giga_extract": stage_giga_extract,
+    "mim_extract": stage_mim_extract,
+    "icepahc_tag": stage_icepahc_tag,
+    "icepahc_ids": stage_icepahc_ids,
+    "icepahc_index": stage_icepahc_index,
+    "count_ids": stage_count_ids,
+    "count_keys": stage_count_keys,
+    "spool": stage_spool,
+    "annotate_tokens": stage_annotate_tokens,
+    "annotate_numpy": stage_annotate_numpy,
+    "write_tsv": stage_write_tsv,
+    "write_parquet": stage_write_parquet,
+    "write_freq_list": stage_write_freq_list,
+}
+
+
+def run_stage(name, root):
+    """
+    Function to run a stage, returns its results. Run in a new process, so the peak memory is that of the stage
+    """
+    seconds, tokens, sentences = stages[name](root)
+    return {
+        "seconds": round(seconds, 4),
+        "tokens": tokens,
+        "sentences": sentences,
+        "tokens_per_second": round(tokens / seconds) if seconds else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def can_run(name):
+    """
+    Function to check whether the optional packages needed by a stage are installed
+    """
+    try:
+        if name == "icepahc_tag":
+            import requests
+        elif name == "annotate_numpy":
+            import numpy
+        elif name == "write_parquet":
+            import pyarrow
+    except ImportError:
+        return False
+    return True
+
+
+def current_commit():
+    """
+    Function to get the commit of the repository, None if it is not available
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=repo_dir,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(root, size, names):
+    """
+    Function to run the stages in names on the corpora in root, each in a new process
+    """
+    results = {
+        "commit": current_commit(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "size": size,
+        "stages": dict(),
+    }
+    context = multiprocessing.get_context("spawn")
+    for name in names:
+        if not can_run(name):
+            print("Skipping {}, the packages it needs are not installed".format(name))
+            continue
+        with context.Pool(1) as pool:
+            result = pool.apply(run_stage, (name, root))
+        results["stages"][name] = result
+        print(
+            "{:16} {:8.3f} s {:>12} tokens/s {:8.1f} MB".format(
+                name,
+                result["seconds"],
+                result["tokens_per_second"] or "-",
+                result["peak_rss_mb"],
+            )
+        )
+    return results
+
+
+def compare(old_path, new_path):
+    """
+    Function to print the change in throughput and peak memory of each stage between two result files
+    """
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(
+        "{} ({}) -> {} ({})".format(
+            old["commit"], old["size"], new["commit"], new["size"]
+        )
+    )
+    for name, result in new["stages"].items():
+        if name not in old["stages"]:
+            continue
+        before = old["stages"][name]
+        print(
+            "{:16} {:8.3f} s -> {:8.3f} s ({:.2f}x) {:8.1f} MB -> {:8.1f} MB".format(
+                name,
+                before["seconds"],
+                result["seconds"],
+                before["seconds"] / max(result["seconds"], 1e-9),
+                before["peak_rss_mb"],
+                result["peak_rss_mb"],
+            )
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", choices=sorted(sizes), default="small")
+    parser.add_argument(
+        "--corpora",
+        help="directory of the synthetic corpora, which are written there if it does not exist",
+    )
+    parser.add_argument(
+        "--stages", nargs="+", choices=list(stages), default=list(stages)
+    )
+    parser.add_argument("--output", help="JSON file to write the results to")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        sys.exit()
+
+    with tempfile.TemporaryDirectory() as directory:
+        root = args.corpora or os.path.join(directory, "corpora")
+        if not os.path.exists(root):
+            print("Writing {} synthetic corpora to {}...".format(args.size, root))
+            write_corpora(root, args.size)
+        results = run_benchmark(root, args.size, args.stages)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print("Wrote results to {}".format(args.output))
@@ -0,0 +1,119 @@
+"""
+Local stand-in for the tagging API at http://malvinnsla.arnastofnun.is, used for benchmarking and testing the HTTP
+tagger.
+
+The server accepts the same form data as the API (text, lemma) and returns output in the same JSON format, with a
+paragraph for each line of the text. Words are tagged with a fixed rule and lemmatized by lowercasing. A delay can
+be added to each request to simulate network latency. For the tests, the attributes of Handler also make the server
+answer the next requests with an error, or return paragraphs which do not match the lines sent, as the real API
+could:
+
+    failures: the number of requests still to be answered with 503 Service Unavailable
+    join_lines: return all the lines of a text as one paragraph
+    rotate: return the paragraphs of a text of several lines in the wrong order
+    record: keep the text of each request in texts
+
+Run with: python malvinnsla_standin.py [port] [delay in seconds]
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+import json
+import re
+import sys
+import threading
+import time
+
+
+def tag_word(word):
+    """
+    Function to give a word a tag in the MÍM-GOLD tagset
+    """
+    if re.fullmatch(r"\W+", word):
+        return "pl"
+    if word.lower().endswith("ur"):
+        return "nken"
+    if word.lower().endswith("a"):
+        return "nven"
+    return "sfg3en"
+
+
+def tag_text(text, join_lines=False, rotate=False):
+    """
+    Function to tag a text in the format of the malvinnsla API, see Handler for join_lines and rotate
+    """
+    paragraphs = []
+    for line in text.split("\n"):
+        if not line.strip():
+            continue
+        words = [
+            {"word": word, "tag": tag_word(word), "lemma": word.lower()}
+            for word in re.findall(r"\w+|[^\w\s]", line)
+        ]
+        if join_lines and paragraphs:
+            paragraphs[0]["sentences"].append(words)
+        else:
+            paragraphs.append({"sentences": [words]})
+    if rotate:
+        paragraphs = paragraphs[1:] + paragraphs[:1]
+    return {"paragraphs": paragraphs}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    delay = 0.0
+    requests = 0
+    failures = 0
+    join_lines = False
+    rotate = False
+    record = False
+    texts = []
+    lock = threading.Lock()
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        form = parse_qs(self.rfile.read(length).decode("utf-8"))
+        text = form.get("text", [""])[0]
+        with Handler.lock:
+            Handler.requests += 1
+            if Handler.record:
+                Handler.texts.append(text)
+            fail = Handler.failures > 0
+            if fail:
+                Handler.failures -= 1
+        if self.delay:
+            time.sleep(self.delay)
+        if fail:
+            body = b"Service Unavailable"
+            self.send_response(503)
+        else:
+            tagged = tag_text(text, Handler.join_lines, Handler.rotate)
+            body = json.dumps(tagged).encode("utf-8")
+            self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(port=0, delay=0.0):
+    """
+    Function to start the stand-in server in a background thread, returns the server and its url
+    """
+    Handler.delay = delay
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, "http://127.0.0.1:{}".format(server.server_address[1])
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    Handler.delay = delay
+    print("Serving on http://127.0.0.1:{}".format(port))
+    ThreadingHTTPServer(("127.0.0.1", port), Handler).serve_forever()
@@ -0,0 +1,230 @@
+"""
+Synthetic corpora in the formats of the Gigaword Corpus, the MÍM corpus and IcePaHC, for benchmarking the scripts
+without the real corpora.
+
+The corpora are written to a directory with the same layout as the real ones:
+
+    rmh/IGC-<genre>-22/<subdirectory>/<text>.xml, TEI files with tei:s and tei:w elements with lemma and pos
+    attributes, tei:pc elements for punctuation and the date of publication in the tei:sourceDesc
+    MIM/fileList.txt and MIM/<folder>/<text>.xml, TEI files with the tag in the type attribute and numbered
+    sentences, listed in the tab separated file list
+    icepahc-v0.9/txt, psd and info, a .txt file with a sentence per line, a .psd file with an (ID ...) node for
+    each sentence and an .info file with the genre and dates of each text
+
+Lemmas are drawn from a Zipf distribution over a vocabulary of made-up words, so the number of distinct lemmas
+grows with the size of the corpus as in real text. The same seed always gives the same corpora.
+
+Run with: python synthetic.py <directory> [small|medium|large]
+"""
+
+import csv
+import os
+import random
+import sys
+from itertools import accumulate
+
+# number of files and sentences per file in the Gigaword Corpus and MÍM, and of texts and lines in IcePaHC
+sizes = {
+    "small": {"giga_files": 20, "mim_files": 10, "icepahc_texts": 3, "sentences": 100},
+    "medium": {
+        "giga_files": 200,
+        "mim_files": 50,
+        "icepahc_texts": 10,
+        "sentences": 250,
+    },
+    "large": {
+        "giga_files": 1000,
+        "mim_files": 200,
+        "icepahc_texts": 30,
+        "sentences": 500,
+    },
+}
+
+syllables = [
+    "ha",
+    "st",
+    "ur",
+    "ko",
+    "na",
+    "bar",
+    "fa",
+    "ra",
+    "góð",
+    "sjá",
+    "ma",
+    "ðu",
+    "sö",
+    "ga",
+    "ve",
+    "ís",
+]
+tags = [
+    "nken",
+    "nven",
+    "nhen",
+    "sfg3en",
+    "sng",
+    "lkensf",
+    "af",
+    "c",
+    "fpken",
+    "aa",
+    "ta",
+]
+genres = ["News1", "Adjud", "Social", "Parla", "Law"]
+mim_folders = ["blogg", "visindavefur", "mbl", "bok"]
+icepahc_genres = ["nar-sag", "rel-sag", "sci-lin", "law-law"]
+
+
+class Words:
+    """
+    Random (word, lemma, tag) triples, with lemmas drawn from a Zipf distribution
+    """
+
+    def __init__(self, rng, vocab_size=50000):
+        self.rng = rng
+        self.lemmas = []
+        for i in range(vocab_size):
+            lemma = "".join(rng.choice(syllables) for j in range(rng.randint(2, 4)))
+            self.lemmas.append((lemma + str(i), rng.choice(tags)))
+        self.weights = list(accumulate(1 / rank for rank in range(1, vocab_size + 1)))
+
+    def sentence(self):
+        """
+        Function to get the (lemma, tag) pairs of a random sentence of 3 to 25 words
+        """
+        return self.rng.choices(
+            self.lemmas, cum_weights=self.weights, k=self.rng.randint(3, 25)
+        )
+
+
+def write_giga(root, words, n_files, n_sentences, rng):
+    """
+    Function to write n_files files in the format of the Gigaword Corpus
+    """
+    for file_no in range(n_files):
+        genre = genres[file_no % len(genres)]
+        directory = os.path.join(
+            root, "rmh", "IGC-{}-22".format(genre), str(file_no // 100)
+        )
+        os.makedirs(directory, exist_ok=True)
+        text_id = "IGC-{}-{}".format(genre, file_no)
+        sentences = []
+        for sent_no in range(n_sentences):
+            ws = "".join(
+                '<w lemma="{}" pos="{}">{}</w>'.format(lemma, tag, lemma)
+                for lemma, tag in words.sentence()
+            )
+            sentences.append(
+                '<s xml:id="{}.{}.{}">{}<pc>.</pc></s>'.format(
+                    text_id, sent_no // 10 + 1, sent_no % 10 + 1, ws
+                )
+            )
+        with open(
+            os.path.join(directory, text_id + ".xml"), "w", encoding="utf-8"
+        ) as f:
+            f.write(
+                '<?xml version="1.0" encoding="utf-8"?>\n'
+                '<TEI xmlns="http://www.tei-c.org/ns/1.0"><teiHeader><fileDesc><sourceDesc><biblStruct>'
+                '<monogr><imprint><date when="{}-01-01"/></imprint></monogr></biblStruct></sourceDesc>'
+                "</fileDesc></teiHeader><text><body><div><p>{}</p></div></body></text></TEI>\n".format(
+                    rng.randint(2000, 2022), "\n".join(sentences)
+                )
+            )
+
+
+def write_mim(root, words, n_files, n_sentences, rng):
+    """
+    Function to write n_files files in the format of the MÍM corpus, along with its file list
+    """
+    rows = []
+    for file_no in range(n_files):
+        folder = mim_folders[file_no % len(mim_folders)]
+        os.makedirs(os.path.join(root, "MIM", folder), exist_ok=True)
+        fname = "{}{}.xml".format(folder, file_no)
+        sentences = []
+        for sent_no in range(n_sentences):
+            ws = "".join(
+                '<w lemma="{}" type="{}">{}</w>'.format(lemma, tag, lemma)
+                for lemma, tag in words.sentence()
+            )
+            sentences.append(
+                '<s n="{}">{}<c type="punctuation">.</c></s>'.format(sent_no + 1, ws)
+            )
+        with open(os.path.join(root, "MIM", folder, fname), "w", encoding="utf-8") as f:
+            f.write(
+                '<?xml version="1.0" encoding="utf-8"?>\n'
+                '<TEI xmlns="http://www.tei-c.org/ns/1.0"><teiHeader/><text><body><p>{}</p></body></text></TEI>\n'.format(
+                    "\n".join(sentences)
+                )
+            )
+        rows.append(
+            {"Folder": folder, "File Name": fname, "Date": rng.randint(2000, 2010)}
+        )
+    with open(os.path.join(root, "MIM", "fileList.txt"), "w", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, ["Folder", "File Name", "Date"], delimiter="\t")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def write_icepahc(root, words, n_texts, n_lines, rng):
+    """
+    Function to write n_texts texts in the format of IcePaHC, each with a .txt, .psd and .info file. As in
+    IcePaHC, the last few IDs are missing from the .psd files
+    """
+    for directory in ("txt", "psd", "info"):
+        os.makedirs(os.path.join(root, "icepahc-v0.9", directory), exist_ok=True)
+    for text_no in range(n_texts):
+        year = 1150 + 25 * text_no
+        genre = icepahc_genres[text_no % len(icepahc_genres)]
+        name = "{}.text{}.{}".format(year, text_no, genre)
+        lines = [
+            " ".join(lemma.capitalize() for lemma, tag in words.sentence()) + " ."
+            for line in range(n_lines)
+        ]
+        with open(
+            os.path.join(root, "icepahc-v0.9", "txt", name + ".txt"),
+            "w",
+            encoding="utf-8",
+        ) as f:
+            f.write("\n".join(lines) + "\n")
+        with open(
+            os.path.join(root, "icepahc-v0.9", "psd", name + ".psd"),
+            "w",
+            encoding="utf-8",
+        ) as f:
+            for line_no in range(n_lines - rng.randint(1, 7)):
+                f.write(
+                    "( (IP-MAT (NP-SBJ (N-N x)) (. .))\n  (ID {},.{}))\n\n".format(
+                        name.upper(), line_no + 1
+                    )
+                )
+        with open(
+            os.path.join(root, "icepahc-v0.9", "info", name + ".info"),
+            "w",
+            encoding="utf-8",
+        ) as f:
+            f.write(
+                "Title:\t{}\nBirthdate:\t{}\nDate:\t{}\nGenre:\t{}\n".format(
+                    name, year - 40, year, genre
+                )
+            )
+
+
+def write_corpora(root, size="small", seed=0):
+    """
+    Function to write all three corpora of the given size to root, see sizes
+    """
+    config = sizes[size]
+    rng = random.Random(seed)
+    words = Words(rng)
+    write_giga(root, words, config["giga_files"], config["sentences"], rng)
+    write_mim(root, words, config["mim_files"], config["sentences"], rng)
+    write_icepahc(root, words, config["icepahc_texts"], config["sentences"], rng)
+
+
+if __name__ == "__main__":
+    root = sys.argv[1]
+    size = sys.argv[2] if len(sys.argv) > 2 else "small"
+    write_corpora(root, size)
+    print("Wrote {} corpora to {}".format(size, root))
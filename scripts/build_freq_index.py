@@ -0,0 +1,37 @@
+"""
+Script for compiling the simple frequency lists into memory-mapped indexes, see lemmafreq/freqindex.py.
+
+Each *_simple_freq.tsv file given is compiled into a *_simple_freq.idx file next to it, e.g.
+
+    python build_freq_index.py ../output/icepahc_simple_freq.tsv
+
+The frequency of a lemma can then be looked up without loading the list:
+
+    from lemmafreq.freqindex import FreqIndex
+
+    with FreqIndex("../output/icepahc_simple_freq.idx") as index:
+        index.get("hestur", "nk")
+        index.get_many([("hestur", "nk"), ("kona", "nv")])
+        list(index.prefix("hest"))
+
+"""
+
+import argparse
+import time
+
+from lemmafreq.freqindex import FreqIndex, build_index
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("files", nargs="+", help="simple frequency lists to compile")
+    args = parser.parse_args()
+
+    for tsv_path in args.files:
+        start = time.time()
+        path = build_index(tsv_path)
+        with FreqIndex(path) as index:
+            print(
+                "Compiled {} lemmas from {} into {} in {:.1f} seconds".format(
+                    len(index), tsv_path, path, time.time() - start
+                )
+            )
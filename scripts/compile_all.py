@@ -0,0 +1,432 @@
+"""
+Script for compiling the output of all the corpus scripts in one run, reading each corpus only once.
+
+The *_simple_freq.py and *_get_lemma_freq.py scripts each read some of the corpora separately, e.g. both
+mim_get_lemma_freq.py and icepahc_get_lemma_freq.py count the whole Gigaword Corpus. This script reads IcePaHC,
+the MÍM corpus and the Gigaword Corpus once each, counts every lemma once with one shared vocabulary, and writes
+the following output from the same counts:
+
+    simple: the simple frequency lists of the three corpora, as written by the *_simple_freq.py scripts
+    full: the per-sentence output of the three corpora, as written by the *_get_lemma_freq.py scripts
+    genre: the per-sentence output of each genre in the Gigaword Corpus, as written by compile_genre_frequency()
+    v2: the infoTheoryTestV2 file with the frequency of each lemma in IcePaHC, as written by add_freq_V2()
+    cube: the counts of each lemma in the Gigaword Corpus by year of publication and genre, as written by
+    compile_year_cube() in giga_get_lemma_freq.py (see lemmafreq/yearcube.py)
+
+All output is written by default, or only the output listed with --outputs, e.g.
+
+    python compile_all.py --outputs simple genre
+
+The sentences needed for the per-sentence output are kept in a temporary spool while the corpora are counted (see
+lemmafreq/spool.py), in spool_dir, and written from there once all the corpora have been counted, so no corpus is
+parsed or tagged twice. The counts are also saved in counts_dir, where the *_get_lemma_freq.py scripts reuse them.
+
+"""
+
+from array import array
+import argparse
+import glob
+import os
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from lemmafreq import instrument
+from lemmafreq.corpora import (
+    giga_genre,
+    giga_sentences,
+    mim_sentences,
+    read_mim_file_list,
+    tag_and_lemmatize,
+    tagged_lemmas,
+)
+from lemmafreq.countstore import CountStore, manifest_digest
+from lemmafreq.freqlist import write_freq_list
+from lemmafreq.icepahc import SentenceIndex
+from lemmafreq.sentencestore import SentenceStore, icepahc_digest
+from lemmafreq.spool import SentenceSpool
+from lemmafreq.taggers import backend_identity, get_tagger
+from lemmafreq.tei import source_year
+from lemmafreq.vocab import Counts, Vocabulary
+from lemmafreq.writers import (
+    open_output,
+    open_sentence_writer,
+    output_stats,
+    parse_year,
+)
+from lemmafreq.yearcube import CubeBuilder, write_cube
+
+# Directories where the corpora are stored
+icepahc_basedir = "/Users/torunnarnardottir/Vinna/icepahc-v0.9/txt/"
+input_file_V2 = "/Users/torunnarnardottir/Vinna/icepahc-v0.9/infoTheoryTestV2.ice.treeIDandIDfixed.cod.ooo"
+mim_basedir = "/Users/torunnarnardottir/Vinna/MIM/"
+mim_file_list = "{}fileList.txt".format(mim_basedir)
+giga_basedir = "/Users/torunnarnardottir/Vinna/rmh/"
+giga_file_list = [
+    os.path.abspath(filename)
+    for filename in glob.glob(
+        "/Users/torunnarnardottir/Vinna/rmh/**/*.xml", recursive=True
+    )
+]
+
+# Tagger used for IcePaHC: "http" calls the malvinnsla API, "local" tags in-process (see lemmafreq/taggers.py)
+tagger_backend = "http"
+# Cache of tagged IcePaHC lines, shared between the scripts. Set to None to tag every line on each run.
+tag_cache = "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/tag_cache.sqlite"
+
+# Directory of the output files, which have the same names as the output of the other scripts
+output_dir = "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/"
+# Extension of the per-sentence output files, e.g. ".tsv.zst" to compress them (requires the optional zstandard
+# package) or ".parquet" (requires pyarrow, see lemmafreq/writers.py)
+full_output_extension = ".tsv"
+genre_output_extension = ".tsv"
+# Threads used to compress output ending in .zst, 0 to compress in the thread writing the output
+compression_threads = 0
+# Directory where the counts of each corpus are stored
+counts_dir = "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/counts/"
+# Index of the sentence IDs and metadata of each IcePaHC text, shared with icepahc_get_lemma_freq.py (see
+# lemmafreq/icepahc.py). Set to None to read the .psd and .info files on each run.
+index_file = (
+    "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/counts/icepahc_index.sqlite"
+)
+# Tagged sentences of IcePaHC, shared with icepahc_get_lemma_freq.py and icepahc_annotate.py (see
+# lemmafreq/sentencestore.py), None to keep them in memory
+sentence_store = "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/counts/icepahc_sentences.sqlite"
+# Directory of the temporary sentence spools, None for the system's temporary directory. The spool of the
+# Gigaword Corpus is about the size of its text.
+spool_dir = None
+# Versions of the corpora. The counts of a corpus are kept in counts_dir until its version or files change.
+icepahc_version = "icepahc-v0.9"
+mim_version = "MIM"
+giga_version = "rmh"
+# Add the frequency measures of each lemma to the output (requires numpy, see lemmafreq/measures.py)
+frequency_measures = False
+# Seconds between the progress lines of each stage of the run, None to record nothing (see lemmafreq/instrument.py)
+instrument_interval = None
+
+# IDs of the (lemma, tag) pairs in all corpora, see lemmafreq/vocab.py
+vocab = Vocabulary()
+
+# fields stored for each sentence in a spool, the same as the metadata columns of the per-sentence output
+spool_fields = 8
+
+
+def count_icepahc(files, spool, token_list):
+    """
+    Function to count lemmas in the IcePaHC texts in files. Each sentence is added to spool, unless it is None, and
+    the text and IDs of the words of each sentence are stored in token_list by sentence ID, unless it is None
+    """
+    c = Counts(vocab)
+    index = SentenceIndex(index_file, icepahc_basedir, files)
+    if index.indexed:
+        print("Indexed the sentence IDs of {} texts".format(index.indexed))
+    for file in files:
+        print("Reading {}...".format(file))
+        sent_ids = index.sentence_ids(file)
+        genre, year, author_year = index.info(file)
+        with open(icepahc_basedir + file, "r", encoding="utf-8") as input_file:
+            lines = input_file.readlines()
+        for line_no, t in enumerate(
+            tag_and_lemmatize(lines, tagger_backend, tag_cache)
+        ):
+            ids = vocab.intern_all(tagged_lemmas(t))
+            c.update(ids)
+            if token_list is not None:
+                token_list[sent_ids[line_no]] = (lines[line_no].rstrip("\n"), ids)
+            if spool is not None:
+                sent_id = sent_ids[line_no]
+                spool.write(
+                    [
+                        file,
+                        sent_id,
+                        sent_id.split(".")[1],
+                        genre,
+                        year,
+                        author_year,
+                        "",
+                        lines[line_no].rstrip("\n"),
+                    ],
+                    ids,
+                )
+    print(get_tagger(tagger_backend, tag_cache).stats())
+    return c
+
+
+def count_mim(spool):
+    """
+    Function to count lemmas in the MÍM corpus, adding each sentence to spool unless it is None. Returns the counts
+    of the per-sentence output and of the simple frequency list, which count different words
+    """
+    c = Counts(vocab)
+    simple_c = Counts(vocab)
+    for full_fname, folder, year in read_mim_file_list(mim_file_list, mim_basedir):
+        print("Reading {}...".format(full_fname))
+        text_id = "/".join(full_fname.split("/")[-2:])
+        for sent_no, text, lemmas, simple_lemmas in mim_sentences(full_fname):
+            ids = vocab.intern_all(lemmas)
+            c.update(ids)
+            simple_c.update(vocab.intern_all(simple_lemmas))
+            if spool is not None:
+                spool.write(
+                    [
+                        text_id,
+                        ".".join([text_id.split(".")[0], sent_no]),
+                        sent_no,
+                        folder,
+                        year,
+                        "",
+                        "",
+                        " ".join(text),
+                    ],
+                    ids,
+                )
+    return c, simple_c
+
+
+def count_giga(files, genre_c, spool, cube=None):
+    """
+    Function to count lemmas in the Gigaword Corpus, and in each genre in genre_c, adding each sentence to spool
+    unless it is None, and the lemmas of each file to the CubeBuilder cube unless it is None
+    """
+    c = Counts(vocab)
+    for file in files:
+        print("Reading {}...".format(file))
+        genre = giga_genre(file, giga_basedir)
+        text_id = file.split("/")[-1]
+        year = ""
+        if spool is not None or cube is not None:
+            year = source_year(file) or ""
+        file_ids = array("i")
+        for sent_no, text, lemmas in giga_sentences(file):
+            ids = vocab.intern_all(lemmas)
+            c.update(ids)
+            genre_c[genre].update(ids)
+            if cube is not None:
+                file_ids.extend(ids)
+            if spool is not None:
+                spool.write(
+                    [
+                        text_id,
+                        text_id.split(".")[0] + "." + sent_no,
+                        sent_no,
+                        genre,
+                        year,
+                        "",
+                        "",
+                        " ".join(text),
+                    ],
+                    ids,
+                )
+        if cube is not None:
+            cube.add(parse_year(year), genre, file_ids)
+    return c
+
+
+def write_simple(c, output_file, corpus):
+    """
+    Function to write the counts of a corpus as a simple frequency list, with "lemma\\ttag" keys
+    """
+    simple_c = Counter()
+    for key, count in c.items():
+        lemma, tag = key.rsplit(", ", 1)
+        simple_c["{}\t{}".format(lemma, tag)] += count
+    write_freq_list(simple_c, output_file, measures=frequency_measures, corpus=corpus)
+
+
+def write_spool(spool, out, genre_outs=None):
+    """
+    Function to write each sentence in a spool with the counts out was opened with, to out unless it is None. If
+    genre_outs is given, each sentence is also written to the writer of its genre, with the counts of the genre
+    """
+    for fields, ids in spool:
+        if out is not None:
+            out.write(*fields, ids)
+        if genre_outs is not None:
+            genre_outs[fields[3]].write(*fields, ids)
+
+
+def write_v2(output_file_V2, c, token_list, icepahc_files):
+    """
+    Function to add the frequency of each lemma in IcePaHC to the sentences in input_file_V2. The sentences are
+    also stored in sentence_store, where icepahc_annotate.py looks them up
+    """
+    store = SentenceStore(sentence_store)
+    store.fill(
+        ((sent_id, text, ids) for sent_id, (text, ids) in token_list.items()),
+        c,
+        icepahc_digest(
+            icepahc_basedir,
+            icepahc_files,
+            icepahc_version + ":" + backend_identity(tagger_backend),
+        ),
+    )
+
+    start = time.perf_counter()
+    out = open_output(output_file_V2, compression_threads)
+    with open(input_file_V2, "r") as input_file:
+        for line in store.annotate(input_file):
+            out.write(line)
+    out.close()
+    store.close()
+    print(
+        output_stats(
+            output_file_V2, time.perf_counter() - start, out.buffer.raw.bytes_written
+        )
+    )
+
+
+def compile_all(outputs):
+    """
+    Function to count each corpus once and write the output listed in outputs, see the description above
+    """
+    full = "full" in outputs
+    store = CountStore(counts_dir)
+    icepahc_files = sorted(os.listdir(icepahc_basedir))
+    giga_files = sorted(giga_file_list)
+    genre_file_list = dict()
+    for file in giga_files:
+        genre_file_list.setdefault(giga_genre(file, giga_basedir), []).append(file)
+    start = time.time()
+
+    print("Compiling frequency information from IcePaHC...")
+    icepahc_spool = SentenceSpool(spool_fields, spool_dir) if full else None
+    token_list = dict() if "v2" in outputs else None
+    with instrument.stage("count icepahc"):
+        icepahc_c = count_icepahc(icepahc_files, icepahc_spool, token_list)
+    store.save(
+        "icepahc",
+        [icepahc_basedir + file for file in icepahc_files],
+        icepahc_c,
+        icepahc_version + ":" + backend_identity(tagger_backend),
+    )
+
+    print("Compiling frequency information from the MÍM corpus...")
+    mim_spool = SentenceSpool(spool_fields, spool_dir) if full else None
+    with instrument.stage("count mim"):
+        mim_c, mim_simple_c = count_mim(mim_spool)
+    store.save(
+        "mim",
+        [mim_file_list]
+        + [
+            fname
+            for fname, folder, year in read_mim_file_list(mim_file_list, mim_basedir)
+        ],
+        mim_c,
+        mim_version,
+    )
+
+    print("Compiling frequency information from the Gigaword Corpus...")
+    giga_spool = None
+    if full or "genre" in outputs:
+        giga_spool = SentenceSpool(spool_fields, spool_dir)
+    genre_c = {genre: Counts(vocab) for genre in genre_file_list}
+    cube = CubeBuilder() if "cube" in outputs else None
+    with instrument.stage("count giga"):
+        giga_c = count_giga(giga_files, genre_c, giga_spool, cube)
+    store.save("giga", giga_files, giga_c, giga_version)
+    for genre, files in genre_file_list.items():
+        store.save("giga_" + genre, files, genre_c[genre], giga_version)
+    print("Counted all corpora in {:.1f} seconds".format(time.time() - start))
+
+    if "simple" in outputs:
+        write_simple(icepahc_c, output_dir + "icepahc_simple_freq.tsv", "icepahc")
+        write_simple(mim_simple_c, output_dir + "mim_simple_freq.tsv", "mim")
+        write_simple(giga_c, output_dir + "giga_simple_freq.tsv", "giga")
+
+    if cube is not None:
+        with instrument.stage("write cube"):
+            write_cube(
+                output_dir + "giga_year_cube.bin",
+                cube,
+                vocab,
+                manifest_digest(giga_files, giga_version),
+            )
+
+    if "v2" in outputs:
+        with instrument.stage("write v2"):
+            write_v2(
+                output_dir + "icepahc_V2_freq.txt", icepahc_c, token_list, icepahc_files
+            )
+
+    if full:
+        print("Writing frequency information for IcePaHC...")
+        with instrument.stage("write icepahc"), open_sentence_writer(
+            output_dir + "icepahc_full_freq" + full_output_extension,
+            vocab,
+            ("icepahc", "mim", "giga"),
+            compression_threads,
+            counters=(icepahc_c, mim_c, giga_c),
+            measures=frequency_measures,
+        ) as out:
+            write_spool(icepahc_spool, out)
+        icepahc_spool.close()
+
+        print("Writing frequency information for the MÍM corpus...")
+        with instrument.stage("write mim"), open_sentence_writer(
+            output_dir + "mim_full_freq" + full_output_extension,
+            vocab,
+            ("mim", "icepahc", "giga"),
+            compression_threads,
+            counters=(mim_c, icepahc_c, giga_c),
+            measures=frequency_measures,
+        ) as out:
+            write_spool(mim_spool, out)
+        mim_spool.close()
+
+    if giga_spool is not None:
+        print("Writing frequency information for the Gigaword Corpus...")
+        with ExitStack() as stack:
+            out = None
+            if full:
+                out = stack.enter_context(
+                    open_sentence_writer(
+                        output_dir + "giga_full_freq" + full_output_extension,
+                        vocab,
+                        ("giga", "icepahc", "mim"),
+                        compression_threads,
+                        counters=(giga_c, icepahc_c, mim_c),
+                        measures=frequency_measures,
+                    )
+                )
+            genre_outs = None
+            if "genre" in outputs:
+                os.makedirs(output_dir + "giga_genre_freq", exist_ok=True)
+                genre_outs = dict()
+                for genre in genre_file_list:
+                    genre_outs[genre] = stack.enter_context(
+                        open_sentence_writer(
+                            output_dir
+                            + "giga_genre_freq/giga_"
+                            + genre
+                            + "_freq"
+                            + genre_output_extension,
+                            vocab,
+                            (genre,),
+                            compression_threads,
+                            counters=(genre_c[genre],),
+                            measures=frequency_measures,
+                        )
+                    )
+            with instrument.stage("write giga"):
+                write_spool(giga_spool, out, genre_outs)
+        giga_spool.close()
+
+    print("Compiled all output in {:.1f} seconds".format(time.time() - start))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--outputs",
+        nargs="+",
+        choices=("simple", "full", "genre", "v2", "cube"),
+        default=("simple", "full", "genre", "v2", "cube"),
+        help="output to write, all by default",
+    )
+    args = parser.parse_args()
+    if instrument_interval is not None:
+        instrument.enable(instrument_interval)
+
+    compile_all(args.outputs)
@@ -18,22 +18,54 @@ separated by a tab:
     A tuple containing the lemma, its word category (along with its grammatical gender if the lemma in question is a noun) and the lemma's frequency
     in the Gigaword Corpus, IcePaHC and the MÍM corpus.
     A frequency vector, showing each lemma's frequency in the Gigaword Corpus, IcePaHC and the MÍM corpus, in the order in which the lemma appears in the corpus.
+    If frequency_measures is set, a vector of each lemma's frequency per million words, on the Zipf scale and on a log scale
+    in each corpus, see lemmafreq/measures.py
 
 compile_genre_frequency() returns frequency information for each genre in the corpus. The information shown is the same as shown in the output of 
 compile_full_grequency(), excluding information from IcePaHC and MÍM, but the lemmas' frequency is limited to the genre in question. The function returns 
-output files for each genre in the corpus.
+output files for each genre in the corpus, which are all written in the same pass over the corpus.
+
+compile_full_frequency() is run when the script is run. The corpus can also be split into N shards which are counted
+separately, e.g. on several machines sharing shard_dir, by running the script with --shard I/N for each shard I from
+0 to N - 1. Each shard writes its counts and its sentences to shard_dir. Once all shards have been counted, running
+the script with --merge N adds up the counts of the shards and writes each sentence with the total counts, in the
+same order and with the same output as compile_full_frequency().
+
+compile_year_cube() writes the counts of each lemma by year of publication and genre to year_cube, from the counts
+of each file in checkpoint_file, so the frequency of a lemma across years or the most frequent lemmas of a year can
+be looked up with giga_year_freq.py without reading the corpus again (see lemmafreq/yearcube.py). It is run by
+compile_full_frequency(), or on its own with --year-cube.
 
 """
 
+from array import array
 from collections import Counter
-import xml.etree.ElementTree
-import csv
+from contextlib import ExitStack
+import argparse
 import sys
 import os
 import glob
-import requests
-import json
-import string
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from lemmafreq import instrument
+from lemmafreq.corpora import (
+    giga_genre,
+    giga_sentences,
+    mim_sentences,
+    read_mim_file_list,
+    tag_and_lemmatize,
+    tagged_lemmas,
+)
+from lemmafreq.tei import source_year
+from lemmafreq.checkpoint import Checkpoint
+from lemmafreq.counts import open_counts
+from lemmafreq.countstore import CountStore, manifest_digest
+from lemmafreq.parallel import check_shards, parse_shard, shard_files
+from lemmafreq.spool import SentenceSpool, read_spool
+from lemmafreq.taggers import backend_identity, get_tagger
+from lemmafreq.vocab import Counts, Vocabulary
+from lemmafreq.writers import can_resume, open_sentence_writer, parse_year
+from lemmafreq.yearcube import CubeBuilder, YearCube, write_cube
 
 # Directory where The Gigaword Corpus is stored.
 basedir = "/Users/torunnarnardottir/Vinna/rmh/"
@@ -46,254 +78,444 @@ file_list = [
 
 icepahc_file_list = [
     os.path.abspath(filename)
-    for filename in glob.iglob("/Users/torunnarnardottir/Vinna/icepahc-v0.9/**")
+    for filename in glob.iglob("/Users/torunnarnardottir/Vinna/icepahc-v0.9/txt/**")
 ]
-mim_base_dir = "/Users/torunnarnardottir/Vinna/MIM/"
-mim_file_list = "{}fileList.txt".format(basedir)
-
+# Tagger used for IcePaHC: "http" calls the malvinnsla API, "local" tags in-process (see lemmafreq/taggers.py)
+tagger_backend = "http"
+# Cache of tagged IcePaHC lines, shared between the scripts. Set to None to tag every line on each run.
+tag_cache = "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/tag_cache.sqlite"
+mim_basedir = "/Users/torunnarnardottir/Vinna/MIM/"
+mim_file_list = "{}fileList.txt".format(mim_basedir)
+
+# Output written as tab separated text, compressed if the name ends in .gz or .zst (requires the optional zstandard
+# package), or as a Parquet file if the name ends in .parquet (requires pyarrow, see lemmafreq/writers.py)
 output_file = "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/giga_full_freq.tsv"
 genre_output_dir = (
     "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/giga_genre_freq/"
 )
+# Extension of the genre output files, e.g. ".tsv.zst" to compress them
+genre_output_extension = ".tsv"
+# Threads used to compress output ending in .zst, 0 to compress in the thread writing the output
+compression_threads = 0
+# Directory where the counts of each corpus are stored
+counts_dir = "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/counts/"
+# Checkpoint of compile_full_frequency(), which holds the counts of each file in the Gigaword Corpus and the
+# position reached in the output, so an interrupted run resumes where it stopped (see lemmafreq/checkpoint.py)
+checkpoint_file = (
+    "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/counts/giga_checkpoint.sqlite"
+)
+# Counts of each lemma by year and genre, for giga_year_freq.py (see lemmafreq/yearcube.py). Set to None to skip it.
+year_cube = "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/giga_year_cube.bin"
+# Directory where each shard is stored by compile_shard() and read by merge_shards(), e.g. on a shared file system
+shard_dir = "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/giga_shards/"
+# Number of metadata columns of each sentence stored in a shard, see file_sentences()
+spool_fields = 8
+# Versions of the corpora. The counts of a corpus are kept in counts_dir until its version or files change.
+icepahc_version = "icepahc-v0.9"
+mim_version = "MIM"
+giga_version = "rmh"
+# Add the frequency measures of each lemma to the output (requires numpy, see lemmafreq/measures.py)
+frequency_measures = False
+# Seconds between the progress lines of each stage of the run, None to record nothing (see lemmafreq/instrument.py)
+instrument_interval = None
+
+# IDs of the (lemma, tag) pairs in all corpora, see lemmafreq/vocab.py
+vocab = Vocabulary()
+
+
+def text_sentences(teifile):
+    """
+    Function to extract sentences from tei xml file in the Gigaword Corpus. Yields the sentence number,
+    the tokens of the sentence and an array with the vocabulary ID of each word in the sentence
+    """
+    for sent_no, text, lemmas in giga_sentences(teifile):
+        yield sent_no, text, vocab.intern_all(lemmas)
 
-# XML namespace
-ns = {"tei": "http://www.tei-c.org/ns/1.0"}
 
+def text_ids(teifile):
+    """
+    Function to extract the vocabulary IDs of lemma occurences from tei xml file in the Gigaword Corpus
+    """
+    for sent_no, text, ids in text_sentences(teifile):
+        yield from ids
 
-def text_words(teifile, token_list, text_list):
+
+def get_genre(file):
     """
-    Function to extract lemma occurences from tei xml file in the Gigaword Corpus
+    Function to get the genre of a file from the name of its directory, e.g. IGC-News1-22.10
     """
-    root = xml.etree.ElementTree.parse(teifile).getroot()
-    for sent in root.findall(".//tei:s", ns):
-        sent_no = ".".join(
-            sent.get("{http://www.w3.org/XML/1998/namespace}id").split(".")[-2:]
-        )
-        token_list[sent_no] = []
-        text_list[sent_no] = []
-        for aword in sent:
-            text_list[sent_no].append(aword.text)
-            if aword.get("type") != "punctuation":
-                lemma = aword.get("lemma")
-                tag = aword.get("pos")
+    return giga_genre(file, basedir)
 
-                if lemma is not None and tag is not None:
 
-                    # if noun, include gender with tag
-                    if tag[0] == "n":
-                        tag = tag[:2]
-                    else:
-                        tag = tag[0]
+def count_icepahc():
+    """
+    Function to compile frequency information from IcePaHC
+    """
+    icepahc_c = Counts(vocab)
+    for file in icepahc_file_list:
+        with open(file, "r") as input_file:
+            lines = input_file.readlines()
+        for t in tag_and_lemmatize(lines, tagger_backend, tag_cache):
+            icepahc_c.update(vocab.intern_all(tagged_lemmas(t)))
+    print(get_tagger(tagger_backend, tag_cache).stats())
+    return icepahc_c
 
-                    token_list[sent_no].append((tag, lemma))
 
-                    yield "{}{}{}".format(lemma, ", ", tag)
+def count_mim():
+    """
+    Function to compile frequency information from the MÍM corpus
+    """
+    mim_c = Counts(vocab)
+    for full_fname, folder, year in read_mim_file_list(mim_file_list, mim_basedir):
+        for sent_no, text, lemmas, simple_lemmas in mim_sentences(full_fname):
+            mim_c.update(vocab.intern_all(lemmas))
+    return mim_c
 
 
-def mim_text_words(teifile):
+def count_file(file):
     """
-    Function to extract lemma occurences from tei xml file in the MÍM corpus
+    Function to count lemmas in a file in the Gigaword Corpus, returns a list of (key, count) pairs
     """
-    root = xml.etree.ElementTree.parse(teifile).getroot()
-    for sent in root.findall(".//tei:s", ns):
-        for aword in sent:
-            if aword.get("type") != "punctuation":
-                lemma = aword.get("lemma")
-                tag = aword.get("type")
+    return [(vocab.key(i), count) for i, count in Counter(text_ids(file)).items()]
 
-                # if noun, include gender with tag
-                if tag[0] == "n":
-                    tag = tag[:2]
-                else:
-                    tag = tag[0]
 
-                yield "{}{}{}".format(lemma, ", ", tag)
+def count_giga(checkpoint, files):
+    """
+    Function to compile frequency information from files in the Gigaword Corpus. Only files which are new or
+    have changed since they were counted in checkpoint are counted
+    """
+    counted = checkpoint.update_counts(files, count_file)
+    print(
+        "Counted {} files, {} were counted in an earlier run".format(
+            counted, len(files) - counted
+        )
+    )
+    return checkpoint.totals(files, vocab)
 
 
-def tag_and_lemmatize(text):
+def compile_year_cube(checkpoint, files):
     """
-    Calls tagging API from http://malvinnsla.arnastofnun.is/about_en
+    Function to write the counts of each lemma in files by year and genre to year_cube, from the counts of each file
+    in checkpoint and the year in its header. Files which are not in checkpoint are counted first. The cube is only
+    written again if the files have changed since it was written
     """
-    url = "http://malvinnsla.arnastofnun.is"
-    payload = {"text": text, "lemma": "on"}
-    headers = {}
-    try:
-        res = requests.post(url, data=payload, headers=headers)
-        tagged = json.loads(res.text)
-    except ConnectionError as exception:
-        print(exception)
-        print("\n\n")
-    return tagged
+    digest = manifest_digest(files, giga_version)
+    if os.path.exists(year_cube):
+        with YearCube(year_cube) as cube:
+            if cube.digest() == digest:
+                print("{} is up to date".format(year_cube))
+                return
+    missing = checkpoint.missing(files)
+    if missing:
+        # the checkpoint is empty if the counts of the corpus were read from counts_dir
+        print(
+            "Counting {} of {} files again for the year cube, their counts are not in {}".format(
+                len(missing), len(files), checkpoint.path
+            )
+        )
+    checkpoint.update_counts(files, count_file)
+    with instrument.stage("year cube"):
+        cube = CubeBuilder()
+        for file, items in zip(files, checkpoint.file_counts(files)):
+            ids = array("i")
+            counts = array("q")
+            for key, count in items:
+                ids.append(vocab.intern_key(key))
+                counts.append(count)
+            cube.add(parse_year(source_year(file)), get_genre(file), ids, counts)
+        write_cube(year_cube, cube, vocab, digest)
+    print("Wrote counts by year and genre to {}".format(year_cube))
+
+
+def file_sentences(file, genre):
+    """
+    Function to yield the metadata columns of each sentence in a file in the Gigaword Corpus, i.e. the text ID,
+    sentence ID, sentence number, genre, year, author's birth year and sex and the text, and the vocabulary ID
+    of each lemma in the sentence
+    """
+    text_id = file.split("/")[-1]
+    year = source_year(file) or ""
+    author_year = ""
+    author_sex = ""
+
+    for sent_no, text, ids in text_sentences(file):
+        fields = [
+            text_id,
+            text_id.split(".")[0] + "." + sent_no,
+            sent_no,
+            genre,
+            year,
+            author_year,
+            author_sex,
+            " ".join(text),
+        ]
+        yield fields, ids
+
+
+def write_sentences(out, file, genre):
+    """
+    Function to write frequency information for each sentence in a file in the Gigaword Corpus. The
+    frequency of each lemma is looked up by its vocabulary ID in the counters out was opened with.
+    """
+    for fields, ids in file_sentences(file, genre):
+        out.write(*fields, ids)
 
 
-def clean_tagged_output(tagged_text, delimiter):
+def load_other_corpora(store):
     """
-    Filter out relevant data from the tagging and lemmatizing step
+    Function to load the counts of IcePaHC and the MÍM corpus from store, counting them if they are missing.
+    Returns the counts of IcePaHC and MÍM and the paths of the counts in the store
     """
-    for paragraph in tagged_text.values():
-        for sentences in paragraph:
-            sentences = dict(sentences)
-        # Looping through tagged output to get to words
-        for sentence in sentences.values():
-            for sent in sentence:
-                for word in sent:
-                    if word["word"] not in string.punctuation:
-                        tag = word["tag"]
-                        lemma = word["lemma"]
-                        # if noun, include gender with tag
-                        if tag[0] == "n":
-                            tag = tag[:2]
-                        else:
-                            tag = tag[0]
+    mim_files = [mim_file_list] + [
+        full_fname
+        for full_fname, folder, year in read_mim_file_list(mim_file_list, mim_basedir)
+    ]
+    icepahc_tagger_version = icepahc_version + ":" + backend_identity(tagger_backend)
+
+    print("Compiling frequency information from IcePaHC...")
+    icepahc_c = store.load_or_count(
+        "icepahc", icepahc_file_list, count_icepahc, icepahc_tagger_version, vocab
+    )
 
-                        yield "{}{}{}".format(lemma, delimiter, tag)
+    print("Compiling frequency information from the MÍM corpus...")
+    mim_c = store.load_or_count("mim", mim_files, count_mim, mim_version, vocab)
+
+    paths = [
+        store.path("icepahc", icepahc_file_list, icepahc_tagger_version),
+        store.path("mim", mim_files, mim_version),
+    ]
+    return icepahc_c, mim_c, paths
 
 
 def compile_full_frequency(output_file):
     """
-    Function to compile frequency information from the corpora
+    Function to compile frequency information from the corpora. The corpora are counted first and the counts
+    stored in counts_dir, then the Gigaword Corpus is read again and each sentence written with the final counts.
+    Counts already in counts_dir are reused if the files of the corpus have not changed.
+
+    The counts of each file in the Gigaword Corpus and the position reached in the output are kept in
+    checkpoint_file. If a run is interrupted, the next run only counts the files which were not counted, and
+    continues writing an uncompressed output after the last file written. If files are added to the corpus,
+    only the new files are counted and their counts added to the counts of the other files.
     """
-    c = Counter()
-    icepahc_c = Counter()
-    mim_c = Counter()
-    token_list = dict()
-    text_list = dict()
+    store = CountStore(counts_dir)
+    checkpoint = Checkpoint(checkpoint_file, giga_version)
+    files = sorted(file_list)
+    icepahc_c, mim_c, paths = load_other_corpora(store)
+
+    print("Compiling frequency information from the Gigaword Corpus...")
+    c = store.load_or_count(
+        "giga", files, lambda: count_giga(checkpoint, files), giga_version, vocab
+    )
+    if year_cube is not None:
+        compile_year_cube(checkpoint, files)
 
-    out = open(output_file, "w")
+    # the output is only resumed if it was written with the same counts
+    digest = " ".join(
+        os.path.basename(path)
+        for path in paths + [store.path("giga", files, giga_version)]
+    )
+    files_done, offset = 0, 0
+    if can_resume(output_file):
+        files_done, offset = checkpoint.output_position(output_file, digest)
+    if files_done:
+        print("Resuming {} after {} files...".format(output_file, files_done))
+
+    with instrument.stage("write giga"), open_sentence_writer(
+        output_file,
+        vocab,
+        ("giga", "icepahc", "mim"),
+        compression_threads,
+        offset,
+        (c, icepahc_c, mim_c),
+        frequency_measures,
+    ) as out:
+        for file_no, file in enumerate(files[files_done:], files_done + 1):
+            print("Writing frequency information for {}...".format(file))
+            write_sentences(out, file, get_genre(file))
+            if can_resume(output_file) and (checkpoint.due() or file_no == len(files)):
+                checkpoint.save_output_position(
+                    output_file, digest, file_no, out.tell()
+                )
 
-    print("Compiling frequency information from IcePaHC...")
-    # compile frequency information from IcePaHC
-    for file in icepahc_file_list:
-        with open(file, "r") as input_file:
-            for line in input_file:
-                t = tag_and_lemmatize(line)
-                icepahc_c.update(clean_tagged_output(t, ", "))
-
-    # compile frequency information from the MÍM corpus
-    with open(mim_file_list) as f:
-        print("Compiling frequency information from the MÍM corpus...")
-        reader = csv.DictReader(f, delimiter="\t")
-        for text_count, item in enumerate(reader):
-            folder = item["Folder"]
-            fname = item["File Name"]
-            full_fname = "{}{}/{}".format(mim_basedir, folder, fname)
-            mim_c.update(mim_text_words(full_fname))
 
+def compile_genre_frequency(output_dir):
+    """
+    Function to compile frequency information on each text genre in the Gigaword Corpus. The genre of a file is
+    the genre of its directory. All genres are counted in one pass over the corpus, and then the sentences of each
+    file are written to the output file of its genre in a second pass.
+    """
+    genre_file_list = dict()
     for file in sorted(file_list):
-        print("Compiling frequency information from {}...".format(file))
-        genre = file.split(basedir)[1].split("/")[0].split("-")[1]
-        with open(file, "r"):
-            text_id = file.split("/")[-1]
-            c.update((text_words(file, token_list, text_list)))
-            root = xml.etree.ElementTree.parse(file).getroot()
-            year = (
-                root.find(".//tei:sourceDesc", ns)
-                .find(".//tei:date", ns)
-                .attrib.get("when")[:4]
+        genre_file_list.setdefault(get_genre(file), []).append(file)
+
+    store = CountStore(counts_dir)
+    genre_c = dict()
+    for genre, files in genre_file_list.items():
+        genre_c[genre] = store.load("giga_" + genre, files, giga_version, vocab)
+
+    uncounted = [genre for genre in genre_file_list if genre_c[genre] is None]
+    if uncounted:
+        print(
+            "Compiling frequency information from genres {}...".format(
+                ", ".join(uncounted)
             )
-            author_year = ""
-            author_sex = ""
-
-            for sent_id in token_list:
-                tup = []
-                vector = []
-                for word in token_list[sent_id]:
-                    lemma_tuple = str(word[1]) + ", " + str(word[0])
-                    output_tuple = (
-                        lemma_tuple,
-                        c[lemma_tuple],
-                        icepahc_c[lemma_tuple],
-                        mim_c[lemma_tuple],
-                    )
-                    tup.append(str(output_tuple))
-                    vector.append(
-                        str(
-                            (c[lemma_tuple], icepahc_c[lemma_tuple], mim_c[lemma_tuple])
-                        )
-                    )
-                output = [
-                    text_id,
-                    text_id.split(".")[0] + "." + sent_id,
-                    sent_id,
-                    genre,
-                    year,
-                    author_year,
-                    author_sex,
-                    " ".join(text_list[sent_id]),
-                    " ".join(tup),
-                    " ".join(vector),
-                ]
-                out.write("\t".join(output))
-                out.write("\n")
-
-    out.close()
-
-
-def get_genre_frequency(genre, output_dir):
-    """
-    Function to compile frequency information from each genre in the Gigaword Corpus
-    """
-    c = Counter()
-    token_list = dict()
-    text_list = dict()
-
-    output_file = output_dir + "giga_" + genre + "_freq.tsv"
-    out = open(output_file, "w")
-
-    genre_file_list = [file for file in file_list if genre in file]
-
-    print("Compiling frequency information from genre {}".format(genre))
-
-    for file in sorted(genre_file_list):
-        print("Compiling frequency information from {}...".format(file))
-        genre = file.split(basedir)[1].split("/")[0].split("-")[1]
-        with open(file, "r"):
-            text_id = file.split("/")[-1]
-            c.update((text_words(file, token_list, text_list)))
-            root = xml.etree.ElementTree.parse(file).getroot()
-            year = (
-                root.find(".//tei:sourceDesc", ns)
-                .find(".//tei:date", ns)
-                .attrib.get("when")[:4]
+        )
+        for genre in uncounted:
+            genre_c[genre] = Counts(vocab)
+        with instrument.stage("count genres"):
+            for file in sorted(file_list):
+                genre = get_genre(file)
+                if genre in uncounted:
+                    genre_c[genre].update(text_ids(file))
+        for genre in uncounted:
+            store.save(
+                "giga_" + genre, genre_file_list[genre], genre_c[genre], giga_version
             )
-            author_year = ""
-            author_sex = ""
-
-            for sent_id in token_list:
-                tup = []
-                vector = []
-                for word in token_list[sent_id]:
-                    lemma_tuple = str(word[1]) + ", " + str(word[0])
-                    output_tuple = (lemma_tuple, c[lemma_tuple])
-                    tup.append(str(output_tuple))
-                    vector.append(str(c[lemma_tuple]))
-                output = [
-                    text_id,
-                    text_id.split(".")[0] + "." + sent_id,
-                    sent_id,
-                    genre,
-                    year,
-                    author_year,
-                    author_sex,
-                    " ".join(text_list[sent_id]),
-                    " ".join(tup),
-                    " ".join(vector),
-                ]
-                out.write("\t".join(output))
-                out.write("\n")
-
-    out.close()
 
+    # the writers are closed, and the output written so far kept, if writing a file fails
+    with ExitStack() as stack:
+        outs = dict()
+        for genre in genre_file_list:
+            outs[genre] = stack.enter_context(
+                open_sentence_writer(
+                    output_dir + "giga_" + genre + "_freq" + genre_output_extension,
+                    vocab,
+                    (genre,),
+                    compression_threads,
+                    counters=(genre_c[genre],),
+                    measures=frequency_measures,
+                )
+            )
+        with instrument.stage("write genres"):
+            for file in sorted(file_list):
+                print("Writing frequency information for {}...".format(file))
+                genre = get_genre(file)
+                write_sentences(outs[genre], file, genre)
 
-def compile_genre_frequency(output_dir):
+
+def shard_path(shard, n_shards, extension):
     """
-    Function to compile text genres in the Gigaword Corpus and get frequency information on each of them
+    Function to get the path of the output of a shard in shard_dir
     """
-    genres = set()
+    return os.path.join(
+        shard_dir, "giga_shard_{}_of_{}{}".format(shard, n_shards, extension)
+    )
 
-    for file in sorted(file_list):
-        genre = file.split(basedir)[1].split("/")[0].split("-")[1]
-        genres.add(genre)
 
-    for genre in genres:
-        get_genre_frequency(genre, output_dir)
+def compile_shard(shard, n_shards):
+    """
+    Function to count one of n_shards shards of the files in the Gigaword Corpus, e.g. on one of several machines.
+    The files are sorted and split into contiguous shards of similar size. The counts of the shard are written to
+    shard_dir, in the order of their vocabulary IDs, along with a spool of its sentences (see lemmafreq/spool.py)
+    from which merge_shards() writes the output once every shard has been counted
+    """
+    files = shard_files(sorted(file_list), shard, n_shards)
+    os.makedirs(shard_dir, exist_ok=True)
+    counts_path = shard_path(shard, n_shards, ".tsv.gz")
+    spool_path = shard_path(shard, n_shards, ".spool")
+
+    c = Counts(vocab)
+    # the files are only moved into place once the shard is complete
+    spool = SentenceSpool(spool_fields, path=spool_path + ".tmp")
+    with instrument.stage("count shard"):
+        for file in files:
+            print("Counting {}...".format(file))
+            for fields, ids in file_sentences(file, get_genre(file)):
+                c.update(ids)
+                spool.write(fields, ids)
+    spool.close()
+    write_shard_counts(c, counts_path + ".tmp.gz")
+    os.replace(counts_path + ".tmp.gz", counts_path)
+    os.replace(spool_path + ".tmp", spool_path)
+    print(
+        "Counted {} files and {} sentences in shard {} of {}".format(
+            len(files), len(spool), shard, n_shards
+        )
+    )
+
+
+def write_shard_counts(c, path):
+    """
+    Function to write the count of each vocabulary ID of a shard to path, in the order of the IDs and including
+    IDs with a count of 0, so line N holds the key of the ID N used in the spool of the shard
+    """
+    with open_counts(path, "w") as f:
+        for i in range(len(vocab)):
+            f.write("{}\t{}\n".format(vocab.key(i), c[i]))
+
+
+def merge_shards(n_shards, output_file):
+    """
+    Function to merge the n_shards shards written by compile_shard() into output_file. The counts of the shards are
+    added up and the sentences of each shard written, in the order of the shards, with the total counts. The output
+    is the same as that of compile_full_frequency()
+    """
+    check_shards(n_shards, lambda shard: shard_path(shard, n_shards, ".spool"))
+
+    print("Merging the counts of {} shards...".format(n_shards))
+    c = Counts(vocab)
+    # vocabulary ID of each ID in each shard, line N of the counts of a shard holds its ID N
+    shard_ids = []
+    with instrument.stage("merge shards"):
+        for shard in range(n_shards):
+            ids = array("i")
+            with open_counts(shard_path(shard, n_shards, ".tsv.gz"), "r") as f:
+                for line in f:
+                    key, count = line.rstrip("\n").rsplit("\t", 1)
+                    i = vocab.intern_key(key)
+                    ids.append(i)
+                    c[i] += int(count)
+            shard_ids.append(ids)
+
+    icepahc_c, mim_c, paths = load_other_corpora(CountStore(counts_dir))
+
+    with instrument.stage("write giga"), open_sentence_writer(
+        output_file,
+        vocab,
+        ("giga", "icepahc", "mim"),
+        compression_threads,
+        counters=(c, icepahc_c, mim_c),
+        measures=frequency_measures,
+    ) as out:
+        for shard in range(n_shards):
+            print("Writing frequency information for shard {}...".format(shard))
+            ids_of_shard = shard_ids[shard]
+            for fields, shard_sent_ids in read_spool(
+                shard_path(shard, n_shards, ".spool"), spool_fields
+            ):
+                ids = array("i", [ids_of_shard[i] for i in shard_sent_ids])
+                out.write(*fields, ids)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        metavar="I/N",
+        help="only count shard I of N of the corpus, e.g. 0/4, to be merged with --merge N",
+    )
+    parser.add_argument(
+        "--merge",
+        type=int,
+        metavar="N",
+        help="write output_file from N shards counted with --shard",
+    )
+    parser.add_argument(
+        "--year-cube",
+        action="store_true",
+        help="only write year_cube, the counts of each lemma by year and genre",
+    )
+    args = parser.parse_args()
+
+    if instrument_interval is not None:
+        instrument.enable(instrument_interval)
+    if args.shard is not None:
+        compile_shard(*args.shard)
+    elif args.merge is not None:
+        merge_shards(args.merge, output_file)
+    elif args.year_cube:
+        compile_year_cube(Checkpoint(checkpoint_file, giga_version), sorted(file_list))
+    else:
+        compile_full_frequency(output_file)
@@ -7,16 +7,39 @@ the following information:
     Lemma
     Word category, including the gender if the lemma in question is a noun
     The lemma's frequency
+    If frequency_measures is set, the lemma's frequency per million words, on the Zipf scale and on a log scale
+
+The files can be counted in parallel with --workers N. The output is the same for any number of workers.
+
+With --incremental, the counts of each file are kept in checkpoint_file, and only files which have been added or
+changed since the last run are counted. The counts of files which have been removed are dropped. The output is the
+same as that of a full run.
+
+With --top K, only the K most frequent lemmas are written. Lemmas with the same frequency are sorted by lemma, so
+the output is the same on every run.
+
+The corpus can be counted in shards, e.g. on several machines, with --shard I/N, which counts shard I of N, from 0,
+and writes its counts to shard_dir. The files are sorted and split into N contiguous shards of similar size. Once
+all shards have been counted, --merge N adds up their counts and writes the output, which is the same as that of
+a run over the whole corpus.
 
 """
 
 from collections import Counter
-import xml.etree.ElementTree
 import os
 import glob
 import csv
 import sys
-import operator
+import argparse
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from lemmafreq import instrument
+from lemmafreq.corpora import giga_sentences
+from lemmafreq.counts import read_counts, write_counts
+from lemmafreq.parallel import check_shards, count_files, parse_shard, shard_files
+from lemmafreq.checkpoint import Checkpoint
+from lemmafreq.freqlist import write_freq_list
 
 # Directory where the Gigaword Corpus is stored.
 file_list = [
@@ -31,46 +54,128 @@ file_list = [
 output_file = (
     "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/giga_simple_freq.tsv"
 )
-
-# XML namespace
-ns = {"tei": "http://www.tei-c.org/ns/1.0"}
+# Counts of each file, kept between runs with --incremental
+checkpoint_file = "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/counts/giga_simple_checkpoint.sqlite"
+# Directory where the counts of each shard are stored with --shard and read with --merge
+shard_dir = "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/giga_shards/"
+# Add the frequency measures of each lemma to the output (requires numpy, see lemmafreq/measures.py)
+frequency_measures = False
+# Seconds between the progress lines of each stage of the run, None to record nothing (see lemmafreq/instrument.py)
+instrument_interval = None
 
 
 def text_words(teifile):
     """
     Function to extract lemma occurances from tei xml file
     """
-    root = xml.etree.ElementTree.parse(teifile).getroot()
-    for aword in root.findall(".//tei:w", ns):
-        lemma = aword.get("lemma")
-        tag = aword.get("pos")
+    for sent_no, text, lemmas in giga_sentences(teifile):
+        for lemma, tag in lemmas:
+            yield "{}\t{}".format(lemma, tag)
+
 
-        if lemma is not None and tag is not None:
+def shard_path(shard, n_shards):
+    """
+    Function to get the path of the counts of a shard in shard_dir
+    """
+    return os.path.join(
+        shard_dir, "giga_simple_shard_{}_of_{}.tsv.gz".format(shard, n_shards)
+    )
 
-            # if noun, include gender with tag
-            if tag[0] == "n":
-                tag = tag[:2]
-            else:
-                tag = tag[0]
 
-            yield "{}\t{}".format(lemma, tag)
+def merge_shards(n_shards):
+    """
+    Function to add up the counts of n_shards shards counted with --shard, in the order of the shards
+    """
+    check_shards(n_shards, lambda shard: shard_path(shard, n_shards))
+    # counter object with the frequencies of lemmas in all shards
+    c = Counter()
+    with instrument.stage("merge shards"):
+        for shard in range(n_shards):
+            c.update(read_counts(shard_path(shard, n_shards)))
+    return c
 
 
-# counter object that updates frequencies for lemmas file by file
-c = Counter()
+def count_file(teifile):
+    """
+    Function to count lemma occurances in a tei xml file, returns a list of (lemma and tag, count) pairs
+    """
+    return list(Counter(text_words(teifile)).items())
 
-print("Processing texts...")
-for file in sorted(file_list):
-    with open(file, "r"):
-        # update counter with words from the current text
-        c.update((text_words(file)))
 
-# sort frequency list in reverse order by counts (most frequent first)
-sorted_words = reversed(sorted(c.items(), key=operator.itemgetter(1)))
+def count_texts(files, workers=1, incremental=False):
+    """
+    Function to count lemma occurances in files with workers processes. If incremental is set, only the files added
+    or changed since the last incremental run are counted and the counts of each file are kept in checkpoint_file.
+    Returns the counter and the number of files counted
+    """
+    if incremental:
+        checkpoint = Checkpoint(checkpoint_file)
+        counted = checkpoint.update_counts(files, count_file, workers=workers)
+        return checkpoint.totals(files), counted
+    return count_files(text_words, files, workers=workers), len(files)
 
-# make tab formatted entries for output file
-allwords = ["{}\t{}".format(x[0], x[1]) for x in sorted_words]
 
-# write output to file
-with open(output_file, "w") as f:
-    f.write("\n".join(allwords))
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--workers", type=int, default=1, help="number of processes to count with"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only count files added or changed since the last incremental run",
+    )
+    parser.add_argument(
+        "--top", type=int, help="only write the TOP most frequent lemmas"
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        metavar="I/N",
+        help="only count shard I of N of the files, e.g. 0/4, to be merged with --merge N",
+    )
+    parser.add_argument(
+        "--merge",
+        type=int,
+        metavar="N",
+        help="write the frequency list from the counts of N shards counted with --shard",
+    )
+    args = parser.parse_args()
+    if args.shard is not None and args.incremental:
+        parser.error("--incremental cannot be used with --shard")
+    if instrument_interval is not None:
+        instrument.enable(instrument_interval)
+
+    if args.merge is not None:
+        c = merge_shards(args.merge)
+        print("Merged the counts of {} shards".format(args.merge))
+    else:
+        files = sorted(file_list)
+        if args.shard is not None:
+            files = shard_files(files, *args.shard)
+
+        print("Processing texts...")
+        start = time.time()
+        # counter object with the frequencies of lemmas in all texts
+        with instrument.stage("count giga"):
+            c, counted = count_texts(files, args.workers, args.incremental)
+        elapsed = time.time() - start
+        print(
+            "Processed {} of {} texts in {:.1f} seconds with {} worker(s)".format(
+                counted, len(files), elapsed, args.workers
+            )
+        )
+
+        if args.shard is not None:
+            # the counts of a shard are only moved into place once they are complete
+            os.makedirs(shard_dir, exist_ok=True)
+            path = shard_path(*args.shard)
+            write_counts(c, path + ".tmp.gz")
+            os.replace(path + ".tmp.gz", path)
+            print("Wrote the counts of shard {} of {} to {}".format(*args.shard, path))
+            sys.exit()
+
+    # write the frequency list, most frequent first
+    write_freq_list(
+        c, output_file, top=args.top, measures=frequency_measures, corpus="giga"
+    )
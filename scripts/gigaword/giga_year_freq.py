@@ -0,0 +1,59 @@
+"""
+Script for looking up the frequency of lemmas in the Gigaword Corpus by year of publication and genre, in the cube
+written by compile_year_cube() in giga_get_lemma_freq.py or by compile_all.py (see lemmafreq/yearcube.py). The
+corpus is not read.
+
+Run with: python giga_year_freq.py lemma <lemma> <tag> [--genre GENRE]
+          python giga_year_freq.py top <year> [-k K] [--genre GENRE]
+          python giga_year_freq.py info
+
+lemma prints the year and frequency of a lemma in each year in which it occurs, and top the K most frequent lemmas
+of a year, with their word category and frequency, separated by a tab. Both are limited to one genre with --genre.
+Lemmas whose year is not known are counted in year 0.
+
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from lemmafreq.yearcube import YearCube
+
+# Counts of each lemma by year and genre, as written by giga_get_lemma_freq.py
+year_cube = "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/giga_year_cube.bin"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="query", required=True)
+    lemma_parser = subparsers.add_parser(
+        "lemma", help="frequency of a lemma in each year"
+    )
+    lemma_parser.add_argument("lemma")
+    lemma_parser.add_argument("tag", help="word category, e.g. nk or s")
+    lemma_parser.add_argument("--genre", help="only count this genre, e.g. News1")
+    top_parser = subparsers.add_parser("top", help="most frequent lemmas of a year")
+    top_parser.add_argument("year", type=int)
+    top_parser.add_argument("-k", type=int, default=10, help="number of lemmas")
+    top_parser.add_argument("--genre", help="only count this genre, e.g. News1")
+    subparsers.add_parser("info", help="years and genres in the cube")
+    args = parser.parse_args()
+
+    if not os.path.exists(year_cube):
+        sys.exit(
+            "No year cube in {}, run giga_get_lemma_freq.py --year-cube first".format(
+                year_cube
+            )
+        )
+    with YearCube(year_cube) as cube:
+        if args.query == "lemma":
+            for year, count in cube.by_year(args.lemma, args.tag, args.genre).items():
+                print("{}\t{}".format(year, count))
+        elif args.query == "top":
+            for lemma, tag, count in cube.top(args.year, args.k, args.genre):
+                print("{}\t{}\t{}".format(lemma, tag, count))
+        else:
+            print("{} lemmas".format(len(cube)))
+            print("Years: {}".format(" ".join(str(year) for year in cube.years())))
+            print("Genres: {}".format(" ".join(cube.genres())))
@@ -0,0 +1,65 @@
+"""
+Script for adding lemma frequencies to a file of IcePaHC sentence IDs in the format of the infoTheoryTestV2 file,
+without tagging IcePaHC. The lemmas of each sentence and their frequency in IcePaHC are looked up in the sentence
+store written by add_freq_V2() in icepahc_get_lemma_freq.py or by compile_all.py (see lemmafreq/sentencestore.py).
+The output is the same as that of add_freq_V2() for the same file.
+
+Run with: python icepahc_annotate.py <input file> <output file>
+
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from lemmafreq.sentencestore import SentenceStore, icepahc_digest
+from lemmafreq.taggers import backend_identity
+from lemmafreq.writers import open_output, output_stats
+
+basedir = "/Users/torunnarnardottir/Vinna/icepahc-v0.9/txt/"
+file_list = sorted(os.listdir(basedir))
+# Tagged sentences of IcePaHC, as written by icepahc_get_lemma_freq.py
+sentence_store = "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/counts/icepahc_sentences.sqlite"
+# Tagger and version of IcePaHC the store must have been written with
+tagger_backend = "http"
+icepahc_version = "icepahc-v0.9"
+# Threads used to compress output ending in .zst, 0 to compress in the thread writing the output
+compression_threads = 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("input_file", help="file of sentence IDs to annotate")
+    parser.add_argument("output_file", help="annotated file to write")
+    args = parser.parse_args()
+
+    if not os.path.exists(sentence_store):
+        sys.exit(
+            "No sentence store in {}, run add_freq_V2() in icepahc_get_lemma_freq.py first".format(
+                sentence_store
+            )
+        )
+    store = SentenceStore(sentence_store)
+    if store.digest() != icepahc_digest(
+        basedir, file_list, icepahc_version + ":" + backend_identity(tagger_backend)
+    ):
+        print(
+            "Warning: IcePaHC or the tagger has changed since {} was written".format(
+                sentence_store
+            )
+        )
+
+    start = time.perf_counter()
+    with open(args.input_file, "r") as input_file:
+        out = open_output(args.output_file, compression_threads)
+        for line in store.annotate(input_file):
+            out.write(line)
+        out.close()
+    store.close()
+    print(
+        output_stats(
+            args.output_file, time.perf_counter() - start, out.buffer.raw.bytes_written
+        )
+    )
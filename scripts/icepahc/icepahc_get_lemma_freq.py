@@ -4,7 +4,8 @@
 Script for extracting frequency information on lemmas in the IcePaHC corpus. The output is twofold:
 
 add_freq_V2() reads an input file which consists of sentence IDs in the corpus, and returns frequency information
-on lemmas in that sentence. The added output shows the following information, separated by a colon:
+on lemmas in that sentence. The tagged sentences are kept in sentence_store, so other files of sentence IDs can be
+annotated without tagging IcePaHC again, see icepahc_annotate.py. The added output shows the following information, separated by a colon:
 
     Tuple containing the lemma, its word category (along with its grammatical gender if the lemma in question is a noun) and the lemmas frequency.
     A frequency vector, showing each lemma's frequency in the order which the lemma appears in the corpus.
@@ -23,21 +24,41 @@ separated by a tab:
     A tuple containing the lemma, its word category (along with its grammatical gender if the lemma in question is a noun) and the lemma's frequency
     in IcePaHC, the MÍM corpus and the Gigaword Corpus.
     A frequency vector, showing each lemma's frequency in IcePaHC, the MÍM corpus and the Gigaword Corpus, in the order in which the lemma appears in the corpus.
+    If frequency_measures is set, a vector of each lemma's frequency per million words, on the Zipf scale and on a log scale
+    in each corpus, see lemmafreq/measures.py
 
 """
 
-import json
-import requests
-from collections import Counter
-from collections import OrderedDict
+from array import array
 import os
-import string
 import glob
-import xml.etree.ElementTree
-import csv
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from lemmafreq import instrument
+from lemmafreq.corpora import (
+    giga_sentences,
+    mim_sentences,
+    read_mim_file_list,
+    tag_and_lemmatize,
+    tagged_lemmas,
+)
+from lemmafreq.countstore import CountStore
+from lemmafreq.icepahc import SentenceIndex
+from lemmafreq.sentencestore import SentenceStore, icepahc_digest
+from lemmafreq.taggers import backend_identity, get_tagger
+from lemmafreq.vocab import Counts, Vocabulary
+from lemmafreq.writers import open_output, open_sentence_writer, output_stats
 
 basedir = "/Users/torunnarnardottir/Vinna/icepahc-v0.9/txt/"
-file_list = sorted(os.listdir(basedir))
+# Names of the texts in basedir, listed when the script is run
+file_list = []
+# Tagger used for IcePaHC: "http" calls the malvinnsla API, "local" tags in-process (see lemmafreq/taggers.py)
+tagger_backend = "http"
+# Cache of tagged IcePaHC lines, shared between the scripts. Set to None to tag every line on each run.
+tag_cache = "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/tag_cache.sqlite"
 input_file_V2 = "/Users/torunnarnardottir/Vinna/icepahc-v0.9/infoTheoryTestV2.ice.treeIDandIDfixed.cod.ooo"
 
 mim_basedir = "/Users/torunnarnardottir/Vinna/MIM/"
@@ -49,323 +70,250 @@ giga_file_list = [
     )
 ]
 
+# Output written as tab separated text, compressed if the name ends in .gz or .zst (requires the optional zstandard
+# package), or as a Parquet file if the name ends in .parquet (requires pyarrow, see lemmafreq/writers.py)
 output_file_total = (
     "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/icepahc_full_freq.tsv"
 )
-
-
-def tag_and_lemmatize(text):
+# Threads used to compress output ending in .zst, 0 to compress in the thread writing the output
+compression_threads = 0
+# Directory where the counts of each corpus are stored
+counts_dir = "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/counts/"
+# Index of the sentence IDs and metadata of each text, updated when the .txt, .psd or .info file of a text changes
+# (see lemmafreq/icepahc.py). Set to None to read the .psd and .info files on each run.
+index_file = (
+    "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/counts/icepahc_index.sqlite"
+)
+# Tagged sentences of IcePaHC and their lemma counts, kept so that add_freq_V2() and icepahc_annotate.py only tag
+# IcePaHC again when its files change (see lemmafreq/sentencestore.py). Set to None to tag IcePaHC on each run.
+sentence_store = "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/counts/icepahc_sentences.sqlite"
+# Versions of the corpora. The counts of a corpus are kept in counts_dir until its version or files change.
+icepahc_version = "icepahc-v0.9"
+mim_version = "MIM"
+giga_version = "rmh"
+# Add the frequency measures of each lemma to the output (requires numpy, see lemmafreq/measures.py)
+frequency_measures = False
+# Seconds between the progress lines of each stage of the run, None to record nothing (see lemmafreq/instrument.py)
+instrument_interval = None
+
+# IDs of the (lemma, tag) pairs in all corpora, see lemmafreq/vocab.py
+vocab = Vocabulary()
+
+
+def mim_text_ids(teifile):
     """
-    Calls tagging API from http://malvinnsla.arnastofnun.is/about_en
+    Function to extract the vocabulary IDs of lemma occurences from tei xml file in the MÍM corpus
     """
-    url = "http://malvinnsla.arnastofnun.is"
-    payload = {"text": text, "lemma": "on"}
-    headers = {}
-    try:
-        res = requests.post(url, data=payload, headers=headers)
-        tagged = json.loads(res.text)
-    except ConnectionError as exception:
-        print(exception)
-        print("\n\n")
-    return tagged
-
-
-def clean_tagged_output(tagged_text, token_list, sent_id, delimiter):
+    for sent_no, text, lemmas, simple_lemmas in mim_sentences(teifile):
+        yield from vocab.intern_all(lemmas)
+
+
+def giga_text_ids(teifile):
     """
-    Filter out relevant data from the tagging and lemmatizing step
+    Function to extract the vocabulary IDs of lemma occurences from tei xml file in the Gigaword Corpus
     """
-    token_list[sent_id] = []
-    for paragraph in tagged_text.values():
-        for sentences in paragraph:
-            sentences = dict(sentences)
-        # Looping through tagged output to get to words
-        for sentence in sentences.values():
-            for sent in sentence:
-                for word in sent:
-                    if word["word"] not in string.punctuation:
-                        token = word["word"]
-                        tag = word["tag"]
-                        lemma = word["lemma"]
-                        # if noun, include gender with tag
-                        if tag[0] == "n":
-                            tag = tag[:2]
-                        else:
-                            tag = tag[0]
-
-                        token_list[sent_id].append((token, tag, lemma))
-
-                        yield "{}{}{}".format(lemma, delimiter, tag)
-
-
-# XML namespace
-ns = {"tei": "http://www.tei-c.org/ns/1.0"}
-
-
-def mim_text_words(teifile):
+    for sent_no, text, lemmas in giga_sentences(teifile):
+        yield from vocab.intern_all(lemmas)
+
+
+def open_index():
     """
-    Function to extract lemma occurences from tei xml file in the MÍM corpus
+    Function to open the sentence index of IcePaHC, indexing the texts which are new or have changed
     """
-    root = xml.etree.ElementTree.parse(teifile).getroot()
-    for sent in root.findall(".//tei:s", ns):
-        for aword in sent:
-            if aword.get("type") != "punctuation":
-                lemma = aword.get("lemma")
-                tag = aword.get("type")
+    with instrument.stage("index icepahc"):
+        index = SentenceIndex(index_file, basedir, file_list)
+    if index.indexed:
+        print("Indexed the sentence IDs of {} texts".format(index.indexed))
+    return index
 
-                # if noun, include gender with tag
-                if tag[0] == "n":
-                    tag = tag[:2]
-                else:
-                    tag = tag[0]
 
-                yield "{}{}{}".format(lemma, ", ", tag)
+def fill_sentence_store(store):
+    """
+    Function to tag and count IcePaHC and store the vocabulary IDs of each sentence, by sentence ID, and the
+    counts in store
+    """
+    c = Counts(vocab)
+    token_list = dict()
+    texts = dict()
+    index = open_index()
+
+    with instrument.stage("count icepahc"):
+        for file in file_list:
+            print("Compiling frequency information from {}...".format(file))
+            sent_ids = index.sentence_ids(file)
+            full_path = basedir + file
+            with open(full_path, "r", encoding="utf-8") as input_file:
+                lines = input_file.readlines()
+            for sent_count, t in enumerate(
+                tag_and_lemmatize(lines, tagger_backend, tag_cache)
+            ):
+                sent_id = sent_ids[sent_count]
+                token_list[sent_id] = vocab.intern_all(tagged_lemmas(t))
+                c.update(token_list[sent_id])
+                texts[sent_id] = lines[sent_count].rstrip("\n")
+    print(get_tagger(tagger_backend, tag_cache).stats())
+
+    store.fill(
+        ((sent_id, texts[sent_id], ids) for sent_id, ids in token_list.items()),
+        c,
+        icepahc_digest(
+            basedir, file_list, icepahc_version + ":" + backend_identity(tagger_backend)
+        ),
+    )
 
 
-def giga_text_words(teifile):
+def add_freq_V2(output_file_V2, input_path=input_file_V2):
     """
-    Function to extract lemma occurences from tei xml file in the Gigaword Corpus
+    Function for adding lemma frequencies for each sentence in an existing infoTheoryTestV2 file, or another file
+    of sentence IDs given as input_path. IcePaHC is only tagged and counted if sentence_store is out of date,
+    otherwise the sentences are looked up in the store
     """
-    root = xml.etree.ElementTree.parse(teifile).getroot()
-    for sent in root.findall(".//tei:s", ns):
-        for aword in sent:
-            if aword.get("type") != "punctuation":
-                lemma = aword.get("lemma")
-                tag = aword.get("pos")
-
-                if lemma is not None and tag is not None:
+    store = SentenceStore(sentence_store)
+    if store.digest() != icepahc_digest(
+        basedir, file_list, icepahc_version + ":" + backend_identity(tagger_backend)
+    ):
+        fill_sentence_store(store)
+    else:
+        print("Using the tagged sentences in {}".format(sentence_store))
+
+    start = time.perf_counter()
+    out = open_output(output_file_V2, compression_threads)
+
+    with instrument.stage("write v2"), open(
+        input_path,
+        "r+",
+    ) as input_file:
+        # the line is built first and written at once
+        for line in store.annotate(input_file):
+            out.write(line)
+
+    out.close()
+    store.close()
+    print(
+        output_stats(
+            output_file_V2, time.perf_counter() - start, out.buffer.raw.bytes_written
+        )
+    )
 
-                    # if noun, include gender with tag
-                    if tag[0] == "n":
-                        tag = tag[:2]
-                    else:
-                        tag = tag[0]
 
-                yield "{}{}{}".format(lemma, ", ", tag)
+def count_mim():
+    """
+    Function to compile frequency information from the MÍM corpus
+    """
+    mim_c = Counts(vocab)
+    for full_fname, folder, year in read_mim_file_list(mim_file_list, mim_basedir):
+        mim_c.update(mim_text_ids(full_fname))
+    return mim_c
 
 
-def add_freq_V2(output_file_V2):
+def count_giga():
     """
-    Function for adding lemma frequencies for each sentence in an existing infoTheoryTestV2 file
+    Function to compile frequency information from the Gigaword Corpus
     """
-    c = Counter()
-    token_list = dict()
-
-    for file in file_list:
-        print("Compiling frequency information from {}...".format(file))
-        psd_path = (
-            "/".join(basedir.split("/")[:-2])
-            + "/psd/"
-            + ".".join(file.split(".")[:-1])
-            + ".psd"
-        )
-        ids = []
-        # Reading .psd version of file to get sentence IDs
-        with open(psd_path, "r", encoding="utf-8") as psd_file:
-            for line in psd_file:
-                if line.strip(" ").startswith("(ID"):
-                    psd_id = line.split(",")[-1].split(")")[0]
-                    if psd_id.startswith("."):
-                        psd_id = psd_id.split(".")[1]
-                    ids.append(psd_id)
-            # Most .psd files are missing the final ID
-            if "." in psd_id:
-                psd_id = psd_id.split(".")[1]
-                ids.append(str(int(psd_id) + 1))
-                ids.append(str(int(psd_id) + 2))
-                ids.append(str(int(psd_id) + 3))
-                ids.append(str(int(psd_id) + 4))
-                ids.append(str(int(psd_id) + 5))
-                ids.append(str(int(psd_id) + 6))
-                ids.append(str(int(psd_id) + 7))
-            else:
-                ids.append(str(int(psd_id) + 1))
-                ids.append(str(int(psd_id) + 2))
-                ids.append(str(int(psd_id) + 3))
-                ids.append(str(int(psd_id) + 4))
-                ids.append(str(int(psd_id) + 5))
-                ids.append(str(int(psd_id) + 6))
-                ids.append(str(int(psd_id) + 7))
-        full_path = basedir + file
-        file = file.split(".")[1]
-        with open(full_path, "r", encoding="utf-8") as input_file:
-            sent_count = 0
-            for line in input_file:
-                t = tag_and_lemmatize(line)
-                sent_id = file.lower() + "." + str(ids[sent_count])
-                c.update(clean_tagged_output(t, token_list, sent_id, ", "))
-                sent_count += 1
-
-    output_file_V2 = open(output_file_V2, "w")
-
-    with open(
-        input_file_V2,
-        "r+",
-    ) as input_file:
-        for line in input_file:
-            sent_id = ".".join(line.rstrip("\n").split(":")[-2:]).lower()
-            # Some extra lines are present in input file
-            if sent_id == "z.xxxgenre@":
-                continue
-            # Errors in input file handled, e.g. nar@1450.bandamenn.nar-sag,26.11.
-            # The file and sent ID is usually shown differently, e.g. viglundur:1286
-            elif "@" in sent_id:
-                begin = sent_id.split(".")[2]
-                end = sent_id.split(",")[1]
-                if end.startswith("."):
-                    sent_id = begin + end
-                else:
-                    sent_id = begin + "." + end
-            output_file_V2.write(line.rstrip("\n"))
-            output_file_V2.write(":")
-            for word in token_list[sent_id]:
-                lemma_tuple = str(word[2]) + ", " + str(word[1])
-                output_tuple = (lemma_tuple, c[lemma_tuple])
-                output_file_V2.write(str(output_tuple))
-                output_file_V2.write(" ")
-            output_file_V2.write(":")
-            for word in token_list[sent_id]:
-                lemma_tuple = str(word[2]) + ", " + str(word[1])
-                output_file_V2.write(str(c[lemma_tuple]))
-                output_file_V2.write(" ")
-            output_file_V2.write("\n")
-
-    output_file_V2.close()
+    giga_c = Counts(vocab)
+    for file in sorted(giga_file_list):
+        giga_c.update(giga_text_ids(file))
+    return giga_c
 
 
 def compile_full_freq(output_file_total):
     """
     Function for compiling frequency information from IcePaHC files and returning it in a file in the following format:
     testID\tsentenceID\tSentence number in text\tSentence text\tTuple with each word's lemma, tag and frequency\tFrequency vector
+
+    The corpora are counted first and the counts stored in counts_dir, where counts of MÍM and the Gigaword Corpus
+    are reused if their files have not changed. The vocabulary IDs of the tagged IcePaHC sentences are kept in a
+    temporary file, which is read again when each sentence is written with the final counts.
     """
-    c = Counter()
-    mim_c = Counter()
-    giga_c = Counter()
-    token_list = OrderedDict()
-    text_list = dict()
-
-    output_file = open(output_file_total, "w")
-
-    with open(mim_file_list) as f:
-        print("Compiling frequency information from the MÍM corpus...")
-        reader = csv.DictReader(f, delimiter="\t")
-        for text_count, item in enumerate(reader):
-            folder = item["Folder"]
-            fname = item["File Name"]
-            full_fname = "{}{}/{}".format(mim_basedir, folder, fname)
-            mim_c.update(mim_text_words(full_fname))
+    store = CountStore(counts_dir)
+
+    print("Compiling frequency information from the MÍM corpus...")
+    mim_files = [
+        full_fname
+        for full_fname, folder, year in read_mim_file_list(mim_file_list, mim_basedir)
+    ]
+    mim_c = store.load_or_count(
+        "mim", [mim_file_list] + mim_files, count_mim, mim_version, vocab
+    )
 
     print("Compiling frequency information from the Gigaword Corpus...")
-    # compile frequency information from the Gigaword Corpus
-    for file in sorted(giga_file_list):
-        with open(file, "r"):
-            giga_c.update(giga_text_words(file))
+    giga_c = store.load_or_count(
+        "giga", giga_file_list, count_giga, giga_version, vocab
+    )
 
     print("Compiling frequency information from IcePaHC...")
-    for file in file_list:
-        psd_path = (
-            "/".join(basedir.split("/")[:-2])
-            + "/psd/"
-            + ".".join(file.split(".")[:-1])
-            + ".psd"
-        )
+    c = Counts(vocab)
+    tagged_file = tempfile.TemporaryFile("w+b")
+    with instrument.stage("count icepahc"):
+        for file in file_list:
+            full_path = basedir + file
+            with open(full_path, "r", encoding="utf-8") as input_file:
+                lines = input_file.readlines()
+            for t in tag_and_lemmatize(lines, tagger_backend, tag_cache):
+                word_ids = vocab.intern_all(tagged_lemmas(t))
+                c.update(word_ids)
+                # the number of words, followed by their IDs
+                array("i", [len(word_ids)]).tofile(tagged_file)
+                word_ids.tofile(tagged_file)
+    print(get_tagger(tagger_backend, tag_cache).stats())
+    store.save(
+        "icepahc",
+        [basedir + file for file in file_list],
+        c,
+        icepahc_version + ":" + backend_identity(tagger_backend),
+    )
 
-        ids = []
-        with open(psd_path, "r", encoding="utf-8") as psd_file:
-            for line in psd_file:
-                if line.strip(" ").startswith("(ID"):
-                    psd_id = line.split(",")[-1].split(")")[0]
-                    if psd_id.startswith("."):
-                        psd_id = psd_id.split(".")[1]
-                    ids.append(psd_id)
-            # Most .psd files are missing the final ID or multiple final IDs
-            if "." in psd_id:
-                psd_id = psd_id.split(".")[1]
-                ids.append(str(int(psd_id) + 1))
-                ids.append(str(int(psd_id) + 2))
-                ids.append(str(int(psd_id) + 3))
-                ids.append(str(int(psd_id) + 4))
-                ids.append(str(int(psd_id) + 5))
-                ids.append(str(int(psd_id) + 6))
-                ids.append(str(int(psd_id) + 7))
-            else:
-                ids.append(str(int(psd_id) + 1))
-                ids.append(str(int(psd_id) + 2))
-                ids.append(str(int(psd_id) + 3))
-                ids.append(str(int(psd_id) + 4))
-                ids.append(str(int(psd_id) + 5))
-                ids.append(str(int(psd_id) + 6))
-                ids.append(str(int(psd_id) + 7))
-        full_path = basedir + file
-        file_simple = file.split(".")[1]
-        with open(full_path, "r", encoding="utf-8") as input_file:
-            sent_count = 0
-            for line in input_file:
-                t = tag_and_lemmatize(line)
-                sent_id = file_simple.lower() + "." + str(ids[sent_count])
-                text_list[sent_id] = line.rstrip("\n")
-                c.update(clean_tagged_output(t, token_list, sent_id, ", "))
-                sent_count += 1
-
-        text_id = file
-        info_file = (
-            "/".join(basedir.split("/")[:-2])
-            + "/info/"
-            + ".".join(file.split(".")[:-1])
-            + ".info"
-        )
-        with open(info_file, "r") as info_file:
-            for line in info_file:
-                if line.startswith("Birthdate:"):
-                    author_year = line.split("\t")[-1].rstrip()
-                elif line.startswith("Date"):
-                    # tab is usually used to indicate the date, but several spaces are used in one case
-                    try:
-                        year = line.split("\t")[-1].rstrip()
-                    except IndexError:
-                        year = ""
-                elif line.startswith("Genre"):
-                    genre = line.split("\t")[-1].rstrip()
+    output_file = open_sentence_writer(
+        output_file_total,
+        vocab,
+        ("icepahc", "mim", "giga"),
+        compression_threads,
+        counters=(c, mim_c, giga_c),
+        measures=frequency_measures,
+    )
+    tagged_file.seek(0)
+
+    index = open_index()
+    with instrument.stage("write icepahc"):
+        for file in file_list:
+            sent_ids = index.sentence_ids(file)
+            text_id = file
+            genre, year, author_year = index.info(file)
             author_sex = ""
 
-        full_path = basedir + file
-        file = file.split(".")[1]
-        with open(full_path, "r") as input_file:
-            sent_count = 0
-            for line in input_file:
-                sent_id = file.lower() + "." + str(ids[sent_count])
-
-                tup = []
-                vector = []
-                for word in token_list[sent_id]:
-                    lemma_tuple = str(word[2]) + ", " + str(word[1])
-                    output_tuple = (
-                        lemma_tuple,
-                        c[lemma_tuple],
-                        mim_c[lemma_tuple],
-                        giga_c[lemma_tuple],
+            full_path = basedir + file
+            with open(full_path, "r", encoding="utf-8") as input_file:
+                sent_count = 0
+                for line in input_file:
+                    sent_id = sent_ids[sent_count]
+                    # vocabulary ID of each word, as tagged in the first pass
+                    length = array("i")
+                    length.fromfile(tagged_file, 1)
+                    word_ids = array("i")
+                    word_ids.fromfile(tagged_file, length[0])
+                    instrument.count(len(word_ids))
+
+                    output_file.write(
+                        text_id,
+                        sent_id,
+                        sent_id.split(".")[1],
+                        genre,
+                        year,
+                        author_year,
+                        author_sex,
+                        line.rstrip("\n"),
+                        word_ids,
                     )
-                    tup.append(str(output_tuple))
-                    vector.append(
-                        str((c[lemma_tuple], mim_c[lemma_tuple], giga_c[lemma_tuple]))
-                    )
-                output = [
-                    text_id,
-                    sent_id,
-                    sent_id.split(".")[1],
-                    genre,
-                    year,
-                    author_year,
-                    author_sex,
-                    text_list[sent_id],
-                    " ".join(tup),
-                    " ".join(vector),
-                ]
-                output_file.write("\t".join(output))
-                output_file.write("\n")
-
-                sent_count += 1
 
+                    sent_count += 1
+
+    tagged_file.close()
     output_file.close()
 
 
-compile_full_freq(output_file_total)
+if __name__ == "__main__":
+    # the texts are listed when the script is run, so it can be loaded without the corpus
+    file_list = sorted(os.listdir(basedir))
+    if instrument_interval is not None:
+        instrument.enable(instrument_interval)
+    compile_full_freq(output_file_total)
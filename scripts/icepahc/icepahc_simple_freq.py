@@ -7,85 +7,70 @@ the following information:
     Lemma
     Word category, including the gender if the lemma in question is a noun
     The lemma's frequency
+    If frequency_measures is set, the lemma's frequency per million words, on the Zipf scale and on a log scale
 
 """
 
-import json
-import requests
 from collections import Counter
 import os
-import string
-import operator
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from lemmafreq import instrument
+from lemmafreq.corpora import tag_and_lemmatize, tagged_lemmas
+from lemmafreq.taggers import get_tagger
+from lemmafreq.freqlist import write_freq_list
 
 # Directory where IcePaHC is stored.
 basedir = "/Users/torunnarnardottir/Vinna/icepahc-v0.9/txt/"
-file_list = sorted(os.listdir(basedir))
+# Names of the texts in basedir, listed when the script is run
+file_list = []
+
+# Tagger used for IcePaHC: "http" calls the malvinnsla API, "local" tags in-process (see lemmafreq/taggers.py)
+tagger_backend = "http"
+# Cache of tagged IcePaHC lines, shared between the scripts. Set to None to tag every line on each run.
+tag_cache = "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/tag_cache.sqlite"
 
 # Path of output file
 output_file = (
     "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/icepahc_simple_freq.tsv"
 )
+# Number of most frequent lemmas written to the output file, None to write all lemmas
+top = None
+# Add the frequency measures of each lemma to the output (requires numpy, see lemmafreq/measures.py)
+frequency_measures = False
+# Seconds between the progress lines of each stage of the run, None to record nothing (see lemmafreq/instrument.py)
+instrument_interval = None
 
 
-def tag_and_lemmatize(text):
+def count_texts(files):
     """
-    Calls tagging API from http://malvinnsla.arnastofnun.is/about_en
+    Function to count the lemmas in the texts in files, returns a counter of "lemma\\ttag" keys
     """
-    url = "http://malvinnsla.arnastofnun.is"
-    payload = {"text": text, "lemma": "on"}
-    headers = {}
-    try:
-        res = requests.post(url, data=payload, headers=headers)
-        tagged = json.loads(res.text)
-    except ConnectionError as exception:
-        print(exception)
-        print("\n\n")
-    return tagged
-
-
-def clean_tagged_output(tagged_text):
-    """
-    Filter out relevant data from the tagging and lemmatizing step
-    """
-    for paragraph in tagged_text.values():
-        for sentences in paragraph:
-            sentences = dict(sentences)
-        # Looping through tagged output to get to words
-        for sentence in sentences.values():
-            for sent in sentence:
-                for word in sent:
-                    if word["word"] not in string.punctuation:
-                        tag = word["tag"]
-                        lemma = word["lemma"]
-                        # if noun, include gender with tag
-                        if tag[0] == "n":
-                            tag = tag[:2]
-                        else:
-                            tag = tag[0]
-
-                        yield "{}{}{}".format(lemma, "\t", tag)
-
-
-# counter object that updates frequencies for lemmas file by file
-c = Counter()
-
-for file in file_list:
-    full_path = basedir + file
-    file_simple = file.split(".")[1]
-    # display progress
-    print("Processing {}...".format(file))
-
-    with open(full_path, "r", encoding="utf-8") as input_file:
-        for line in input_file:
-            t = tag_and_lemmatize(line)
-            c.update(clean_tagged_output(t))
-
-# sort frequency list in reverse order by counts (most frequent first)
-sorted_words = reversed(sorted(c.items(), key=operator.itemgetter(1)))
-
-# make tab formatted entries for output file
-allwords = ["{}\t{}".format(x[0], x[1]) for x in sorted_words]
-
-# write output to file
-with open(output_file, "w") as f:
-    f.write("\n".join(allwords))
+    # counter object that updates frequencies for lemmas file by file
+    c = Counter()
+    for file in files:
+        full_path = basedir + file
+        # display progress
+        print("Processing {}...".format(file))
+
+        with open(full_path, "r", encoding="utf-8") as input_file:
+            lines = input_file.readlines()
+        for t in tag_and_lemmatize(lines, tagger_backend, tag_cache):
+            c.update("{}\t{}".format(lemma, tag) for lemma, tag in tagged_lemmas(t))
+    return c
+
+
+if __name__ == "__main__":
+    file_list = sorted(os.listdir(basedir))
+    if instrument_interval is not None:
+        instrument.enable(instrument_interval)
+    with instrument.stage("count icepahc"):
+        c = count_texts(file_list)
+
+    print(get_tagger(tagger_backend, tag_cache).stats())
+
+    # write the frequency list, most frequent first
+    write_freq_list(
+        c, output_file, top=top, measures=frequency_measures, corpus="icepahc"
+    )
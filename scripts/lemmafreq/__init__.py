@@ -0,0 +1,8 @@
+"""
+Shared helpers for the corpus scripts in the scripts directory.
+
+The scripts add the scripts directory to sys.path and import from this package, e.g.
+
+    from lemmafreq.tei import iter_sentences
+
+"""
@@ -0,0 +1,182 @@
+"""
+Vectorized lookup and formatting of the lemma counts of sentences, for the writers in lemmafreq/writers.py.
+
+Each token of a sentence is written with a tuple of its lemma and its count in each corpus and a frequency vector,
+e.g. ('hestur, nk', 123, 4, 5678) and (123, 4, 5678), or 123 if only one corpus is counted. Looking up and
+formatting the counts of each token one by one is the slowest part of writing the output. An Annotator instead
+annotates a batch of sentences at a time with numpy:
+
+    The counts of all corpora are copied into a count matrix with a row for each vocabulary ID and a column for
+    each corpus, so the counts of every token in a batch are gathered at once by indexing the matrix with an
+    array of the IDs in the batch.
+    The tuple and vector of an ID are the same in every sentence, so they are formatted the first time the ID is
+    seen, for all new IDs in a batch at once, and kept in arrays indexed by ID. The tuples and vectors of the
+    tokens in a batch are then gathered from these arrays in the same way and joined for each sentence.
+
+If measures is set, a vector of the frequency per million words, on the Zipf scale and on a log scale (see
+lemmafreq/measures.py) of each ID is formatted in the same way, from the same rows of the count matrix.
+
+The output is the same as that of formatting each token with str(). The counts must not change once the
+Annotator has been created, and IDs added to the vocabulary after that have a count of 0 in every corpus. The
+count matrix and the formatted tuples take memory in proportion to the size of the vocabulary, not the corpus.
+numpy is optional, and without it the writers look up the counts of each token and format them with
+annotate_tokens(), but the measures require it.
+"""
+
+from array import array
+
+from .measures import compute, corpus_size, format_measures
+from .measures import names as measure_names
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# number of sentences annotated at once by the writers
+batch_size = 2000
+
+
+def annotate_tokens(vocab, ids, columns):
+    """
+    Function to get the joined tuples and the joined vectors of a sentence by formatting each token on its own,
+    where columns holds a list of counts for each corpus, one for each ID in ids
+    """
+    tup = []
+    vector = []
+    for i, counts in zip(ids, zip(*columns)):
+        tup.append(str((vocab.key(i),) + counts))
+        if len(counts) == 1:
+            vector.append(str(counts[0]))
+        else:
+            vector.append(str(counts))
+    return " ".join(tup), " ".join(vector)
+
+
+class Annotator:
+    """
+    Count matrix and formatted tuples and vectors of the IDs of a Vocabulary, see the description above. If measures
+    is set, the per million, Zipf and log frequency vectors of each ID are formatted as well
+    """
+
+    def __init__(self, vocab, counters, measures=False):
+        self.vocab = vocab
+        self.width = len(counters)
+        self.measures = measures
+        # as_numpy() shares memory with the counts, which are copied into the matrix
+        self.matrix = numpy.stack([c.as_numpy() for c in counters], axis=1)
+        # the number of tokens and types of each corpus, for the measures
+        self.tokens, self.types = corpus_size(self.matrix)
+        # the formatted tuples, frequency vectors and measure vectors of each ID, one array for each
+        self.formatted_columns = [
+            numpy.empty(len(self.matrix), dtype=object)
+            for column in range(2 + len(measure_names) * measures)
+        ]
+        self.formatted = numpy.zeros(len(self.matrix), dtype=bool)
+
+    def grow(self):
+        """
+        Function to add rows of zeros to the count matrix for the IDs added to the vocabulary since it was created
+        """
+        missing = len(self.vocab) - len(self.matrix)
+        if missing <= 0:
+            return
+        # room for more IDs, so a vocabulary which keeps growing does not copy the matrix for every batch
+        missing = max(missing, len(self.matrix) // 8)
+        self.matrix = numpy.concatenate(
+            [self.matrix, numpy.zeros((missing, self.width), dtype=self.matrix.dtype)]
+        )
+        self.formatted_columns = [
+            numpy.concatenate([strings, numpy.empty(missing, dtype=object)])
+            for strings in self.formatted_columns
+        ]
+        self.formatted = numpy.concatenate(
+            [self.formatted, numpy.zeros(missing, dtype=bool)]
+        )
+
+    def gather(self, sentences):
+        """
+        Function to get a numpy array of the IDs of a list of sentences, each an array of IDs, one after another
+        """
+        ids = array("i")
+        for sentence_ids in sentences:
+            ids.extend(sentence_ids)
+        ids = numpy.array(ids, dtype=numpy.intp)
+        if len(ids) and ids.max() >= len(self.matrix):
+            self.grow()
+        return ids
+
+    def join(self, strings):
+        """
+        Function to join the columns of a matrix of strings, with a row for each ID and a column for each corpus,
+        with commas
+        """
+        joined = strings[:, 0]
+        for column in range(1, self.width):
+            joined = numpy.char.add(numpy.char.add(joined, ", "), strings[:, column])
+        return joined
+
+    def vector(self, strings):
+        """
+        Function to format the vector of each row of a matrix of strings, which is the string itself for one corpus
+        """
+        if self.width == 1:
+            return strings[:, 0]
+        return numpy.char.add(numpy.char.add("(", self.join(strings)), ")")
+
+    def format_new(self, ids):
+        """
+        Function to format the tuples and vectors of the IDs in an array of IDs which have not been formatted
+        """
+        new = numpy.unique(ids[~self.formatted[ids]])
+        if not len(new):
+            return
+        counts = self.matrix[new]
+        strings = counts.astype(str)
+        keys = numpy.array([repr(self.vocab.key(i)) for i in new.tolist()])
+        tuples = numpy.char.add(numpy.char.add("(", keys), ", ")
+        columns = [
+            numpy.char.add(tuples, numpy.char.add(self.join(strings), ")")),
+            self.vector(strings),
+        ]
+        if self.measures:
+            for values in format_measures(compute(counts, self.tokens, self.types)):
+                columns.append(self.vector(values))
+        for formatted, values in zip(self.formatted_columns, columns):
+            formatted[new] = values.tolist()
+        self.formatted[new] = True
+
+    def annotate(self, sentences):
+        """
+        Function to get the joined tuples, the joined vectors and, if measures is set, the joined vectors of each
+        measure of each sentence in a list of arrays of IDs
+        """
+        ids = self.gather(sentences)
+        self.format_new(ids)
+        columns = [formatted[ids].tolist() for formatted in self.formatted_columns]
+        annotated = []
+        start = 0
+        for sentence_ids in sentences:
+            end = start + len(sentence_ids)
+            annotated.append([" ".join(column[start:end]) for column in columns])
+            start = end
+        return annotated
+
+    def columns(self, ids):
+        """
+        Function to get a list of the counts of each ID in an array of IDs for each corpus, as Counts.lookup()
+        """
+        counts = self.matrix[self.gather([ids])]
+        return [counts[:, column].tolist() for column in range(self.width)]
+
+    def measure_columns(self, ids):
+        """
+        Function to get a list of the values of each ID in an array of IDs for each measure and corpus, all
+        corpora of the first measure first
+        """
+        measures = compute(self.matrix[self.gather([ids])], self.tokens, self.types)
+        return [
+            values[:, column].tolist()
+            for values in measures
+            for column in range(self.width)
+        ]
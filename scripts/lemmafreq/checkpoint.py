@@ -0,0 +1,230 @@
+"""
+Checkpoints of long runs, kept in an SQLite database so an interrupted run can resume where it stopped.
+
+The counts of each input file are stored separately, along with a manifest of the file's size, modification time
+and SHA-1 hash. When the counts are updated, only files which are new or whose contents have changed are counted,
+and files which have been removed are dropped, so adding a new release of a corpus only counts the new files.
+A file whose size or modification time has changed but whose hash has not is not counted again. The counts are
+committed every checkpoint_seconds, so if a run is interrupted at most that much counting is lost.
+
+The total counts are the sum of the counts of each file, added up in the order of the files, so the keys of the
+totals are in the same order as if all the files had been counted in one pass.
+
+The position reached in an output file is also stored, i.e. the number of input files written to it and the
+size of the output at that point, along with a digest of the counts used. If the run is interrupted, the output
+is truncated to that size and the remaining files written, as long as the counts have not changed.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import os
+import sqlite3
+import time
+import zlib
+from collections import Counter
+
+from . import instrument
+from .vocab import Counts
+
+
+def file_sha1(path):
+    """
+    Function to compute the SHA-1 hash of the contents of a file
+    """
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def encode_counts(items):
+    """
+    Function to compress a list of (key, count) pairs
+    """
+    text = "".join("{}\t{}\n".format(key, count) for key, count in items)
+    return zlib.compress(text.encode("utf-8"))
+
+
+def decode_counts(blob):
+    """
+    Function to decompress a list of (key, count) pairs compressed by encode_counts()
+    """
+    for line in zlib.decompress(blob).decode("utf-8").splitlines():
+        key, count = line.rsplit("\t", 1)
+        yield key, int(count)
+
+
+class Checkpoint:
+    """
+    Database of the counts of each input file and of positions in output files, see the description above
+    """
+
+    def __init__(self, path, version="", checkpoint_seconds=60):
+        self.path = path
+        self.checkpoint_seconds = checkpoint_seconds
+        self.last_commit = time.monotonic()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER NOT NULL, "
+            "mtime_ns INTEGER NOT NULL, sha1 TEXT NOT NULL, counts BLOB NOT NULL)"
+        )
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS outputs (path TEXT PRIMARY KEY, digest TEXT NOT NULL, "
+            "files_done INTEGER NOT NULL, offset INTEGER NOT NULL)"
+        )
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        # counts from another version of the corpus or the extraction are not used
+        row = self.db.execute(
+            "SELECT value FROM meta WHERE name = 'version'"
+        ).fetchone()
+        if row is None or row[0] != version:
+            self.db.execute("DELETE FROM files")
+            self.db.execute("DELETE FROM outputs")
+            self.db.execute(
+                "INSERT OR REPLACE INTO meta (name, value) VALUES ('version', ?)",
+                (version,),
+            )
+        self.db.commit()
+
+    def due(self):
+        """
+        Function to check whether checkpoint_seconds have passed since the last commit
+        """
+        return time.monotonic() - self.last_commit >= self.checkpoint_seconds
+
+    def commit(self):
+        self.db.commit()
+        self.last_commit = time.monotonic()
+
+    def update_counts(self, files, count_file, workers=1):
+        """
+        Function to count the files which are new or have changed since they were last counted, with count_file(),
+        which returns a list of (key, count) pairs for a file. Files which are not in files are removed. If
+        workers > 1, files are counted in that many processes, so count_file must be a module level function.
+        Returns the number of files counted
+        """
+        known = dict()
+        for path, size, mtime_ns, sha1 in self.db.execute(
+            "SELECT path, size, mtime_ns, sha1 FROM files"
+        ):
+            known[path] = (size, mtime_ns, sha1)
+
+        removed = set(known) - set(files)
+        if removed:
+            print("Removing counts of {} files...".format(len(removed)))
+            self.db.executemany(
+                "DELETE FROM files WHERE path = ?", [(path,) for path in removed]
+            )
+
+        # (path, size, modification time, hash) of each file which must be counted
+        stale = []
+        for file in files:
+            stat = os.stat(file)
+            entry = known.get(file)
+            if entry is not None and entry[:2] == (stat.st_size, stat.st_mtime_ns):
+                continue
+            sha1 = file_sha1(file)
+            if entry is not None and entry[2] == sha1:
+                self.db.execute(
+                    "UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?",
+                    (stat.st_size, stat.st_mtime_ns, file),
+                )
+                continue
+            stale.append((file, stat.st_size, stat.st_mtime_ns, sha1))
+        self.commit()
+
+        stale_files = [file for file, size, mtime_ns, sha1 in stale]
+        if workers <= 1:
+            executor = None
+            results = map(count_file, stale_files)
+        else:
+            executor = ProcessPoolExecutor(
+                max_workers=workers, initializer=instrument.disable
+            )
+            results = executor.map(count_file, stale_files, chunksize=16)
+
+        counted = 0
+        try:
+            for (file, size, mtime_ns, sha1), items in zip(stale, results):
+                self.db.execute(
+                    "INSERT OR REPLACE INTO files (path, size, mtime_ns, sha1, counts) VALUES (?, ?, ?, ?, ?)",
+                    (file, size, mtime_ns, sha1, encode_counts(items)),
+                )
+                counted += 1
+                if executor is not None:
+                    instrument.count(sum(count for key, count in items), 0)
+                if self.due():
+                    self.commit()
+                    print("Checkpoint: {} files counted".format(counted))
+        finally:
+            self.commit()
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        return counted
+
+    def file_counts(self, files):
+        """
+        Function to yield the (key, count) pairs of each file, in the order of files
+        """
+        for file in files:
+            row = self.db.execute(
+                "SELECT counts FROM files WHERE path = ?", (file,)
+            ).fetchone()
+            if row is None:
+                raise KeyError("No counts for {}".format(file))
+            yield decode_counts(row[0])
+
+    def missing(self, files):
+        """
+        Function to get the files which have not been counted, in the order of files
+        """
+        known = {path for (path,) in self.db.execute("SELECT path FROM files")}
+        return [file for file in files if file not in known]
+
+    def totals(self, files, vocab=None):
+        """
+        Function to add up the counts of files, returns a Counter, or a Counts object if vocab is given
+        """
+        if vocab is None:
+            c = Counter()
+            for items in self.file_counts(files):
+                for key, count in items:
+                    c[key] += count
+        else:
+            c = Counts(vocab)
+            counts = c.counts
+            for items in self.file_counts(files):
+                for key, count in items:
+                    i = vocab.intern_key(key)
+                    if i >= len(counts):
+                        c.grow()
+                    counts[i] += count
+        return c
+
+    def output_position(self, path, digest):
+        """
+        Function to get the number of input files written to an output file and its size at that point, if the
+        output was written with counts with the given digest. Returns (0, 0) if the output must be written anew
+        """
+        row = self.db.execute(
+            "SELECT digest, files_done, offset FROM outputs WHERE path = ?", (path,)
+        ).fetchone()
+        if row is None or row[0] != digest:
+            return 0, 0
+        if not os.path.exists(path) or os.path.getsize(path) < row[2]:
+            return 0, 0
+        return row[1], row[2]
+
+    def save_output_position(self, path, digest, files_done, offset):
+        """
+        Function to store the number of input files written to an output file and its size at that point
+        """
+        self.db.execute(
+            "INSERT OR REPLACE INTO outputs (path, digest, files_done, offset) VALUES (?, ?, ?, ?)",
+            (path, digest, files_done, offset),
+        )
+        self.commit()
@@ -0,0 +1,120 @@
+"""
+Reading the lemmas of IcePaHC, the MÍM corpus and the Gigaword Corpus, shared by the scripts.
+
+Each word is counted by its lemma and word category, along with its gender if the word is a noun, e.g.
+("hestur", "nk"). Which words are counted depends on the corpus:
+
+    The Gigaword Corpus: every word with a lemma and a tag, i.e. all but punctuation, see giga_sentences()
+    The MÍM corpus: in the per-sentence output, every word whose tag is not punctuation, and in the simple
+    frequency list, every word with a lemma. mim_sentences() gives both, so the corpus is only read once for both.
+    IcePaHC: every word in the output of the tagger which is not punctuation, see tagged_lemmas()
+
+The functions yield (lemma, word category) pairs, which the *_get_lemma_freq.py scripts intern to vocabulary IDs
+with Vocabulary.intern_all() (see lemmafreq/vocab.py) and the *_simple_freq.py scripts join into "lemma\\ttag" keys.
+"""
+
+import csv
+import string
+
+from . import instrument
+from .taggers import get_tagger
+from .tei import iter_sentences
+
+
+def word_category(tag):
+    """
+    Function to get the word category of a tag, along with the gender if it is the tag of a noun
+    """
+    # if noun, include gender with tag
+    if tag[0] == "n":
+        return tag[:2]
+    return tag[0]
+
+
+def giga_sentences(teifile):
+    """
+    Function to extract sentences from tei xml file in the Gigaword Corpus. Yields the sentence number, the tokens
+    of the sentence and a list of the (lemma, word category) pairs of its words
+    """
+    for sent_id, words in iter_sentences(teifile):
+        sent_no = ".".join(sent_id.split(".")[-2:])
+        text = []
+        lemmas = []
+        for token, lemma, tag in words:
+            text.append(token)
+            # punctuation has neither a lemma nor a tag
+            if lemma is not None and tag is not None:
+                lemmas.append((lemma, word_category(tag)))
+        yield sent_no, text, lemmas
+
+
+def mim_sentences(teifile):
+    """
+    Function to extract sentences from tei xml file in the MÍM corpus. Yields the sentence number, the tokens of
+    the sentence and two lists of (lemma, word category) pairs, of the words counted in the per-sentence output and
+    of the words counted in the simple frequency list
+    """
+    for sent_no, words in iter_sentences(teifile, tag_attr="type", id_attr="n"):
+        text = []
+        lemmas = []
+        simple_lemmas = []
+        for token, lemma, tag in words:
+            text.append(token)
+            full = tag != "punctuation"
+            # handling for a unicode character in the MÍM files, punctuation has no lemma
+            simple = lemma is not None and lemma != " "
+            if full or simple:
+                pair = (lemma, word_category(tag))
+                if full:
+                    lemmas.append(pair)
+                if simple:
+                    simple_lemmas.append(pair)
+        yield sent_no, text, lemmas, simple_lemmas
+
+
+def tag_and_lemmatize(lines, backend="http", cache_path=None):
+    """
+    Tags and lemmatizes a list of lines with the tagger of backend, unless they are in the tag cache at cache_path.
+    Returns the output for each line in the format of the tagging API from http://malvinnsla.arnastofnun.is/about_en
+    """
+    tagged = get_tagger(backend, cache_path).tag_batch(lines)
+    instrument.count_tagged(tagged)
+    return tagged
+
+
+def tagged_lemmas(tagged_text):
+    """
+    Filter out relevant data from the tagging and lemmatizing step, yields the (lemma, word category) pair of each
+    word
+    """
+    for paragraph in tagged_text.values():
+        for sentences in paragraph:
+            sentences = dict(sentences)
+        # Looping through tagged output to get to words
+        for sentence in sentences.values():
+            for sent in sentence:
+                for word in sent:
+                    if word["word"] not in string.punctuation:
+                        yield word["lemma"], word_category(word["tag"])
+
+
+def read_mim_file_list(file_list, basedir):
+    """
+    Function to read the file list included with the MÍM corpus, stored in basedir. Yields the full path, folder
+    and date of each text
+    """
+    with open(file_list) as f:
+        # the file list included with the corpus is tab delimited
+        reader = csv.DictReader(f, delimiter="\t")
+        for item in reader:
+            folder = item["Folder"]
+            fname = item["File Name"]
+            yield "{}{}/{}".format(basedir, folder, fname), folder, item["Date"]
+
+
+def giga_genre(file, basedir):
+    """
+    Function to get the genre of a file in the Gigaword Corpus, stored in basedir, from the name of its directory,
+    e.g. IGC-News1-22.10
+    """
+    return file.split(basedir)[1].split("/")[0].split("-")[1]
@@ -0,0 +1,49 @@
+"""
+Reading and writing lemma counts.
+
+The counts of a corpus are stored in a .tsv file with one key (e.g. "hestur, nk") and its count per line,
+in the order in which the keys were first seen in the corpus. Files ending in .gz are compressed. Counts can be
+read into a Counter, or into a Counts object of a Vocabulary (see lemmafreq/vocab.py).
+"""
+
+from collections import Counter
+import gzip
+
+from .vocab import Counts
+
+
+def open_counts(path, mode):
+    """
+    Function to open a counts file for reading or writing text, compressed if the path ends in .gz
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def write_counts(c, path):
+    """
+    Function to write a counter to a tsv file
+    """
+    with open_counts(path, "w") as f:
+        for key, count in c.items():
+            f.write("{}\t{}\n".format(key, count))
+
+
+def read_counts(path, vocab=None):
+    """
+    Function to read a counter from a tsv file written by write_counts(). If vocab is given, the keys are
+    interned in it and a Counts object is returned instead of a Counter
+    """
+    if vocab is None:
+        c = Counter()
+    else:
+        c = Counts(vocab)
+    with open_counts(path, "r") as f:
+        for line in f:
+            key, count = line.rstrip("\n").rsplit("\t", 1)
+            if vocab is None:
+                c[key] = int(count)
+            else:
+                c[vocab.intern_key(key)] = int(count)
+    return c
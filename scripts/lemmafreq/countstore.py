@@ -0,0 +1,88 @@
+"""
+On-disk store of the lemma counts of each corpus, shared between the scripts.
+
+Counting a corpus, IGC in particular, takes a long time, and each of the *_get_lemma_freq.py scripts needs the
+counts of all three corpora. The counts are therefore saved once per corpus in a compressed .tsv file in the
+store's directory. The name of the file includes the corpus name, a version string and a hash of the file
+manifest, i.e. the path, size and modification time of each input file. If a file is added, removed or changed
+the hash changes and the corpus is counted again, after which the old counts are removed from the store.
+"""
+
+import glob
+import hashlib
+import os
+
+from . import instrument
+from .counts import read_counts, write_counts
+
+
+def manifest_digest(files, version=""):
+    """
+    Function to compute a hash of the path, size and modification time of each file in a list of files
+    """
+    digest = hashlib.sha1(version.encode("utf-8"))
+    for file in sorted(files):
+        stat = os.stat(file)
+        digest.update(
+            "{}\t{}\t{}\n".format(file, stat.st_size, stat.st_mtime_ns).encode("utf-8")
+        )
+    return digest.hexdigest()[:16]
+
+
+class CountStore:
+    """
+    Directory of saved counters, one for each corpus
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, corpus, files, version=""):
+        """
+        Function to get the path of the counts of a corpus with the given input files
+        """
+        return os.path.join(
+            self.directory,
+            "{}-{}.tsv.gz".format(corpus, manifest_digest(files, version)),
+        )
+
+    def load(self, corpus, files, version="", vocab=None):
+        """
+        Function to load the counts of a corpus, returns None if they are missing or out of date. If vocab is
+        given, the counts are loaded into a Counts object of that vocabulary
+        """
+        path = self.path(corpus, files, version)
+        if not os.path.exists(path):
+            return None
+        with instrument.stage("load counts"):
+            return read_counts(path, vocab)
+
+    def save(self, corpus, files, c, version=""):
+        """
+        Function to save the counts of a corpus and remove any older counts of the same corpus
+        """
+        path = self.path(corpus, files, version)
+        tmp_path = os.path.join(self.directory, ".tmp-" + os.path.basename(path))
+        with instrument.stage("save counts"):
+            write_counts(c, tmp_path)
+        os.replace(tmp_path, path)
+        for old_path in glob.glob(
+            os.path.join(glob.escape(self.directory), corpus + "-*.tsv.gz")
+        ):
+            if old_path != path:
+                os.remove(old_path)
+
+    def load_or_count(self, corpus, files, count, version="", vocab=None):
+        """
+        Function to load the counts of a corpus, or count it with count() and save the counts if they are
+        missing or out of date
+        """
+        c = self.load(corpus, files, version, vocab)
+        if c is not None:
+            print("Loaded counts for {} from {}".format(corpus, self.directory))
+            return c
+        with instrument.stage("count " + corpus):
+            c = count()
+        self.save(corpus, files, c, version)
+        return c
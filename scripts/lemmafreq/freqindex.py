@@ -0,0 +1,173 @@
+"""
+Memory-mapped index of a simple frequency list, for looking up the frequency of a lemma without loading the list.
+
+build_index() compiles a *_simple_freq.tsv file into a binary file in which the lemmas are sorted, and FreqIndex
+looks up lemmas in it by binary search. The index is memory-mapped, so opening it takes no time regardless of its
+size, only the pages needed for a lookup are read, and processes which open the same index share its pages.
+
+The index consists of the following, in little-endian byte order:
+
+    A header of 32 bytes: the magic number b"LEMFIDX1", the number of lemmas n, and the offset and size of the keys
+    n + 1 unsigned 64 bit offsets of each key within the keys, the last of which is the size of the keys
+    n signed 64 bit frequencies, in the order of the keys
+    The keys, i.e. "lemma\\ttag" for each lemma, encoded in UTF-8 and sorted bytewise
+
+Since the keys are sorted bytewise, all keys starting with a prefix are next to each other, e.g. all word
+categories of a lemma are found with the prefix "lemma\\t".
+"""
+
+from array import array
+import mmap
+import os
+import struct
+import sys
+
+from .freqlist import read_freq_list
+
+MAGIC = b"LEMFIDX1"
+HEADER = struct.Struct("<8sQQQ")
+
+
+def index_path(tsv_path):
+    """
+    Function to get the path of the index of a frequency list, e.g. giga_simple_freq.idx for giga_simple_freq.tsv
+    """
+    return os.path.splitext(tsv_path)[0] + ".idx"
+
+
+def encode_key(lemma, tag):
+    """
+    Function to get the key of a lemma with a word category, as stored in the index
+    """
+    return "{}\t{}".format(lemma, tag).encode("utf-8")
+
+
+def build_index(tsv_path, path=None):
+    """
+    Function to compile a simple frequency list into an index, written to index_path(tsv_path) unless path is given.
+    The index is written to a temporary file first, so processes using an older index are not affected
+    """
+    if path is None:
+        path = index_path(tsv_path)
+    entries = sorted(
+        (encode_key(lemma, tag), count)
+        for lemma, tag, count in read_freq_list(tsv_path)
+    )
+
+    offsets = [0]
+    for key, count in entries:
+        offsets.append(offsets[-1] + len(key))
+    n = len(entries)
+    keys_offset = HEADER.size + 8 * (n + 1) + 8 * n
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, n, keys_offset, offsets[-1]))
+        for numbers in (
+            array("Q", offsets),
+            array("q", (count for key, count in entries)),
+        ):
+            if sys.byteorder != "little":
+                numbers.byteswap()
+            f.write(numbers.tobytes())
+        for key, count in entries:
+            f.write(key)
+    os.replace(tmp_path, path)
+    return path
+
+
+class FreqIndex:
+    """
+    Lookups in an index written by build_index()
+    """
+
+    def __init__(self, path):
+        if sys.byteorder != "little":
+            raise ValueError(
+                "Frequency indexes can only be read on little-endian machines"
+            )
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.n, keys_offset, keys_size = HEADER.unpack_from(self.mm)
+        if magic != MAGIC:
+            raise ValueError("{} is not a frequency index".format(path))
+        self.view = memoryview(self.mm)
+        start = HEADER.size
+        self.offsets = self.view[start : start + 8 * (self.n + 1)].cast("Q")
+        start += 8 * (self.n + 1)
+        self.counts = self.view[start : start + 8 * self.n].cast("q")
+        self.keys = self.view[keys_offset : keys_offset + keys_size]
+
+    def __len__(self):
+        return self.n
+
+    def key(self, i):
+        """
+        Function to get the key of the i-th lemma, in sorted order
+        """
+        return bytes(self.keys[self.offsets[i] : self.offsets[i + 1]])
+
+    def bisect(self, key, lo=0):
+        """
+        Function to find the position of the first key which is not less than key, starting at lo
+        """
+        hi = self.n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def get(self, lemma, tag):
+        """
+        Function to get the frequency of a lemma with a word category, 0 if it is not in the index
+        """
+        key = encode_key(lemma, tag)
+        i = self.bisect(key)
+        if i < self.n and self.key(i) == key:
+            return self.counts[i]
+        return 0
+
+    def get_many(self, pairs):
+        """
+        Function to get the frequency of each (lemma, tag) pair in a list. The pairs are looked up in sorted order,
+        so each search starts where the last one ended
+        """
+        keys = [encode_key(lemma, tag) for lemma, tag in pairs]
+        counts = [0] * len(keys)
+        lo = 0
+        for pos in sorted(range(len(keys)), key=keys.__getitem__):
+            lo = self.bisect(keys[pos], lo)
+            if lo < self.n and self.key(lo) == keys[pos]:
+                counts[pos] = self.counts[lo]
+        return counts
+
+    def prefix(self, prefix):
+        """
+        Function to yield the (lemma, tag, frequency) of each key starting with prefix, in sorted order.
+        The prefix "lemma\\t" gives each word category of a lemma
+        """
+        prefix = prefix.encode("utf-8")
+        i = self.bisect(prefix)
+        while i < self.n:
+            key = self.key(i)
+            if not key.startswith(prefix):
+                break
+            lemma, tag = key.decode("utf-8").rsplit("\t", 1)
+            yield lemma, tag, self.counts[i]
+            i += 1
+
+    def close(self):
+        self.offsets.release()
+        self.counts.release()
+        self.keys.release()
+        self.view.release()
+        self.mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
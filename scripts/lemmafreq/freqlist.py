@@ -0,0 +1,107 @@
+"""
+Reading and writing the simple frequency lists.
+
+A simple frequency list has one lemma per line: the lemma, its word category and its frequency, separated by
+tabs. The most frequent lemmas come first, and lemmas with the same frequency are sorted by lemma and word
+category, so the list is the same on every run regardless of the order in which the lemmas were counted. There is
+no newline after the last line.
+
+write_freq_list() writes each line to the file as soon as it has been sorted, without building the whole list as
+one string. If top is given, only the top most frequent lemmas are written, which are found with a heap instead of
+sorting all the lemmas.
+
+If measures is set, the frequency of each lemma is followed by its frequency per million words, on the Zipf scale and
+on a log scale, each in a column of its own (see lemmafreq/measures.py), and the number of tokens and types of the
+corpus is written to <name>.totals.tsv. The measures are formatted with a decimal point, so read_freq_list() tells
+the two kinds of lists apart by the last column of each line.
+"""
+
+import heapq
+import os
+import time
+from operator import itemgetter
+
+from . import instrument
+from .measures import compute, corpus_size, format_measures, write_totals
+from .measures import names as measure_names
+from .writers import open_output, output_stats
+
+
+def sort_key(item):
+    """
+    Function to order (key, count) pairs, the most frequent first and then by key
+    """
+    key, count = item
+    return -count, key
+
+
+def sorted_counts(c, top=None):
+    """
+    Function to get the (key, count) pairs of a counter, ordered by sort_key(). If top is given, only the top first
+    pairs are returned
+    """
+    if top is not None:
+        return heapq.nsmallest(top, c.items(), key=sort_key)
+    # sorting by key and then by count, which keeps the order of equal counts, is the same as sorting by
+    # sort_key() without building a tuple for each lemma
+    items = sorted(c.items())
+    items.sort(key=itemgetter(1), reverse=True)
+    return items
+
+
+def write_freq_list(c, path, top=None, measures=False, corpus=None):
+    """
+    Function to write a counter of "lemma\\ttag" keys to a simple frequency list, see the description above. corpus
+    is the name of the corpus in the totals, by default the name of the list
+    """
+    start = time.perf_counter()
+    with instrument.stage("write freq list"):
+        items = sorted_counts(c, top)
+        out = open_output(path)
+        if measures:
+            write_measures(out, c, items, path, corpus)
+        else:
+            separator = ""
+            for key, count in items:
+                out.write("{}{}\t{}".format(separator, key, count))
+                separator = "\n"
+        out.close()
+    print(output_stats(path, time.perf_counter() - start, out.buffer.raw.bytes_written))
+
+
+def write_measures(out, c, items, path, corpus=None):
+    """
+    Function to write the sorted (key, count) pairs of a counter c with their measures, and the totals of c
+    """
+    import numpy
+
+    tokens, types = corpus_size(
+        numpy.fromiter(c.values(), dtype=numpy.int64, count=len(c))
+    )
+    counts = numpy.fromiter(
+        (count for key, count in items), dtype=numpy.int64, count=len(items)
+    )
+    columns = format_measures(compute(counts, tokens, types))
+    separator = ""
+    for (key, count), values in zip(items, zip(*(col.tolist() for col in columns))):
+        out.write("{}{}\t{}\t{}".format(separator, key, count, "\t".join(values)))
+        separator = "\n"
+    write_totals(
+        path, [corpus or os.path.basename(path).split(".")[0]], [tokens], [types]
+    )
+
+
+def read_freq_list(path):
+    """
+    Function to read a simple frequency list, with or without measures, yields a (lemma, tag, frequency) tuple for
+    each line
+    """
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line:
+                if "." in line[line.rindex("\t") :]:
+                    # a list with measures, which come after the frequency
+                    line = line.rsplit("\t", len(measure_names))[0]
+                lemma, tag, count = line.rsplit("\t", 2)
+                yield lemma, tag, int(count)
@@ -0,0 +1,229 @@
+"""
+Reading the sentence IDs and metadata of IcePaHC texts.
+
+Each text in IcePaHC is stored in three versions, with the same name in different directories, e.g.
+
+    txt/1150.firstgrammar.sci-lin.txt, one sentence per line
+    psd/1150.firstgrammar.sci-lin.psd, the parsed sentences, each with an (ID ...) node
+    info/1150.firstgrammar.sci-lin.info, the genre, date and the author's birth date of the text
+
+The ID of the sentence on each line of the .txt file is read from the .psd file, and sentences are referred to as
+<text name>.<ID>, e.g. firstgrammar.12. The infoTheoryTestV2 file refers to sentences in the same way, see
+v2_sent_id().
+
+Reading the .psd files takes much longer than reading the text, so the sentence IDs and metadata of each text can
+be kept in a SentenceIndex, an SQLite database which is only updated for texts whose .txt, .psd or .info file has
+changed since they were indexed, see SentenceIndex.
+"""
+
+import os
+import sqlite3
+
+
+def text_path(basedir, file, directory, extension):
+    """
+    Function to get the path of another version of a text in the txt directory basedir, e.g. its .psd file
+    """
+    return (
+        "/".join(basedir.split("/")[:-2])
+        + "/"
+        + directory
+        + "/"
+        + ".".join(file.split(".")[:-1])
+        + extension
+    )
+
+
+def read_psd_ids(psd_path):
+    """
+    Function to read the sentence IDs of a .psd file, in the order of the sentences
+    """
+    ids = []
+    with open(psd_path, "r", encoding="utf-8") as psd_file:
+        for line in psd_file:
+            if line.strip(" ").startswith("(ID"):
+                psd_id = line.split(",")[-1].split(")")[0]
+                if psd_id.startswith("."):
+                    psd_id = psd_id.split(".")[1]
+                ids.append(psd_id)
+    # Most .psd files are missing the final ID or multiple final IDs
+    if "." in psd_id:
+        psd_id = psd_id.split(".")[1]
+    for i in range(1, 8):
+        ids.append(str(int(psd_id) + i))
+    return ids
+
+
+def read_info(info_path):
+    """
+    Function to read the genre, date and the author's birth date from an .info file
+    """
+    genre = ""
+    year = ""
+    author_year = ""
+    with open(info_path, "r") as info_file:
+        for line in info_file:
+            if line.startswith("Birthdate:"):
+                author_year = line.split("\t")[-1].rstrip()
+            elif line.startswith("Date"):
+                # tab is usually used to indicate the date, but several spaces are used in one case
+                year = line.split("\t")[-1].rstrip()
+            elif line.startswith("Genre"):
+                genre = line.split("\t")[-1].rstrip()
+    return genre, year, author_year
+
+
+def sentence_ids(basedir, file):
+    """
+    Function to get the ID of each sentence in a .txt file in basedir, e.g. firstgrammar.12
+    """
+    name = file.split(".")[1].lower()
+    return [
+        name + "." + psd_id
+        for psd_id in read_psd_ids(text_path(basedir, file, "psd", ".psd"))
+    ]
+
+
+def v2_sent_id(line):
+    """
+    Function to get the sentence ID referred to by a line in the infoTheoryTestV2 file, None for lines which do
+    not refer to a sentence
+    """
+    sent_id = ".".join(line.rstrip("\n").split(":")[-2:]).lower()
+    # Some extra lines are present in input file
+    if sent_id == "z.xxxgenre@":
+        return None
+    # Errors in input file handled, e.g. nar@1450.bandamenn.nar-sag,26.11.
+    # The file and sent ID is usually shown differently, e.g. viglundur:1286
+    elif "@" in sent_id:
+        begin = sent_id.split(".")[2]
+        end = sent_id.split(",")[1]
+        if end.startswith("."):
+            sent_id = begin + end
+        else:
+            sent_id = begin + "." + end
+    return sent_id
+
+
+def format_v2_line(line, vocab, ids, counts):
+    """
+    Function to add the lemmas of a sentence and their counts to a line of the infoTheoryTestV2 file
+    """
+    output = [line.rstrip("\n"), ":"]
+    for i, count in zip(ids, counts):
+        output.append(str((vocab.key(i), count)))
+        output.append(" ")
+    output.append(":")
+    for count in counts:
+        output.append(str(count))
+        output.append(" ")
+    output.append("\n")
+    return "".join(output)
+
+
+def text_manifest(basedir, file):
+    """
+    Function to describe the size and modification time of the .txt, .psd and .info files of a text
+    """
+    paths = [
+        basedir + file,
+        text_path(basedir, file, "psd", ".psd"),
+        text_path(basedir, file, "info", ".info"),
+    ]
+    manifest = []
+    for path in paths:
+        stat = os.stat(path)
+        manifest.append("{}\t{}".format(stat.st_size, stat.st_mtime_ns))
+    return "\n".join(manifest)
+
+
+class SentenceIndex:
+    """
+    Index of the sentence IDs and metadata of the texts in basedir, the IcePaHC txt directory. The index is stored
+    in an SQLite database at path, with a row for each text holding the sizes and modification times of its .txt,
+    .psd and .info files, its genre, date and author's birth date, its number of lines and its sentence IDs. A
+    text is read again when any of its files has changed, and texts which are not in files are removed. The whole
+    index is then kept in memory, so looking up a text or a line takes constant time. If path is None, the index is
+    built in memory on every run
+    """
+
+    def __init__(self, path, basedir, files):
+        self.basedir = basedir
+        if path is not None:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path or ":memory:")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS texts (file TEXT PRIMARY KEY, manifest TEXT NOT NULL, "
+            "genre TEXT NOT NULL, year TEXT NOT NULL, author_year TEXT NOT NULL, lines INTEGER NOT NULL, "
+            "ids TEXT NOT NULL)"
+        )
+        self.indexed = self.update(files)
+        self.texts = dict()
+        for file, genre, year, author_year, lines, ids in self.db.execute(
+            "SELECT file, genre, year, author_year, lines, ids FROM texts"
+        ):
+            self.texts[file] = ((genre, year, author_year), lines, ids.split("\n"))
+
+    def update(self, files):
+        """
+        Function to index the texts in files which are new or have changed, and remove the other texts from the
+        index. Returns the number of texts indexed
+        """
+        known = dict(self.db.execute("SELECT file, manifest FROM texts"))
+        removed = set(known) - set(files)
+        self.db.executemany(
+            "DELETE FROM texts WHERE file = ?", [(file,) for file in removed]
+        )
+        indexed = 0
+        for file in files:
+            manifest = text_manifest(self.basedir, file)
+            if known.get(file) == manifest:
+                continue
+            with open(self.basedir + file, "r", encoding="utf-8") as input_file:
+                lines = sum(1 for line in input_file)
+            genre, year, author_year = read_info(
+                text_path(self.basedir, file, "info", ".info")
+            )
+            self.db.execute(
+                "INSERT OR REPLACE INTO texts (file, manifest, genre, year, author_year, lines, ids) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    file,
+                    manifest,
+                    genre,
+                    year,
+                    author_year,
+                    lines,
+                    "\n".join(sentence_ids(self.basedir, file)),
+                ),
+            )
+            indexed += 1
+        self.db.commit()
+        return indexed
+
+    def sentence_ids(self, file):
+        """
+        Function to get the ID of each sentence in a text, as sentence_ids() does
+        """
+        return self.texts[file][2]
+
+    def sentence_id(self, file, line_no):
+        """
+        Function to get the ID of the sentence on a line of a text, counted from 0
+        """
+        return self.texts[file][2][line_no]
+
+    def info(self, file):
+        """
+        Function to get the genre, date and the author's birth date of a text, as read_info() does
+        """
+        return self.texts[file][0]
+
+    def lines(self, file):
+        """
+        Function to get the number of lines in the .txt file of a text
+        """
+        return self.texts[file][1]
+
+    def close(self):
+        self.db.close()
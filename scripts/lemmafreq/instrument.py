@@ -0,0 +1,347 @@
+"""
+Timing, throughput and memory use of the stages of a run.
+
+A run is divided into stages, e.g. counting IcePaHC or writing the output of the Gigaword Corpus, each marked with
+
+    with instrument.stage("count giga"):
+        ...
+
+For each stage the time spent in it, the number of tokens and sentences read in it and the peak memory use of the
+process when it ends are recorded. Stages can be nested, and the time of a stage includes the stages nested in it.
+Tokens and sentences are counted where sentences are read (see lemmafreq/tei.py and lemmafreq/spool.py), and are
+added to the innermost stage. The latency of each call to the tagger is recorded in a histogram with a bucket for
+each power of two of milliseconds.
+
+Nothing is recorded until enable() is called, and until then stage() returns a context manager which does nothing
+and count() and latency() return at once, so the calls can be left in the scripts. Once enabled, a progress line
+is logged every interval seconds while tokens are counted or the tagger is called, and a summary is printed when
+the run ends. The scripts call enable() with their instrument_interval, unless it is None. The log lines are JSON
+objects, one per line, written to standard error or a log file, e.g.
+
+    {"event": "progress", "stage": "count giga", "seconds": 60.0, "tokens": 7512340, "sentences": 501221,
+     "tokens_per_second": 125205.7, "peak_rss_mb": 812.4}
+
+Nothing is recorded in the worker processes of lemmafreq/parallel.py and lemmafreq/checkpoint.py. Instead, the
+lemmas counted by a worker are added to the stage as tokens when its counts are received, without sentences.
+"""
+
+from contextlib import nullcontext
+import atexit
+import json
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# the instruments of the run, None until enable() is called
+instruments = None
+no_stage = nullcontext()
+
+
+def peak_rss_mb():
+    """
+    Function to get the peak resident set size of the process in MB, None where it is not available
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    if sys.platform == "darwin":
+        return round(peak / 1e6, 1)
+    return round(peak * 1024 / 1e6, 1)
+
+
+class Stage:
+    """
+    Time, tokens, sentences and peak memory use recorded for a stage
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.tokens = 0
+        self.sentences = 0
+        self.peak_rss_mb = None
+        self.start = None
+
+    def record(self, now=None):
+        """
+        Function to get the recorded values of the stage, including the time so far if it has not ended
+        """
+        seconds = self.seconds
+        if self.start is not None:
+            seconds += (now or time.perf_counter()) - self.start
+        return {
+            "stage": self.name,
+            "seconds": round(seconds, 3),
+            "tokens": self.tokens,
+            "sentences": self.sentences,
+            "tokens_per_second": round(self.tokens / seconds, 1) if seconds else None,
+            "peak_rss_mb": self.peak_rss_mb,
+        }
+
+
+class Histogram:
+    """
+    Histogram of latencies in seconds, with a bucket for each power of two of milliseconds
+    """
+
+    def __init__(self):
+        self.buckets = dict()
+        self.n = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        """
+        Function to add a latency to the histogram
+        """
+        bucket = max(0, int(seconds * 1000)).bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.n += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """
+        Function to get an upper bound of the q quantile in seconds, i.e. the upper limit of its bucket
+        """
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= q * self.n:
+                return min(2**bucket / 1000, self.max)
+        return self.max
+
+    def record(self):
+        """
+        Function to get a summary of the histogram, with the number of latencies below each upper limit in ms
+        """
+        return {
+            "calls": self.n,
+            "mean_ms": round(1000 * self.total / self.n, 1) if self.n else None,
+            "p50_ms": round(1000 * self.quantile(0.5), 1),
+            "p90_ms": round(1000 * self.quantile(0.9), 1),
+            "p99_ms": round(1000 * self.quantile(0.99), 1),
+            "max_ms": round(1000 * self.max, 1),
+            "buckets": {
+                "<{}".format(2**bucket): count
+                for bucket, count in sorted(self.buckets.items())
+            },
+        }
+
+
+class Instruments:
+    """
+    Stages and latencies recorded in a run, see the description above
+    """
+
+    def __init__(self, interval=60.0, log_file=None):
+        self.interval = interval
+        self.log_file = log_file or sys.stderr
+        self.stages = dict()
+        self.active = []
+        self.latencies = dict()
+        self.start = time.perf_counter()
+        self.last_log = self.start
+        # the tagger records latencies from several threads
+        self.lock = threading.Lock()
+
+    def stage(self, name):
+        """
+        Function to get a context manager which records the stage while it is active
+        """
+        return ActiveStage(self, self.stages.setdefault(name, Stage(name)))
+
+    def count(self, tokens, sentences):
+        """
+        Function to add tokens and sentences to the innermost active stage
+        """
+        if self.active:
+            stage = self.active[-1]
+            stage.tokens += tokens
+            stage.sentences += sentences
+        self.maybe_log()
+
+    def latency(self, name, seconds):
+        """
+        Function to add the latency of a call, e.g. to the tagger, to the histogram of that name
+        """
+        with self.lock:
+            self.latencies.setdefault(name, Histogram()).add(seconds)
+        self.maybe_log()
+
+    def maybe_log(self):
+        """
+        Function to log the progress of the innermost stage if interval seconds have passed since the last log line
+        """
+        now = time.perf_counter()
+        if now - self.last_log < self.interval:
+            return
+        with self.lock:
+            if now - self.last_log < self.interval:
+                return
+            self.last_log = now
+            record = {"event": "progress"}
+            if self.active:
+                record.update(self.active[-1].record(now))
+            record["peak_rss_mb"] = peak_rss_mb()
+            for name, histogram in self.latencies.items():
+                record[name + "_p50_ms"] = round(1000 * histogram.quantile(0.5), 1)
+            self.log(record)
+
+    def log(self, record):
+        """
+        Function to write a log line
+        """
+        self.log_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.log_file.flush()
+
+    def summary(self):
+        """
+        Function to describe the recorded stages and latencies in a table
+        """
+        lines = [
+            "{:<24}{:>10}{:>14}{:>12}{:>14}{:>12}".format(
+                "Stage", "Seconds", "Tokens", "Sentences", "Tokens/s", "Peak MB"
+            )
+        ]
+        for stage in self.stages.values():
+            record = stage.record()
+            lines.append(
+                "{:<24}{:>10.1f}{:>14}{:>12}{:>14}{:>12}".format(
+                    stage.name,
+                    record["seconds"],
+                    stage.tokens,
+                    stage.sentences,
+                    (
+                        "{:.0f}".format(record["tokens_per_second"])
+                        if record["tokens_per_second"]
+                        else "-"
+                    ),
+                    "{:.1f}".format(stage.peak_rss_mb) if stage.peak_rss_mb else "-",
+                )
+            )
+        for name, histogram in self.latencies.items():
+            record = histogram.record()
+            lines.append(
+                "{}: {} calls, mean {} ms, p50 {} ms, p90 {} ms, p99 {} ms, max {} ms".format(
+                    name,
+                    record["calls"],
+                    record["mean_ms"],
+                    record["p50_ms"],
+                    record["p90_ms"],
+                    record["p99_ms"],
+                    record["max_ms"],
+                )
+            )
+        lines.append(
+            "Total {:.1f} seconds, peak memory use {} MB".format(
+                time.perf_counter() - self.start, peak_rss_mb()
+            )
+        )
+        return "\n".join(lines)
+
+    def finish(self):
+        """
+        Function to log the recorded values of each stage and print the summary at the end of the run
+        """
+        self.log(
+            {
+                "event": "summary",
+                "seconds": round(time.perf_counter() - self.start, 3),
+                "peak_rss_mb": peak_rss_mb(),
+                "stages": [stage.record() for stage in self.stages.values()],
+                "latencies": {
+                    name: histogram.record()
+                    for name, histogram in self.latencies.items()
+                },
+            }
+        )
+        print(self.summary())
+
+
+class ActiveStage:
+    """
+    Context manager which records the time spent in a stage
+    """
+
+    def __init__(self, instruments, stage):
+        self.instruments = instruments
+        self.stage = stage
+
+    def __enter__(self):
+        self.stage.start = time.perf_counter()
+        self.instruments.active.append(self.stage)
+        return self.stage
+
+    def __exit__(self, *exc_info):
+        self.instruments.active.pop()
+        self.stage.seconds += time.perf_counter() - self.stage.start
+        self.stage.start = None
+        self.stage.peak_rss_mb = peak_rss_mb()
+        return False
+
+
+def enable(interval=60.0, log_path=None):
+    """
+    Function to start recording, logging progress every interval seconds to log_path, or standard error if no
+    path is given. The summary is printed when the process exits
+    """
+    global instruments
+    log_file = open(log_path, "a", encoding="utf-8") if log_path else None
+    instruments = Instruments(interval, log_file)
+    atexit.register(instruments.finish)
+    return instruments
+
+
+def disable():
+    """
+    Function to stop recording, e.g. in a worker process
+    """
+    global instruments
+    instruments = None
+
+
+def stage(name):
+    """
+    Function to get a context manager which records a stage, see Instruments.stage()
+    """
+    if instruments is None:
+        return no_stage
+    return instruments.stage(name)
+
+
+def count(tokens, sentences=1):
+    """
+    Function to add tokens and sentences to the current stage, see Instruments.count()
+    """
+    if instruments is not None:
+        instruments.count(tokens, sentences)
+
+
+def latency(name, seconds):
+    """
+    Function to record the latency of a call, see Instruments.latency()
+    """
+    if instruments is not None:
+        instruments.latency(name, seconds)
+
+
+def count_tagged(tagged):
+    """
+    Function to count the words in a list of tagger output (see lemmafreq/taggers.py), with each text counted as
+    one sentence, as each line of IcePaHC is a sentence
+    """
+    if instruments is None:
+        return
+    tokens = 0
+    for text in tagged:
+        for paragraph in text["paragraphs"]:
+            for sentence in paragraph["sentences"]:
+                tokens += len(sentence)
+    instruments.count(tokens, len(tagged))
@@ -0,0 +1,102 @@
+"""
+Frequencies normalized by the size of a corpus, so the frequency of a lemma can be compared between corpora of very
+different sizes, such as IcePaHC, MÍM and IGC.
+
+For a lemma counted count times in a corpus of tokens lemma tokens and types distinct lemmas, the measures are:
+
+    per_million: count / tokens * 10^6, the frequency per million words
+    zipf: log10((count + 1) / (tokens + types) * 10^9), the Zipf scale of van Heuven et al. (2014), i.e. the log
+    of the frequency per billion words with Laplace smoothing, so a lemma which is not in the corpus also has a
+    value. Lemmas below 3 are rare and lemmas above 4 are common
+    log: log10(count + 1)
+
+All three are NaN, written as nan, for every lemma of a corpus with no tokens, e.g. IcePaHC when its file list is
+empty, as the frequency of a lemma in it is not known.
+
+The scripts write the measures of each lemma in each corpus after its counts when frequency_measures is set. The
+measures of all lemmas are computed at once from an array of counts, or a matrix with a column for each corpus,
+which requires numpy. The number of tokens and types of each corpus are written along with an output which has
+measures, to <name>.totals.tsv next to it, e.g.
+
+    corpus  tokens  types
+    giga    1853227912  4120593
+
+so the size of each corpus is known without reading the output.
+"""
+
+import os
+
+# measures written after the frequency of each lemma, in this order, and the format of each
+names = ("per_million", "zipf", "log")
+formats = ("%.4f", "%.3f", "%.3f")
+
+
+def corpus_size(counts):
+    """
+    Function to get the number of tokens and types of a corpus from a numpy array of its counts, or of each corpus
+    from a matrix of counts with a column for each corpus
+    """
+    import numpy
+
+    return counts.sum(axis=0), numpy.count_nonzero(counts, axis=0)
+
+
+def compute(counts, tokens, types):
+    """
+    Function to get the per million, Zipf and log frequency of each count in a numpy array of counts, as float arrays
+    of the same shape. For a matrix of counts, tokens and types hold the size of the corpus of each column
+    """
+    import numpy
+
+    counts = numpy.asarray(counts, dtype=numpy.float64)
+    # an empty corpus, e.g. one which was not read, has no frequencies
+    empty = numpy.asarray(tokens) == 0
+    tokens = numpy.where(empty, 1, tokens)
+    per_million = counts * (1e6 / tokens)
+    zipf = numpy.log10((counts + 1) * (1e9 / (tokens + types)))
+    log = numpy.log10(counts + 1)
+    return tuple(
+        numpy.where(empty, numpy.nan, values) for values in (per_million, zipf, log)
+    )
+
+
+def format_measures(measures):
+    """
+    Function to format the arrays returned by compute() as arrays of strings, see formats
+    """
+    import numpy
+
+    return [numpy.char.mod(fmt, values) for fmt, values in zip(formats, measures)]
+
+
+def totals_path(path):
+    """
+    Function to get the path of the totals written along with an output file, e.g. mim_full_freq.totals.tsv for
+    mim_full_freq.tsv or mim_full_freq.tsv.zst
+    """
+    directory, name = os.path.split(path)
+    return os.path.join(directory, name.split(".")[0] + ".totals.tsv")
+
+
+def write_totals(path, corpora, tokens, types):
+    """
+    Function to write the number of tokens and types of each corpus along with the output file in path
+    """
+    with open(totals_path(path), "w", encoding="utf-8") as f:
+        f.write("corpus\ttokens\ttypes\n")
+        for corpus, n_tokens, n_types in zip(corpora, tokens, types):
+            f.write("{}\t{}\t{}\n".format(corpus, int(n_tokens), int(n_types)))
+
+
+def read_totals(path):
+    """
+    Function to read the totals written along with the output file in path, returns a dictionary with the number
+    of tokens and types of each corpus
+    """
+    totals = dict()
+    with open(totals_path(path), encoding="utf-8") as f:
+        next(f)
+        for line in f:
+            corpus, tokens, types = line.rstrip("\n").split("\t")
+            totals[corpus] = (int(tokens), int(types))
+    return totals
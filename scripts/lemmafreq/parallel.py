@@ -0,0 +1,140 @@
+"""
+Parallel counting of lemmas over many corpus files.
+
+The files are split into contiguous chunks which are counted in a process pool, one Counter per chunk.
+The partial counters are then merged pairwise, in order, until one is left. Since each chunk is merged
+into the chunk before it, the keys of the merged counter are in the same order as in a serial run, so
+the sorted output is identical.
+
+The files can also be split into shards which are counted separately, e.g. on different machines, with
+shard_files(). The partial counts of the shards are merged in the order of the shards.
+"""
+
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import argparse
+import os
+
+from . import instrument
+
+
+def count_chunk(text_words, files):
+    """
+    Function to count lemmas in a list of files with the given extractor
+    """
+    c = Counter()
+    for file in files:
+        c.update(text_words(file))
+    return c
+
+
+def merge_counters(counters):
+    """
+    Function to merge a list of counters in a tree reduction, keeping the order of the list
+    """
+    counters = list(counters)
+    if not counters:
+        return Counter()
+    while len(counters) > 1:
+        merged = []
+        for i in range(0, len(counters) - 1, 2):
+            counters[i].update(counters[i + 1])
+            merged.append(counters[i])
+        if len(counters) % 2:
+            merged.append(counters[-1])
+        counters = merged
+    return counters[0]
+
+
+def split_chunks(files, n_chunks):
+    """
+    Function to split a list of files into at most n_chunks contiguous chunks of similar size
+    """
+    files = list(files)
+    n_chunks = max(1, min(n_chunks, len(files)))
+    size, rest = divmod(len(files), n_chunks)
+    chunks = []
+    start = 0
+    for i in range(n_chunks):
+        end = start + size + (1 if i < rest else 0)
+        chunks.append(files[start:end])
+        start = end
+    return chunks
+
+
+def shard_files(files, shard, n_shards):
+    """
+    Function to get the files of shard number shard, counted from 0, out of n_shards. The files are split into
+    contiguous chunks of similar size, so the shards of a list of files, in order, make up the list itself
+    """
+    files = list(files)
+    size, rest = divmod(len(files), n_shards)
+    start = shard * size + min(shard, rest)
+    end = start + size + (1 if shard < rest else 0)
+    return files[start:end]
+
+
+def parse_shard(text):
+    """
+    Function to parse a shard given on the command line as I/N, e.g. 0/4 for the first of four shards.
+    Returns (I, N)
+    """
+    # argparse only shows the message of an ArgumentTypeError
+    try:
+        shard, n_shards = (int(number) for number in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            "A shard is given as I/N, e.g. 0/4, not {}".format(text)
+        )
+    if not 0 <= shard < n_shards:
+        raise argparse.ArgumentTypeError(
+            "Shard {} is not between 0 and {}".format(shard, n_shards - 1)
+        )
+    return shard, n_shards
+
+
+def check_shards(n_shards, shard_path):
+    """
+    Function to check that all of n_shards shards have been counted, where shard_path(shard) is the path of the
+    last file written for a shard. Raises FileNotFoundError listing the missing shards
+    """
+    missing = [
+        str(shard) for shard in range(n_shards) if not os.path.exists(shard_path(shard))
+    ]
+    if missing:
+        raise FileNotFoundError(
+            "Shards {} of {} have not been counted in {}".format(
+                ", ".join(missing), n_shards, os.path.dirname(shard_path(0))
+            )
+        )
+
+
+def count_files(text_words, files, workers=1, progress=None, chunks_per_worker=4):
+    """
+    Function to count lemmas in files, in parallel if workers > 1. text_words must be a module level
+    function so it can be sent to the worker processes. progress is called with the number of files
+    counted so far, after each file in a serial run and after each chunk in a parallel run.
+    """
+    if workers <= 1:
+        c = Counter()
+        for file_count, file in enumerate(files, 1):
+            c.update(text_words(file))
+            if progress is not None:
+                progress(file_count)
+        return c
+
+    chunks = split_chunks(files, workers * chunks_per_worker)
+    partial = []
+    file_count = 0
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=instrument.disable
+    ) as executor:
+        results = executor.map(count_chunk, repeat(text_words), chunks)
+        for chunk, c in zip(chunks, results):
+            partial.append(c)
+            file_count += len(chunk)
+            instrument.count(sum(c.values()), 0)
+            if progress is not None:
+                progress(file_count)
+    return merge_counters(partial)
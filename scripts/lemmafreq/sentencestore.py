@@ -0,0 +1,186 @@
+"""
+Store of the tagged sentences of IcePaHC, for annotating lists of sentence IDs without tagging IcePaHC again.
+
+add_freq_V2() adds the lemmas of each sentence in the infoTheoryTestV2 file, and their frequency in IcePaHC, to
+the line of the sentence. Doing so requires all of IcePaHC to be tagged and counted, which is done once and kept in
+a SentenceStore, an SQLite database with two tables:
+
+    sentences: the ID of each sentence, as returned by sentence_ids() and v2_sent_id() (see lemmafreq/icepahc.py),
+    its text and the vocabulary ID of each of its lemmas, as an array('i')
+    lemmas: the "lemma, tag" key of each vocabulary ID and its frequency in IcePaHC
+
+The store also holds a digest of the files and the tagger it was filled from, so a script can tell whether it must
+be filled again. Annotating a file of sentence IDs is then a batch of lookups, e.g.
+
+    with SentenceStore("icepahc_sentences.sqlite") as store:
+        for line in store.annotate(open("infoTheoryTestV2...ooo")):
+            ...
+
+which gives the same lines as add_freq_V2(). The IDs are stored in the machine's byte order.
+"""
+
+from array import array
+import os
+import sqlite3
+
+from .countstore import manifest_digest
+from .icepahc import format_v2_line, text_path, v2_sent_id
+
+# SQLite limits the number of parameters in a query
+chunk_size = 500
+
+
+def icepahc_digest(basedir, files, version):
+    """
+    Function to compute a digest of the .txt and .psd files of the texts in basedir, the IcePaHC txt directory, and
+    a version, e.g. of the corpus and tagger, which changes when the sentences or their lemmas might change
+    """
+    paths = [basedir + file for file in files]
+    paths += [text_path(basedir, file, "psd", ".psd") for file in files]
+    return manifest_digest(paths, version)
+
+
+class SentenceStore:
+    """
+    SQLite database of sentences and lemma counts, see the description above. If path is None, the store is kept
+    in memory
+    """
+
+    def __init__(self, path):
+        if path is not None:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path or ":memory:")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS sentences "
+            "(sent_id TEXT PRIMARY KEY, text TEXT NOT NULL, ids BLOB NOT NULL)"
+        )
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS lemmas "
+            "(id INTEGER PRIMARY KEY, key TEXT NOT NULL, count INTEGER NOT NULL)"
+        )
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self.db.commit()
+        # key and count of each vocabulary ID looked up so far
+        self.keys = dict()
+        self.counts = dict()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM sentences").fetchone()[0]
+
+    def digest(self):
+        """
+        Function to get the digest the store was filled with, None if it is empty
+        """
+        row = self.db.execute("SELECT value FROM meta WHERE name = 'digest'").fetchone()
+        return row[0] if row else None
+
+    def fill(self, sentences, c, digest):
+        """
+        Function to replace the contents of the store with sentences, a list of (sentence ID, text, array of
+        vocabulary IDs) tuples, and the counts c of their lemmas, a Counts object (see lemmafreq/vocab.py)
+        """
+        self.db.execute("DELETE FROM sentences")
+        self.db.execute("DELETE FROM lemmas")
+        # a repeated sentence ID refers to the last sentence with that ID, as in a dictionary
+        self.db.executemany(
+            "INSERT OR REPLACE INTO sentences (sent_id, text, ids) VALUES (?, ?, ?)",
+            ((sent_id, text, ids.tobytes()) for sent_id, text, ids in sentences),
+        )
+        self.db.executemany(
+            "INSERT INTO lemmas (id, key, count) VALUES (?, ?, ?)",
+            ((i, c.vocab.key(i), count) for i, count in enumerate(c.counts) if count),
+        )
+        self.db.execute(
+            "INSERT OR REPLACE INTO meta (name, value) VALUES ('digest', ?)", (digest,)
+        )
+        self.db.commit()
+        self.keys = dict()
+        self.counts = dict()
+
+    def key(self, i):
+        """
+        Function to get the "lemma, tag" key of a vocabulary ID which has been looked up
+        """
+        return self.keys[i]
+
+    def lookup(self, sent_ids):
+        """
+        Function to look up a list of sentence IDs, returns a dictionary with the text, the array of vocabulary IDs
+        and the list of counts of each sentence found
+        """
+        found = dict()
+        unique_ids = list(set(sent_ids))
+        for i in range(0, len(unique_ids), chunk_size):
+            chunk = unique_ids[i : i + chunk_size]
+            rows = self.db.execute(
+                "SELECT sent_id, text, ids FROM sentences WHERE sent_id IN ({})".format(
+                    ",".join("?" * len(chunk))
+                ),
+                chunk,
+            )
+            for sent_id, text, data in rows:
+                ids = array("i")
+                ids.frombytes(data)
+                found[sent_id] = (text, ids)
+
+        missing = list(
+            {i for text, ids in found.values() for i in ids} - set(self.keys)
+        )
+        for i in range(0, len(missing), chunk_size):
+            chunk = missing[i : i + chunk_size]
+            rows = self.db.execute(
+                "SELECT id, key, count FROM lemmas WHERE id IN ({})".format(
+                    ",".join("?" * len(chunk))
+                ),
+                chunk,
+            )
+            for lemma_id, key, count in rows:
+                self.keys[lemma_id] = key
+                self.counts[lemma_id] = count
+
+        counts = self.counts
+        return {
+            sent_id: (text, ids, [counts[i] for i in ids])
+            for sent_id, (text, ids) in found.items()
+        }
+
+    def annotate(self, lines, batch_size=10000):
+        """
+        Function to add the lemmas of each sentence and their counts to lines of the infoTheoryTestV2 file, or any
+        file in its format, as add_freq_V2() does. Lines which do not refer to a sentence are skipped, and a
+        KeyError is raised for a sentence which is not in the store. The lines are looked up batch_size at a time
+        """
+        batch = []
+        for line in lines:
+            batch.append(line)
+            if len(batch) == batch_size:
+                yield from self.annotate_batch(batch)
+                batch = []
+        yield from self.annotate_batch(batch)
+
+    def annotate_batch(self, lines):
+        """
+        Function to annotate a list of lines, see annotate()
+        """
+        sent_ids = [v2_sent_id(line) for line in lines]
+        sentences = self.lookup(
+            [sent_id for sent_id in sent_ids if sent_id is not None]
+        )
+        for line, sent_id in zip(lines, sent_ids):
+            if sent_id is None:
+                continue
+            if sent_id not in sentences:
+                raise KeyError("Sentence {} is not in the store".format(sent_id))
+            text, ids, counts = sentences[sent_id]
+            yield format_v2_line(line, self, ids, counts)
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,89 @@
+"""
+Temporary storage of the sentences of a corpus between the counting pass and the writing pass.
+
+The per-sentence output needs the final counts of every corpus, so the sentences of a corpus can only be written
+after the whole corpus has been counted. Instead of parsing the corpus a second time, each sentence is written to a
+spool while it is counted, with its metadata and text as strings and its lemmas as an array of vocabulary IDs, and
+read back in the same order when it is written. Reading the spool is much faster than parsing the XML again.
+
+Each sentence is stored as an array('i') holding the number of IDs and the length of each field in bytes,
+followed by the fields encoded in UTF-8 and the IDs. The spool is a temporary file, which is removed when it is
+closed, unless a path is given, in which case it is kept and can be read later with read_spool(), e.g. to merge the
+shards of a corpus counted on different machines. The spool is written in the machine's byte order, so it must be
+read on a machine with the same byte order.
+"""
+
+from array import array
+import tempfile
+
+from . import instrument
+
+
+class SentenceSpool:
+    """
+    Temporary file of sentences with n_fields string fields each, see the description above. If path is given, the
+    spool is written to that file and kept when it is closed
+    """
+
+    def __init__(self, n_fields, directory=None, path=None):
+        self.n_fields = n_fields
+        if path is None:
+            self.file = tempfile.TemporaryFile("w+b", dir=directory)
+        else:
+            self.file = open(path, "w+b")
+        self.sentences = 0
+
+    def __len__(self):
+        return self.sentences
+
+    def write(self, fields, ids):
+        """
+        Function to add a sentence, with a list of n_fields strings and an array('i') of vocabulary IDs
+        """
+        data = [field.encode("utf-8") for field in fields]
+        header = array("i", [len(ids)])
+        header.extend(len(field) for field in data)
+        self.file.write(header.tobytes())
+        self.file.write(b"".join(data))
+        self.file.write(ids.tobytes())
+        self.sentences += 1
+
+    def __iter__(self):
+        """
+        Function to read the sentences back in the order in which they were written, yields the fields and the
+        array of IDs of each sentence
+        """
+        self.file.flush()
+        self.file.seek(0)
+        yield from read_sentences(self.file, self.n_fields)
+        self.file.seek(0, 2)
+
+    def close(self):
+        self.file.close()
+
+
+def read_sentences(f, n_fields):
+    """
+    Function to read sentences with n_fields fields each from a spool file until its end, yields the fields and the
+    array of IDs of each sentence
+    """
+    header_size = array("i").itemsize * (n_fields + 1)
+    while True:
+        data = f.read(header_size)
+        if not data:
+            break
+        header = array("i")
+        header.frombytes(data)
+        fields = [f.read(size).decode("utf-8") for size in header[1:]]
+        ids = array("i")
+        ids.frombytes(f.read(header[0] * ids.itemsize))
+        instrument.count(len(ids))
+        yield fields, ids
+
+
+def read_spool(path, n_fields):
+    """
+    Function to read the sentences of a spool kept in a file, see SentenceSpool
+    """
+    with open(path, "rb") as f:
+        yield from read_sentences(f, n_fields)
@@ -0,0 +1,137 @@
+"""
+Persistent cache of tagger output.
+
+The text of IcePaHC does not change between runs, so each line only needs to be tagged once. The output of the
+tagger is stored in an SQLite database, keyed by a hash of the tagger's identity and the text of the line, so a
+different tagger or a changed line is never served stale output. When the cache holds more than max_entries lines,
+the least recently used ones are removed. The number of hits and misses is counted so it can be checked that a
+warm run calls the tagger for no lines at all.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+
+from .taggers import Tagger
+
+
+class TagCache:
+    """
+    SQLite database of tagger output, keyed by tagger identity and text
+    """
+
+    def __init__(self, path, max_entries=1000000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS tags "
+            "(key TEXT PRIMARY KEY, tagged TEXT NOT NULL, used INTEGER NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS tags_used ON tags (used)")
+        self.db.commit()
+        # the last time an entry was used, counted in calls to get_many() and put_many()
+        self.clock = self.db.execute("SELECT MAX(used) FROM tags").fetchone()[0] or 0
+
+    @staticmethod
+    def key(identity, text):
+        """
+        Function to get the key of a text tagged by the tagger with the given identity
+        """
+        return hashlib.sha1("{}\0{}".format(identity, text).encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        """
+        Function to look up a list of keys, returns a dictionary with the output found for each key
+        """
+        self.clock += 1
+        found = dict()
+        unique_keys = list(set(keys))
+        # SQLite limits the number of parameters in a query
+        for i in range(0, len(unique_keys), 500):
+            chunk = unique_keys[i : i + 500]
+            rows = self.db.execute(
+                "SELECT key, tagged FROM tags WHERE key IN ({})".format(
+                    ",".join("?" * len(chunk))
+                ),
+                chunk,
+            )
+            for key, tagged in rows:
+                found[key] = json.loads(tagged)
+        self.db.executemany(
+            "UPDATE tags SET used = ? WHERE key = ?",
+            [(self.clock, key) for key in found],
+        )
+        self.db.commit()
+        self.hits += sum(1 for key in keys if key in found)
+        self.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def put_many(self, items):
+        """
+        Function to store the output for each (key, output) pair and evict old entries if the cache is full
+        """
+        self.clock += 1
+        self.db.executemany(
+            "INSERT OR REPLACE INTO tags (key, tagged, used) VALUES (?, ?, ?)",
+            [(key, json.dumps(tagged), self.clock) for key, tagged in items],
+        )
+        self.evict()
+        self.db.commit()
+
+    def evict(self):
+        """
+        Function to remove the least recently used entries until the cache holds at most max_entries entries
+        """
+        size = self.db.execute("SELECT COUNT(*) FROM tags").fetchone()[0]
+        if size > self.max_entries:
+            self.db.execute(
+                "DELETE FROM tags WHERE key IN "
+                "(SELECT key FROM tags ORDER BY used LIMIT ?)",
+                (size - self.max_entries,),
+            )
+
+    def stats(self):
+        """
+        Function to describe the number of hits and misses so far
+        """
+        return "Tag cache: {} hits, {} misses".format(self.hits, self.misses)
+
+
+class CachedTagger(Tagger):
+    """
+    Tagger which only calls another tagger for texts which are not in a TagCache. The other tagger is created by
+    make_tagger() the first time it is needed, so a warm run never loads a model or opens a connection.
+    """
+
+    def __init__(self, make_tagger, identity, cache):
+        self.make_tagger = make_tagger
+        self.tagger = None
+        self.identity = identity
+        self.cache = cache
+
+    def tag_batch(self, texts):
+        keys = [TagCache.key(self.identity, text) for text in texts]
+        found = self.cache.get_many(keys)
+
+        # texts which are not in the cache, each repeated text only once
+        missing = dict()
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+
+        if missing:
+            if self.tagger is None:
+                self.tagger = self.make_tagger()
+            tagged = list(zip(missing, self.tagger.tag_batch(list(missing.values()))))
+            self.cache.put_many(tagged)
+            found.update(tagged)
+
+        return [found[key] for key in keys]
+
+    def stats(self):
+        return self.cache.stats()
@@ -0,0 +1,305 @@
+"""
+Taggers and lemmatizers for IcePaHC, which is not tagged.
+
+Every tagger returns its output in the JSON format of the tagging API at http://malvinnsla.arnastofnun.is, i.e. a
+paragraph for each text, each containing a list of sentences, each of which is a list of words:
+
+    {"paragraphs": [{"sentences": [[{"word": "Hestur", "tag": "nken-s", "lemma": "hestur"}, ...], ...]}]}
+
+so tagged_lemmas() in lemmafreq/corpora.py works the same for all of them. Two backends are available:
+
+    "http" sends the text to the malvinnsla API. Many lines are sent in each request, several requests are sent at
+    once over a pool of persistent connections, and failed requests are retried.
+    "local" tags the text in-process with the POS tagger from https://github.com/cadia-lvl/POS and lemmatizes it
+    with Nefnir (https://github.com/jonfd/nefnir). The model is loaded once and whole files are tagged in batches,
+    so no network access is needed.
+
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import time
+
+from . import instrument
+
+malvinnsla_url = "http://malvinnsla.arnastofnun.is"
+# model of the POS tagger used by the local backend
+default_model = "tag"
+# packages whose version is part of the identity of the local backend
+local_packages = ("pos", "tokenizer", "nefnir", "torch")
+
+
+class Tagger:
+    """
+    Base class for taggers. Subclasses implement tag_batch(), and make_identity(), which returns a string which
+    changes whenever the output of the tagger might change, from the same arguments as the tagger. The identity
+    of a tagger is set from it, and backend_identity() uses it to get the identity of a tagger without creating it
+    """
+
+    identity = None
+
+    @staticmethod
+    def make_identity():
+        raise NotImplementedError
+
+    def tag(self, text):
+        """
+        Function to tag and lemmatize a single text
+        """
+        return self.tag_batch([text])[0]
+
+    def tag_batch(self, texts):
+        """
+        Function to tag and lemmatize a list of texts, returns the output for each text in the same order
+        """
+        raise NotImplementedError
+
+    def stats(self):
+        """
+        Function to describe the use of the tag cache, see CachedTagger
+        """
+        return "Tag cache not used"
+
+
+class HTTPTagger(Tagger):
+    """
+    Tagger which calls the tagging API from http://malvinnsla.arnastofnun.is/about_en
+
+    The lines of a batch are joined with newlines and sent lines_per_request at a time, as the API returns a
+    paragraph for each line. If the number of paragraphs does not match the number of lines, or the words of a
+    paragraph do not make up its line, the lines of that request are sent again one at a time. Up to concurrency
+    requests are sent at once, and the output is returned in the order of the input. A failed request is retried
+    up to retries times, waiting backoff seconds before the first retry and twice as long before each one after
+    that.
+    """
+
+    def __init__(
+        self,
+        url=None,
+        lines_per_request=50,
+        concurrency=4,
+        retries=5,
+        backoff=1.0,
+        timeout=60,
+    ):
+        import requests
+
+        self.requests = requests
+        self.url = url or malvinnsla_url
+        self.identity = self.make_identity(url=self.url)
+        self.lines_per_request = lines_per_request
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=concurrency, pool_maxsize=concurrency
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @staticmethod
+    def make_identity(url=None):
+        return "http:" + (url or malvinnsla_url)
+
+    def tag_batch(self, texts):
+        chunks = [
+            texts[i : i + self.lines_per_request]
+            for i in range(0, len(texts), self.lines_per_request)
+        ]
+        tagged = []
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for chunk_tagged in executor.map(self.tag_lines, chunks):
+                tagged.extend(chunk_tagged)
+        return tagged
+
+    def tag_lines(self, lines):
+        """
+        Function to tag a list of lines in one request
+        """
+        # the API returns no paragraph for an empty line, so empty lines are not sent and are given an empty
+        # paragraph, as LocalTagger does
+        tagged = [{"paragraphs": [{"sentences": []}]} for line in lines]
+        # the same text is sent for a line whether it is sent with other lines or on its own
+        texts = [line.strip() for line in lines]
+        sent = [i for i, text in enumerate(texts) if text]
+        if not sent:
+            return tagged
+
+        paragraphs = self.post("\n".join(texts[i] for i in sent))["paragraphs"]
+        if len(paragraphs) == len(sent) and all(
+            matches(texts[i], paragraph) for i, paragraph in zip(sent, paragraphs)
+        ):
+            for i, paragraph in zip(sent, paragraphs):
+                tagged[i] = {"paragraphs": [paragraph]}
+        else:
+            print(
+                "Tagger output does not match the lines sent, tagging {} lines one at a time".format(
+                    len(sent)
+                )
+            )
+            for i in sent:
+                tagged[i] = self.post(texts[i])
+        return tagged
+
+    def post(self, text):
+        """
+        Function to send one text to the API, retrying if the request fails
+        """
+        payload = {"text": text, "lemma": "on"}
+        for attempt in range(self.retries + 1):
+            try:
+                start = time.perf_counter()
+                res = self.session.post(self.url, data=payload, timeout=self.timeout)
+                instrument.latency("tagger", time.perf_counter() - start)
+                res.raise_for_status()
+                return res.json()
+            except (self.requests.RequestException, ValueError) as exception:
+                if attempt == self.retries:
+                    raise
+                print(exception)
+                time.sleep(self.backoff * 2**attempt)
+
+
+def matches(text, paragraph):
+    """
+    Function to check that a tagged paragraph is the output for a text, i.e. that its words make up the text,
+    apart from whitespace
+    """
+    words = "".join(
+        word["word"] for sentence in paragraph["sentences"] for word in sentence
+    )
+    return words == "".join(text.split())
+
+
+class LocalTagger(Tagger):
+    """
+    Tagger which runs in-process. model tags a batch of tokenized sentences, lemmatizer returns the lemma of a
+    word form with a given tag. Both are loaded with load_pos_model() and load_nefnir() if not given.
+
+    The model is called as model.tag_bulk(sentences, batch_size=batch_size), with a tuple of tokens for each
+    sentence, and returns a sequence of tags for each sentence. The identity of the tagger includes the versions
+    of the packages in local_packages, so tags cached and counts stored with other versions are not used.
+    """
+
+    def __init__(
+        self,
+        model=None,
+        lemmatizer=None,
+        batch_size=64,
+        model_name=default_model,
+        device="cpu",
+    ):
+        from tokenizer import split_into_sentences
+
+        self.split_into_sentences = split_into_sentences
+        self.model = model or load_pos_model(model_name, device)
+        self.lemmatizer = lemmatizer or load_nefnir()
+        self.batch_size = batch_size
+        self.identity = self.make_identity(model_name=model_name)
+
+    @staticmethod
+    def make_identity(model_name=default_model):
+        # the output changes with the tagger, tokenizer and lemmatizer, so their versions are included
+        return "local:{}:{}".format(
+            model_name,
+            ":".join(
+                "{}={}".format(package, package_version(package))
+                for package in local_packages
+            ),
+        )
+
+    def tag_batch(self, texts):
+        # sentences of all texts are tagged together, the text each sentence belongs to is kept
+        sentences = []
+        text_nos = []
+        for text_no, text in enumerate(texts):
+            for sentence in self.split_into_sentences(text):
+                sentences.append(tuple(sentence.split(" ")))
+                text_nos.append(text_no)
+
+        start = time.perf_counter()
+        tags = self.model.tag_bulk(sentences, batch_size=self.batch_size)
+        instrument.latency("tagger", time.perf_counter() - start)
+
+        tagged = [{"paragraphs": [{"sentences": []}]} for text in texts]
+        for text_no, sentence, sentence_tags in zip(text_nos, sentences, tags):
+            words = [
+                {"word": word, "tag": tag, "lemma": self.lemmatizer(word, tag)}
+                for word, tag in zip(sentence, sentence_tags)
+            ]
+            tagged[text_no]["paragraphs"][0]["sentences"].append(words)
+        return tagged
+
+
+def package_version(package):
+    """
+    Function to get the installed version of a package, "none" if it is not installed
+    """
+    from importlib import metadata
+
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return "none"
+
+
+def load_pos_model(model_name=default_model, device="cpu"):
+    """
+    Function to load a tagging model from https://github.com/cadia-lvl/POS through torch.hub
+    """
+    import torch
+
+    return torch.hub.load(repo_or_dir="cadia-lvl/POS", model=model_name, device=device)
+
+
+def load_nefnir():
+    """
+    Function to load the Nefnir lemmatizer, returns a function from a word form and tag to a lemma
+    """
+    from nefnir import Nefnir
+
+    return Nefnir().lemmatize
+
+
+def tagger_class(backend="http"):
+    """
+    Function to get the class of the tagger of a backend
+    """
+    if backend == "http":
+        return HTTPTagger
+    if backend == "local":
+        return LocalTagger
+    raise ValueError("Unknown tagger backend: {}".format(backend))
+
+
+def make_tagger(backend="http"):
+    """
+    Function to create a tagger by the name of its backend
+    """
+    return tagger_class(backend)()
+
+
+def backend_identity(backend="http"):
+    """
+    Function to get the identity of the tagger make_tagger() creates for a backend, without creating it
+    """
+    return tagger_class(backend).make_identity()
+
+
+@lru_cache(maxsize=None)
+def get_tagger(backend="http", cache_path=None):
+    """
+    Function to get a tagger by the name of its backend. If cache_path is given, output is cached in an SQLite
+    database at that path (see lemmafreq/tagcache.py). Each tagger is only created once.
+    """
+    if cache_path is None:
+        return make_tagger(backend)
+
+    from .tagcache import CachedTagger, TagCache
+
+    return CachedTagger(
+        lambda: make_tagger(backend), backend_identity(backend), TagCache(cache_path)
+    )
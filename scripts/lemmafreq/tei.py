@@ -0,0 +1,65 @@
+"""
+Streaming reader for the TEI XML files of the Gigaword Corpus and the MÍM corpus.
+
+The files are read incrementally and each sentence is removed from the tree as soon as it has been read,
+so only one sentence is held in memory at a time, regardless of the size of the file. lxml is used when it
+is installed, otherwise the parser from the standard library is used.
+
+iter_sentences() yields a tuple for each sentence in a file:
+
+    The sentence ID
+    A list of (token, lemma, tag) tuples, one for each child of the sentence element. The lemma and tag are
+    None if the element has no such attribute, e.g. for punctuation in the Gigaword Corpus.
+
+"""
+
+try:
+    from lxml.etree import iterparse
+except ImportError:
+    from xml.etree.ElementTree import iterparse
+
+from . import instrument
+
+TEI = "{http://www.tei-c.org/ns/1.0}"
+XML_ID = "{http://www.w3.org/XML/1998/namespace}id"
+
+
+def iter_sentences(teifile, tag_attr="pos", id_attr=XML_ID):
+    """
+    Function to stream sentences from a tei xml file. The Gigaword Corpus stores tags in the pos attribute,
+    the MÍM corpus in the type attribute and sentence numbers in the n attribute.
+    """
+    sent_tag = TEI + "s"
+    stack = []
+    for event, elem in iterparse(teifile, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            continue
+        stack.pop()
+        if elem.tag != sent_tag:
+            continue
+        words = [
+            (aword.text, aword.get("lemma"), aword.get(tag_attr)) for aword in elem
+        ]
+        instrument.count(len(words))
+        yield elem.get(id_attr), words
+        # drop the sentence from the tree so the tree never grows
+        elem.clear()
+        if stack:
+            stack[-1].remove(elem)
+
+
+def source_year(teifile):
+    """
+    Function to read the year of publication from the source description in the header of a tei xml file.
+    Only the header is parsed.
+    """
+    in_source = False
+    for event, elem in iterparse(teifile, events=("start", "end")):
+        if elem.tag == TEI + "sourceDesc":
+            in_source = event == "start"
+        elif in_source and event == "end" and elem.tag == TEI + "date":
+            return elem.get("when")[:4]
+        elif elem.tag == TEI + "text":
+            break
+    return None
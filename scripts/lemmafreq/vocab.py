@@ -0,0 +1,137 @@
+"""
+Interned lemma IDs and array-backed lemma counts.
+
+Each (lemma, tag) pair is given a dense integer ID the first time it is seen, so a sentence can be held as an
+array of IDs and a count looked up by indexing an array instead of building and hashing a "lemma, tag" string
+for every token. The "lemma, tag" string is only built once for each pair, and is only used when the output
+is written.
+
+The counts of a corpus are kept in a Counts object, an array('q') indexed by ID which grows with the vocabulary.
+A Counts object has items() like a Counter, so it can be written with write_counts() and stored in a CountStore.
+All counts compared with each other must use the same Vocabulary. If numpy is installed, as_numpy() returns the
+counts as a numpy array without copying them.
+"""
+
+from array import array
+
+
+class Vocabulary:
+    """
+    Mapping between (lemma, tag) pairs and consecutive integer IDs, in the order in which the pairs were first seen
+    """
+
+    def __init__(self):
+        # IDs are looked up by tag and then by lemma, which is faster than building a tuple for each token
+        self.ids = dict()
+        self.keys = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def intern(self, lemma, tag):
+        """
+        Function to get the ID of a lemma and tag, adding them to the vocabulary if they are new
+        """
+        try:
+            return self.ids[tag][lemma]
+        except KeyError:
+            return self.add(lemma, tag)
+
+    def add(self, lemma, tag):
+        """
+        Function to add a lemma and tag to the vocabulary, returns its ID
+        """
+        lemmas = self.ids.setdefault(tag, dict())
+        # a lemma which is not a string, e.g. None, shares the ID of its string form, as in the output
+        i = lemmas.get(str(lemma))
+        if i is None:
+            i = len(self.keys)
+            self.keys.append("{}, {}".format(lemma, tag))
+            lemmas[str(lemma)] = i
+        lemmas[lemma] = i
+        return i
+
+    def intern_all(self, pairs):
+        """
+        Function to get an array of the IDs of (lemma, tag) pairs, adding the pairs which are new
+        """
+        return array("i", [self.intern(lemma, tag) for lemma, tag in pairs])
+
+    def intern_key(self, key):
+        """
+        Function to get the ID of a "lemma, tag" key as written by key()
+        """
+        lemma, tag = key.rsplit(", ", 1)
+        return self.intern(lemma, tag)
+
+    def key(self, i):
+        """
+        Function to get the "lemma, tag" key of an ID
+        """
+        return self.keys[i]
+
+
+class Counts:
+    """
+    Count of each ID in a Vocabulary
+    """
+
+    def __init__(self, vocab):
+        self.vocab = vocab
+        self.counts = array("q")
+
+    def grow(self):
+        """
+        Function to extend the array of counts with zeros to the size of the vocabulary
+        """
+        missing = len(self.vocab) - len(self.counts)
+        if missing > 0:
+            self.counts.frombytes(bytes(missing * self.counts.itemsize))
+
+    def update(self, ids):
+        """
+        Function to add one to the count of each ID in ids
+        """
+        counts = self.counts
+        for i in ids:
+            try:
+                counts[i] += 1
+            except IndexError:
+                self.grow()
+                counts[i] += 1
+
+    def lookup(self, ids):
+        """
+        Function to get a list of the count of each ID in ids
+        """
+        self.grow()
+        counts = self.counts
+        return [counts[i] for i in ids]
+
+    def __getitem__(self, i):
+        if i < len(self.counts):
+            return self.counts[i]
+        return 0
+
+    def __setitem__(self, i, count):
+        if i >= len(self.counts):
+            self.grow()
+        self.counts[i] = count
+
+    def items(self):
+        """
+        Function to yield the key and count of each ID with a count, in the order of the IDs
+        """
+        for i, count in enumerate(self.counts):
+            if count:
+                yield self.vocab.key(i), count
+
+    def as_numpy(self):
+        """
+        Function to get the counts as a numpy array of the size of the vocabulary, sharing memory with the counts.
+        The counts cannot grow while the numpy array is in use.
+        """
+        import numpy
+
+        self.grow()
+        return numpy.frombuffer(self.counts, dtype=numpy.int64)
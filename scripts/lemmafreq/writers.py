@@ -0,0 +1,406 @@
+"""
+Writers for the per-sentence output of the *_get_lemma_freq.py scripts.
+
+Each sentence is written with its metadata, its text, the vocabulary ID of each lemma and a list of counts for
+each corpus, in the same order as the IDs. open_sentence_writer() chooses the writer from the extension of the
+output file:
+
+    .tsv (or any other extension) writes a line of tab separated columns for each sentence, with a tuple of the
+    lemma and its counts and a frequency vector as text, e.g. ('hestur, nk', 123, 4, 5678). If only one corpus is
+    counted, the frequency vector shows the count alone. A name ending in .gz or .zst, e.g. giga_full_freq.tsv.zst,
+    is compressed with gzip or zstd (which requires the zstandard package), see open_output().
+    .parquet writes a Parquet file with typed columns, which requires pyarrow. The lemmas of a sentence are
+    stored as a list of vocabulary IDs in the lemma_ids column and the counts of each corpus as a list of
+    integers in the <corpus>_freq column. The years are stored as integers and missing values as nulls. Rows are
+    written in row groups of row_group_size sentences, so only one row group is kept in memory. The vocabulary
+    is written to a second file, <name>.vocab.parquet, with the ID, lemma and tag of each lemma.
+
+If a writer is opened with the Counts object of each corpus, a sentence can be written without its counts, which
+are then looked up by the writer. If numpy is installed, the counts are looked up and formatted for a batch of
+sentences at a time, see lemmafreq/annotate.py, which is much faster than doing so for each token. The output is
+the same either way.
+
+If a writer is opened with measures set, the frequency of each lemma per million words, on the Zipf scale and on a
+log scale in each corpus (see lemmafreq/measures.py) are written after the counts, which requires numpy and the
+Counts of each corpus. In a .tsv output they are written as three more vectors, in the same format as the
+frequency vector, and in a Parquet file as lists of floats in the <corpus>_per_million, <corpus>_zipf and
+<corpus>_log columns. The number of tokens and types of each corpus is written to <name>.totals.tsv.
+
+The size of the output, before and after compression, and the number of bytes written per second are printed
+when a writer is closed. An uncompressed .tsv output can be resumed from an offset, see can_resume().
+"""
+
+import gzip
+import io
+import os
+import time
+
+from . import annotate
+from .measures import names as measure_names
+from .measures import write_totals
+
+# size of the write buffer of output files
+buffer_size = 1 << 22
+
+
+class CountingWriter(io.RawIOBase):
+    """
+    Binary file which counts the bytes written to another file, before they are compressed
+    """
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes_written = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        # an uncompressed file may write only part of b
+        view = memoryview(b)
+        while view:
+            view = view[self.raw.write(view) :]
+        self.bytes_written += len(b)
+        return len(b)
+
+    def close(self):
+        if not self.closed:
+            self.raw.close()
+        super().close()
+
+
+def can_resume(path):
+    """
+    Function to check whether an output file can be truncated and appended to, which is only the case for
+    uncompressed text
+    """
+    return not path.endswith((".gz", ".zst", ".parquet"))
+
+
+def open_output(path, threads=0, offset=0):
+    """
+    Function to open a text file for writing with a large write buffer. If the path ends in .gz or .zst the output
+    is compressed with gzip or zstd, and if threads > 0 zstd compresses in that many threads while the file is
+    written. The decompressed output is the same as that of an uncompressed file. The number of bytes written,
+    before compression, is kept in out.buffer.raw.bytes_written. If offset > 0, an existing uncompressed file is
+    truncated to offset bytes and appended to.
+    """
+    if offset and not can_resume(path):
+        raise ValueError("Cannot resume writing {}".format(path))
+    if offset:
+        raw = io.FileIO(path, "r+")
+        raw.truncate(offset)
+        raw.seek(offset)
+    elif path.endswith(".zst"):
+        import zstandard
+
+        compressor = zstandard.ZstdCompressor(level=3, threads=threads)
+        raw = compressor.stream_writer(open(path, "wb"), closefd=True)
+    elif path.endswith(".gz"):
+        raw = gzip.open(path, "wb", compresslevel=6)
+    else:
+        raw = io.FileIO(path, "w")
+    return io.TextIOWrapper(
+        io.BufferedWriter(CountingWriter(raw), buffer_size), encoding="utf-8"
+    )
+
+
+def output_stats(path, seconds, bytes_written=None):
+    """
+    Function to describe the number of bytes written to an output file, before compression, the number of bytes
+    written per second and the size of the file
+    """
+    size = os.path.getsize(path)
+    if bytes_written is None:
+        bytes_written = size
+    return "Wrote {:.1f} MB to {} in {:.1f} seconds, {:.1f} MB/s ({:.1f} MB on disk)".format(
+        bytes_written / 1e6,
+        path,
+        seconds,
+        bytes_written / 1e6 / max(seconds, 1e-9),
+        size / 1e6,
+    )
+
+
+class SentenceWriter:
+    """
+    Base class for sentence writers, which can be used in a with statement
+    """
+
+    def write(
+        self,
+        text_id,
+        sent_id,
+        sent_no,
+        genre,
+        year,
+        author_year,
+        author_sex,
+        text,
+        ids,
+        columns=None,
+    ):
+        """
+        Function to write a sentence. columns holds a list of counts for each corpus, one for each ID in ids. If
+        columns is not given, the counts are looked up in the counters the writer was opened with
+        """
+        raise NotImplementedError
+
+    def lookup(self, ids):
+        """
+        Function to get a list of counts for each of the writer's counters, one for each ID in ids
+        """
+        if self.annotator is not None:
+            return self.annotator.columns(ids)
+        return [c.lookup(ids) for c in self.counters]
+
+    def close(self):
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TSVWriter(SentenceWriter):
+    """
+    Writer for sentences in tab separated text
+    """
+
+    def __init__(self, path, vocab, threads=0, offset=0, counters=None, measures=False):
+        self.path = path
+        self.vocab = vocab
+        self.offset = offset
+        self.counters = counters
+        self.measures = measures
+        self.annotator = open_annotator(vocab, counters, measures)
+        # sentences waiting to be annotated as a batch, with their fields and IDs
+        self.pending = []
+        self.out = open_output(path, threads, offset)
+        self.start = time.perf_counter()
+
+    def write(
+        self,
+        text_id,
+        sent_id,
+        sent_no,
+        genre,
+        year,
+        author_year,
+        author_sex,
+        text,
+        ids,
+        columns=None,
+    ):
+        fields = [text_id, sent_id, sent_no, genre, year, author_year, author_sex, text]
+        if columns is None and self.annotator is not None:
+            self.pending.append((fields, ids))
+            if len(self.pending) >= annotate.batch_size:
+                self.flush()
+            return
+        if self.measures:
+            raise ValueError(
+                "Measures can only be written with the counts the writer was opened with"
+            )
+        self.flush()
+        if columns is None:
+            columns = self.lookup(ids)
+        tup, vector = annotate.annotate_tokens(self.vocab, ids, columns)
+        self.out.write("\t".join(fields + [tup, vector]) + "\n")
+
+    def flush(self):
+        """
+        Function to annotate and write the sentences waiting to be annotated
+        """
+        if not self.pending:
+            return
+        annotated = self.annotator.annotate([ids for fields, ids in self.pending])
+        self.out.write(
+            "".join(
+                "\t".join(fields + columns) + "\n"
+                for (fields, ids), columns in zip(self.pending, annotated)
+            )
+        )
+        self.pending = []
+
+    def tell(self):
+        """
+        Function to flush the output and get its size, before compression
+        """
+        self.flush()
+        self.out.flush()
+        return self.offset + self.out.buffer.raw.bytes_written
+
+    def close(self):
+        self.flush()
+        self.out.close()
+        print(
+            output_stats(
+                self.path,
+                time.perf_counter() - self.start,
+                self.out.buffer.raw.bytes_written,
+            )
+        )
+
+
+class ParquetWriter(SentenceWriter):
+    """
+    Writer for sentences in a Parquet file, see the description at the top of the module
+    """
+
+    def __init__(
+        self, path, vocab, corpora, row_group_size=65536, counters=None, measures=False
+    ):
+        import pyarrow
+        import pyarrow.parquet
+
+        self.pyarrow = pyarrow
+        self.parquet = pyarrow.parquet
+        self.path = path
+        self.vocab = vocab
+        self.corpora = corpora
+        self.counters = counters
+        self.measures = measures
+        self.annotator = open_annotator(vocab, counters, measures)
+        self.row_group_size = row_group_size
+        self.schema = pyarrow.schema(
+            [
+                ("text_id", pyarrow.string()),
+                ("sent_id", pyarrow.string()),
+                ("sent_no", pyarrow.string()),
+                ("genre", pyarrow.string()),
+                ("year", pyarrow.int16()),
+                ("author_year", pyarrow.int16()),
+                ("author_sex", pyarrow.string()),
+                ("text", pyarrow.string()),
+                ("lemma_ids", pyarrow.list_(pyarrow.int32())),
+            ]
+            + [(corpus + "_freq", pyarrow.list_(pyarrow.int64())) for corpus in corpora]
+            + [
+                (corpus + "_" + name, pyarrow.list_(pyarrow.float64()))
+                for name in (measure_names if measures else ())
+                for corpus in corpora
+            ]
+        )
+        self.writer = pyarrow.parquet.ParquetWriter(
+            path, self.schema, compression="zstd"
+        )
+        self.rows = {name: [] for name in self.schema.names}
+        self.start = time.perf_counter()
+
+    def write(
+        self,
+        text_id,
+        sent_id,
+        sent_no,
+        genre,
+        year,
+        author_year,
+        author_sex,
+        text,
+        ids,
+        columns=None,
+    ):
+        if columns is None:
+            columns = self.lookup(ids)
+        rows = self.rows
+        rows["text_id"].append(text_id)
+        rows["sent_id"].append(sent_id)
+        rows["sent_no"].append(sent_no)
+        rows["genre"].append(genre or None)
+        rows["year"].append(parse_year(year))
+        rows["author_year"].append(parse_year(author_year))
+        rows["author_sex"].append(author_sex or None)
+        rows["text"].append(text)
+        rows["lemma_ids"].append(ids.tolist())
+        for corpus, counts in zip(self.corpora, columns):
+            rows[corpus + "_freq"].append(counts)
+        if self.measures:
+            names = [
+                corpus + "_" + name for name in measure_names for corpus in self.corpora
+            ]
+            for name, values in zip(names, self.annotator.measure_columns(ids)):
+                rows[name].append(values)
+        if len(rows["text_id"]) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Function to write the buffered sentences as a row group
+        """
+        if self.rows["text_id"]:
+            self.writer.write_table(
+                self.pyarrow.Table.from_pydict(self.rows, schema=self.schema)
+            )
+            self.rows = {name: [] for name in self.schema.names}
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+        lemmas = []
+        tags = []
+        for key in self.vocab.keys:
+            lemma, tag = key.rsplit(", ", 1)
+            lemmas.append(lemma)
+            tags.append(tag)
+        vocab_table = self.pyarrow.table(
+            {
+                "lemma_id": self.pyarrow.array(
+                    range(len(lemmas)), self.pyarrow.int32()
+                ),
+                "lemma": lemmas,
+                "tag": tags,
+            }
+        )
+        self.parquet.write_table(vocab_table, vocab_path(self.path))
+        print(output_stats(self.path, time.perf_counter() - self.start))
+
+
+def parse_year(year):
+    """
+    Function to get a year as an integer from the first four characters of a date, None if they are not a year
+    """
+    if year and year[:4].isdigit():
+        return int(year[:4])
+    return None
+
+
+def vocab_path(path):
+    """
+    Function to get the path of the vocabulary written along with a Parquet file
+    """
+    return path[: -len(".parquet")] + ".vocab.parquet"
+
+
+def open_annotator(vocab, counters, measures=False):
+    """
+    Function to get an Annotator of the counts in counters, None if there are no counters or numpy is not installed
+    """
+    if measures and (counters is None or annotate.numpy is None):
+        raise ValueError("Measures require numpy and the counts of each corpus")
+    if counters is None or annotate.numpy is None:
+        return None
+    return annotate.Annotator(vocab, counters, measures)
+
+
+def open_sentence_writer(
+    path, vocab, corpora, threads=0, offset=0, counters=None, measures=False
+):
+    """
+    Function to open a writer for sentences counted in the given corpora, chosen by the extension of the path.
+    threads is the number of threads used to compress zstd output. If offset > 0, writing resumes at that offset.
+    counters holds the Counts of each corpus, in the same order, if the writer is to look up the counts. If
+    measures is set, the measures of each lemma are written as well, and the size of each corpus to the totals
+    """
+    if path.endswith(".parquet"):
+        writer = ParquetWriter(
+            path, vocab, corpora, counters=counters, measures=measures
+        )
+    else:
+        writer = TSVWriter(path, vocab, threads, offset, counters, measures)
+    if measures:
+        write_totals(path, corpora, writer.annotator.tokens, writer.annotator.types)
+    return writer
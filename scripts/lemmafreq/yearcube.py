@@ -0,0 +1,399 @@
+"""
+Lemma counts of the Gigaword Corpus by year of publication and genre, for diachronic queries without reading the
+corpus again.
+
+The counts form a sparse cube with a cell for each lemma, year and genre in which the lemma occurs. A CubeBuilder
+collects the counts of each file with its year and genre, e.g. while the corpus is counted, and write_cube() writes
+the cube to a binary file which YearCube memory-maps, as FreqIndex does with a frequency list (see
+lemmafreq/freqindex.py):
+
+    with YearCube("giga_year_cube.bin") as cube:
+        cube.by_year("hestur", "nk")
+        cube.by_year("hestur", "nk", genre="News1")
+        cube.top(2010, 20)
+        cube.top(2010, 20, genre="Adjud")
+
+Each (year, genre) pair with counts is a group, and the groups are sorted by year and then by genre. The year of
+a file is 0 if it is not known. The cube consists of the following, in little-endian byte order:
+
+    A header of 80 bytes: the magic number b"LEMCUBE1", the number of lemmas, groups, years, cells and year cells
+    (cells of a lemma and a year, across genres) and the size of the keys, the genre names and the digest
+    n_lemmas + 1 unsigned 64 bit offsets of each key within the keys
+    the year and the number of the genre of each group, and each year, as signed 64 bit integers
+    n_lemmas + 1 offsets of the cells of each lemma, sorted by group, and the count of each cell
+    n_groups + 1 offsets of the cells of each group, sorted by count, most frequent first, and their counts
+    n_years + 1 offsets of the year cells of each year, also sorted by count, and their counts
+    the group of each cell of a lemma, the lemma of each cell of a group and of each year cell, as unsigned 32 bit
+    integers
+    The keys, "lemma\\ttag" for each lemma, encoded in UTF-8 and sorted bytewise, the genre names separated by
+    newlines and the digest of the files counted
+
+so the counts of a lemma across years are a slice of the cells of the lemma, and the top K lemmas of a year, or a
+year and a genre, are the first K cells of the year or group. Cells with the same count are sorted by key. Building
+a cube requires numpy, but reading one does not.
+"""
+
+from bisect import bisect_left
+import mmap
+import os
+import struct
+import sys
+
+from .freqindex import encode_key
+
+MAGIC = b"LEMCUBE1"
+HEADER = struct.Struct("<8s9Q")
+
+# number of cells added to a CubeBuilder before they are merged
+buffer_size = 1 << 22
+
+
+def layout(n_lemmas, n_groups, n_years, n_cells, n_year_cells):
+    """
+    Function to get the name, type and length of each array in a cube, in the order in which they are stored
+    """
+    return [
+        ("key_offsets", "Q", n_lemmas + 1),
+        ("group_years", "q", n_groups),
+        ("group_genres", "q", n_groups),
+        ("years", "q", n_years),
+        ("lemma_offsets", "Q", n_lemmas + 1),
+        ("lemma_counts", "q", n_cells),
+        ("group_offsets", "Q", n_groups + 1),
+        ("group_counts", "q", n_cells),
+        ("year_offsets", "Q", n_years + 1),
+        ("year_counts", "q", n_year_cells),
+        ("lemma_groups", "I", n_cells),
+        ("group_lemmas", "I", n_cells),
+        ("year_lemmas", "I", n_year_cells),
+    ]
+
+
+class CubeBuilder:
+    """
+    Sparse counts of lemmas by year and genre, kept as numpy arrays of cells. Cells are added file by file and
+    merged every buffer_size cells, so only the distinct cells are kept in memory
+    """
+
+    def __init__(self):
+        import numpy
+
+        self.numpy = numpy
+        # the group of each (year, genre) pair, in the order in which they were added
+        self.groups = dict()
+        # cells with the group in the high 32 bits and the vocabulary ID in the low 32 bits of the key
+        self.keys = numpy.zeros(0, dtype=numpy.int64)
+        self.counts = numpy.zeros(0, dtype=numpy.int64)
+        self.pending_keys = []
+        self.pending_counts = []
+        self.pending = 0
+
+    def add(self, year, genre, ids, counts=None):
+        """
+        Function to add the vocabulary IDs of a file, e.g. an array('i') of the lemmas of its sentences, with the
+        year and genre of the file. If counts is given, it holds the count of each ID, and each ID occurs once
+        """
+        numpy = self.numpy
+        ids = numpy.asarray(ids, dtype=numpy.int64)
+        if counts is None:
+            ids, counts = numpy.unique(ids, return_counts=True)
+        group = self.groups.setdefault((year or 0, genre), len(self.groups))
+        self.pending_keys.append((group << 32) | ids)
+        self.pending_counts.append(numpy.asarray(counts, dtype=numpy.int64))
+        self.pending += len(ids)
+        if self.pending >= buffer_size:
+            self.merge()
+
+    def merge(self):
+        """
+        Function to merge the cells added since the last merge with the others, adding up the counts of each cell
+        """
+        numpy = self.numpy
+        if not self.pending_keys:
+            return
+        keys = numpy.concatenate([self.keys] + self.pending_keys)
+        counts = numpy.concatenate([self.counts] + self.pending_counts)
+        self.pending_keys = []
+        self.pending_counts = []
+        self.pending = 0
+        self.keys, self.counts = sum_cells(numpy, keys, counts)
+
+
+def sum_cells(numpy, keys, counts):
+    """
+    Function to add up the counts of equal keys, returns the sorted distinct keys and their counts
+    """
+    if not len(keys):
+        return keys, counts
+    order = numpy.argsort(keys, kind="stable")
+    keys = keys[order]
+    starts = numpy.flatnonzero(numpy.concatenate([[True], keys[1:] != keys[:-1]]))
+    return keys[starts], numpy.add.reduceat(counts[order], starts)
+
+
+def offsets(numpy, values, n):
+    """
+    Function to get the offset of the first cell of each of n numbers in sorted values, and the number of cells
+    """
+    return numpy.concatenate([[0], numpy.cumsum(numpy.bincount(values, minlength=n))])
+
+
+def write_cube(path, builder, vocab, digest=""):
+    """
+    Function to write the counts in a CubeBuilder to path, see the description above. The keys of the IDs are
+    looked up in vocab, and digest identifies the files counted, see YearCube.digest(). The cube is written to a
+    temporary file first, so processes using an older cube are not affected
+    """
+    numpy = builder.numpy
+    builder.merge()
+    group_of_cell = builder.keys >> 32
+    ids = builder.keys & 0xFFFFFFFF
+    counts = builder.counts
+
+    # lemmas are numbered in the order of their keys
+    lemma_ids = numpy.unique(ids)
+    keys = [encode_key(*vocab.key(i).rsplit(", ", 1)) for i in lemma_ids.tolist()]
+    key_order = sorted(range(len(keys)), key=keys.__getitem__)
+    keys = [keys[i] for i in key_order]
+    lemma_of_id = numpy.empty(len(lemma_ids), dtype=numpy.int64)
+    lemma_of_id[key_order] = numpy.arange(len(keys))
+    lemmas = lemma_of_id[numpy.searchsorted(lemma_ids, ids)]
+
+    # groups are numbered in the order of their year and genre
+    labels = sorted(builder.groups)
+    genres = sorted({genre for year, genre in labels})
+    years = sorted({year for year, genre in labels})
+    group_number = numpy.empty(len(labels), dtype=numpy.int64)
+    for number, label in enumerate(labels):
+        group_number[builder.groups[label]] = number
+    groups = group_number[group_of_cell]
+    group_years = numpy.array([year for year, genre in labels], dtype=numpy.int64)
+    group_genres = numpy.array(
+        [genres.index(genre) for year, genre in labels], dtype=numpy.int64
+    )
+
+    by_lemma = numpy.lexsort((groups, lemmas))
+    by_group = numpy.lexsort((lemmas, -counts, groups))
+    year_of_cell = numpy.searchsorted(years, group_years[groups])
+    year_keys, year_counts = sum_cells(numpy, (year_of_cell << 32) | lemmas, counts)
+    year_cells = year_keys >> 32
+    year_lemmas = year_keys & 0xFFFFFFFF
+    by_year = numpy.lexsort((year_lemmas, -year_counts, year_cells))
+
+    key_offsets = numpy.concatenate([[0], numpy.cumsum([len(key) for key in keys])])
+    arrays = {
+        "key_offsets": key_offsets,
+        "group_years": group_years,
+        "group_genres": group_genres,
+        "years": numpy.array(years, dtype=numpy.int64),
+        "lemma_offsets": offsets(numpy, lemmas, len(keys)),
+        "lemma_counts": counts[by_lemma],
+        "group_offsets": offsets(numpy, groups, len(labels)),
+        "group_counts": counts[by_group],
+        "year_offsets": offsets(numpy, year_cells, len(years)),
+        "year_counts": year_counts[by_year],
+        "lemma_groups": groups[by_lemma],
+        "group_lemmas": lemmas[by_group],
+        "year_lemmas": year_lemmas[by_year],
+    }
+    keys_blob = b"".join(keys)
+    genres_blob = "\n".join(genres).encode("utf-8")
+    digest_blob = digest.encode("utf-8")
+
+    tmp_path = path + ".tmp"
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(tmp_path, "wb") as f:
+        f.write(
+            HEADER.pack(
+                MAGIC,
+                len(keys),
+                len(labels),
+                len(years),
+                len(counts),
+                len(year_counts),
+                len(keys_blob),
+                len(genres_blob),
+                len(digest_blob),
+                0,
+            )
+        )
+        for name, typecode, length in layout(
+            len(keys), len(labels), len(years), len(counts), len(year_counts)
+        ):
+            dtype = {"Q": "<u8", "q": "<i8", "I": "<u4"}[typecode]
+            f.write(numpy.asarray(arrays[name]).astype(dtype).tobytes())
+        f.write(keys_blob)
+        f.write(genres_blob)
+        f.write(digest_blob)
+    os.replace(tmp_path, path)
+    return path
+
+
+class YearCube:
+    """
+    Queries of a cube written by write_cube()
+    """
+
+    def __init__(self, path):
+        if sys.byteorder != "little":
+            raise ValueError("Year cubes can only be read on little-endian machines")
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            self.n,
+            n_groups,
+            n_years,
+            n_cells,
+            n_year_cells,
+            keys_size,
+            genres_size,
+            digest_size,
+            reserved,
+        ) = HEADER.unpack_from(self.mm)
+        if magic != MAGIC:
+            raise ValueError("{} is not a year cube".format(path))
+        self.view = memoryview(self.mm)
+        self.arrays = dict()
+        start = HEADER.size
+        for name, typecode, length in layout(
+            self.n, n_groups, n_years, n_cells, n_year_cells
+        ):
+            size = length * struct.calcsize(typecode)
+            self.arrays[name] = self.view[start : start + size].cast(typecode)
+            start += size
+        self.keys = self.view[start : start + keys_size]
+        start += keys_size
+        genres = bytes(self.view[start : start + genres_size]).decode("utf-8")
+        self.genre_names = genres.split("\n") if genres else []
+        start += genres_size
+        self.digest_value = bytes(self.view[start : start + digest_size]).decode(
+            "utf-8"
+        )
+
+    def __len__(self):
+        return self.n
+
+    def years(self):
+        """
+        Function to get the years in the cube, in order
+        """
+        return self.arrays["years"].tolist()
+
+    def genres(self):
+        """
+        Function to get the genres in the cube, in order
+        """
+        return list(self.genre_names)
+
+    def digest(self):
+        """
+        Function to get the digest of the files the cube was built from
+        """
+        return self.digest_value
+
+    def key(self, i):
+        """
+        Function to get the key of the i-th lemma, in sorted order
+        """
+        offsets = self.arrays["key_offsets"]
+        return bytes(self.keys[offsets[i] : offsets[i + 1]])
+
+    def find(self, lemma, tag):
+        """
+        Function to get the number of a lemma with a word category, None if it is not in the cube
+        """
+        key = encode_key(lemma, tag)
+        lo, hi = 0, self.n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.n and self.key(lo) == key:
+            return lo
+        return None
+
+    def cells(self, lemma, tag):
+        """
+        Function to yield the (year, genre, count) of each year and genre in which a lemma occurs, by year and genre
+        """
+        i = self.find(lemma, tag)
+        if i is None:
+            return
+        offsets = self.arrays["lemma_offsets"]
+        groups = self.arrays["lemma_groups"]
+        counts = self.arrays["lemma_counts"]
+        for cell in range(offsets[i], offsets[i + 1]):
+            group = groups[cell]
+            yield (
+                self.arrays["group_years"][group],
+                self.genre_names[self.arrays["group_genres"][group]],
+                counts[cell],
+            )
+
+    def by_year(self, lemma, tag, genre=None):
+        """
+        Function to get the count of a lemma in each year in which it occurs, in all genres or only in genre, as a
+        dictionary ordered by year
+        """
+        counts = dict()
+        for year, cell_genre, count in self.cells(lemma, tag):
+            if genre is None or cell_genre == genre:
+                counts[year] = counts.get(year, 0) + count
+        return counts
+
+    def group(self, year, genre):
+        """
+        Function to get the number of the group of a year and genre, None if there are no counts for them
+        """
+        if genre not in self.genre_names:
+            return None
+        genre_no = self.genre_names.index(genre)
+        group_years = self.arrays["group_years"]
+        group = bisect_left(group_years, year)
+        while group < len(group_years) and group_years[group] == year:
+            if self.arrays["group_genres"][group] == genre_no:
+                return group
+            group += 1
+        return None
+
+    def top(self, year, k=10, genre=None):
+        """
+        Function to get the (lemma, tag, count) of the k most frequent lemmas of a year, in all genres or only in
+        genre, most frequent first
+        """
+        if genre is None:
+            years = self.arrays["years"]
+            i = bisect_left(years, year)
+            if i == len(years) or years[i] != year:
+                return []
+            offsets = self.arrays["year_offsets"]
+            lemmas = self.arrays["year_lemmas"]
+            counts = self.arrays["year_counts"]
+        else:
+            i = self.group(year, genre)
+            if i is None:
+                return []
+            offsets = self.arrays["group_offsets"]
+            lemmas = self.arrays["group_lemmas"]
+            counts = self.arrays["group_counts"]
+        top = []
+        for cell in range(offsets[i], min(offsets[i] + k, offsets[i + 1])):
+            lemma, tag = self.key(lemmas[cell]).decode("utf-8").rsplit("\t", 1)
+            top.append((lemma, tag, counts[cell]))
+        return top
+
+    def close(self):
+        for array in self.arrays.values():
+            array.release()
+        self.keys.release()
+        self.view.release()
+        self.mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
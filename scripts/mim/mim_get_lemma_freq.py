@@ -17,18 +17,28 @@ separated by a tab:
     A tuple containing the lemma, its word category (along with its grammatical gender if the lemma in question is a noun) and the lemma's frequency
     in the MÍM corpus, IcePaHC and the Gigaword Corpus.
     A frequency vector, showing each lemma's frequency in the MÍM corpus, IcePaHC and the Gigaword Corpus, in the order in which the lemma appears in the corpus.
+    If frequency_measures is set, a vector of each lemma's frequency per million words, on the Zipf scale and on a log scale
+    in each corpus, see lemmafreq/measures.py
 
 """
 
-import xml.etree.ElementTree
-from collections import Counter
-import csv
 import sys
 import os
 import glob
-import json
-import requests
-import string
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from lemmafreq import instrument
+from lemmafreq.corpora import (
+    giga_sentences,
+    mim_sentences,
+    read_mim_file_list,
+    tag_and_lemmatize,
+    tagged_lemmas,
+)
+from lemmafreq.countstore import CountStore
+from lemmafreq.taggers import backend_identity, get_tagger
+from lemmafreq.vocab import Counts, Vocabulary
+from lemmafreq.writers import open_sentence_writer
 
 basedir = "/Users/torunnarnardottir/Vinna/MIM/"
 file_list = "{}fileList.txt".format(basedir)
@@ -37,6 +47,10 @@ icepahc_file_list = [
     os.path.abspath(filename)
     for filename in glob.iglob("/Users/torunnarnardottir/Vinna/icepahc-v0.9/txt/**")
 ]
+# Tagger used for IcePaHC: "http" calls the malvinnsla API, "local" tags in-process (see lemmafreq/taggers.py)
+tagger_backend = "http"
+# Cache of tagged IcePaHC lines, shared between the scripts. Set to None to tag every line on each run.
+tag_cache = "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/tag_cache.sqlite"
 giga_file_list = [
     os.path.abspath(filename)
     for filename in glob.glob(
@@ -44,186 +58,140 @@ giga_file_list = [
     )
 ]
 
+# Output written as tab separated text, compressed if the name ends in .gz or .zst (requires the optional zstandard
+# package), or as a Parquet file if the name ends in .parquet (requires pyarrow, see lemmafreq/writers.py)
 output_file = "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/mim_full_freq.tsv"
+# Threads used to compress output ending in .zst, 0 to compress in the thread writing the output
+compression_threads = 0
+# Directory where the counts of each corpus are stored
+counts_dir = "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/counts/"
+# Versions of the corpora. The counts of a corpus are kept in counts_dir until its version or files change.
+icepahc_version = "icepahc-v0.9"
+mim_version = "MIM"
+giga_version = "rmh"
+# Add the frequency measures of each lemma to the output (requires numpy, see lemmafreq/measures.py)
+frequency_measures = False
+# Seconds between the progress lines of each stage of the run, None to record nothing (see lemmafreq/instrument.py)
+instrument_interval = None
+
+# IDs of the (lemma, tag) pairs in all corpora, see lemmafreq/vocab.py
+vocab = Vocabulary()
+
+
+def text_sentences(teifile):
+    """
+    Function to extract sentences from tei xml file in the MÍM corpus. Yields the sentence number,
+    the tokens of the sentence and an array with the vocabulary ID of each word in the sentence
+    """
+    for sent_no, text, lemmas, simple_lemmas in mim_sentences(teifile):
+        yield sent_no, text, vocab.intern_all(lemmas)
 
 
-# XML namespace
-ns = {"tei": "http://www.tei-c.org/ns/1.0"}
-
-
-def text_words(teifile, genre, year, author_year, author_sex, token_list, text_list):
+def text_ids(teifile):
     """
-    Function to extract lemma occurences from tei xml file in the MÍM corpus
+    Function to extract the vocabulary IDs of lemma occurences from tei xml file in the MÍM corpus
     """
-    root = xml.etree.ElementTree.parse(teifile).getroot()
-    for sent in root.findall(".//tei:s", ns):
-        sent_info = ":".join(
-            [teifile, sent.get("n"), genre, year, author_year, author_sex]
-        )
-        token_list[sent_info] = []
-        text_list[sent_info] = []
-        for aword in sent:
-            text_list[sent_info].append(aword.text)
-            if aword.get("type") != "punctuation":
-                lemma = aword.get("lemma")
-                tag = aword.get("type")
-
-                # if noun, include gender with tag
-                if tag[0] == "n":
-                    tag = tag[:2]
-                else:
-                    tag = tag[0]
+    for sent_no, text, ids in text_sentences(teifile):
+        yield from ids
 
-                token_list[sent_info].append((tag, lemma))
 
-                yield "{}{}{}".format(lemma, ", ", tag)
+def giga_text_ids(teifile):
+    """
+    Function to extract the vocabulary IDs of lemma occurences from tei xml file in the Gigaword Corpus
+    """
+    for sent_no, text, lemmas in giga_sentences(teifile):
+        yield from vocab.intern_all(lemmas)
 
 
-def giga_text_words(teifile):
+def read_file_list():
     """
-    Function to extract lemma occurences from tei xml file in the Gigaword Corpus
+    Function to read the file list included with the MÍM corpus. Yields the full path, folder and date of each text
     """
-    root = xml.etree.ElementTree.parse(teifile).getroot()
-    for sent in root.findall(".//tei:s", ns):
-        for aword in sent:
-            if aword.get("type") != "punctuation":
-                lemma = aword.get("lemma")
-                tag = aword.get("pos")
-
-                if lemma is not None and tag is not None:
+    return read_mim_file_list(file_list, basedir)
 
-                    # if noun, include gender with tag
-                    if tag[0] == "n":
-                        tag = tag[:2]
-                    else:
-                        tag = tag[0]
 
-                yield "{}{}{}".format(lemma, ", ", tag)
+def count_icepahc():
+    """
+    Function to compile frequency information from IcePaHC
+    """
+    icepahc_c = Counts(vocab)
+    for file in icepahc_file_list:
+        with open(file, "r") as input_file:
+            lines = input_file.readlines()
+        for t in tag_and_lemmatize(lines, tagger_backend, tag_cache):
+            icepahc_c.update(vocab.intern_all(tagged_lemmas(t)))
+    print(get_tagger(tagger_backend, tag_cache).stats())
+    return icepahc_c
 
 
-def tag_and_lemmatize(text):
+def count_giga():
     """
-    Calls tagging API from http://malvinnsla.arnastofnun.is/about_en
+    Function to compile frequency information from the Gigaword Corpus
     """
-    url = "http://malvinnsla.arnastofnun.is"
-    payload = {"text": text, "lemma": "on"}
-    headers = {}
-    try:
-        res = requests.post(url, data=payload, headers=headers)
-        tagged = json.loads(res.text)
-    except ConnectionError as exception:
-        print(exception)
-        print("\n\n")
-    return tagged
+    giga_c = Counts(vocab)
+    for file in sorted(giga_file_list):
+        giga_c.update(giga_text_ids(file))
+    return giga_c
 
 
-def clean_tagged_output(tagged_text, delimiter):
+def count_mim():
     """
-    Filter out relevant data from the tagging and lemmatizing step
+    Function to compile frequency information from the MÍM corpus
     """
-    for paragraph in tagged_text.values():
-        for sentences in paragraph:
-            sentences = dict(sentences)
-        # Looping through tagged output to get to words
-        for sentence in sentences.values():
-            for sent in sentence:
-                for word in sent:
-                    if word["word"] not in string.punctuation:
-                        tag = word["tag"]
-                        lemma = word["lemma"]
-                        # if noun, include gender with tag
-                        if tag[0] == "n":
-                            tag = tag[:2]
-                        else:
-                            tag = tag[0]
-
-                        yield "{}{}{}".format(lemma, delimiter, tag)
+    c = Counts(vocab)
+    for full_fname, folder, year in read_file_list():
+        # update counter with words from the current text
+        c.update(text_ids(full_fname))
+    return c
 
 
 def compile_full_frequency(output_file):
     """
     Function for compiling frequency information from MIM files and returning it in a file in the following format:
     testID\tsentenceID\tSentence number in text\tSentence text\tTuple with each word's lemma, tag and frequency\tFrequency vector
+
+    The corpora are counted first and the counts stored in counts_dir, then the MÍM corpus is read again
+    and each sentence written with the final counts, so only one sentence is kept in memory at a time.
+    Counts already in counts_dir are reused if the files of the corpus have not changed.
     """
-    # counter object that updates frequencies for lemmas file by file
-    c = Counter()
-    icepahc_c = Counter()
-    giga_c = Counter()
-    token_list = dict()
-    text_list = dict()
-
-    with open(output_file, "w") as output_file:
-        print("Compiling frequency information from IcePaHC...")
-        # compile frequency information from IcePaHC
-        for file in icepahc_file_list:
-            with open(file, "r") as input_file:
-                for line in input_file:
-                    t = tag_and_lemmatize(line)
-                    icepahc_c.update(clean_tagged_output(t, ", "))
-        print("Compiling frequency information from the Gigaword Corpus...")
-        # compile frequency information from the Gigaword Corpus
-        for file in sorted(giga_file_list):
-            with open(file, "r"):
-                giga_c.update(giga_text_words(file))
-        with open(file_list) as f:
-            print("Compiling frequency information from the MÍM corpus...")
-            reader = csv.DictReader(f, delimiter="\t")
-            for text_count, item in enumerate(reader):
-                folder = item["Folder"]
-                fname = item["File Name"]
-                full_fname = "{}{}/{}".format(basedir, folder, fname)
-                year = item["Date"]
-                author_year = ""
-                author_sex = ""
-                # update counter with words from the current text
-                c.update(
-                    (
-                        text_words(
-                            full_fname,
-                            folder,
-                            year,
-                            author_year,
-                            author_sex,
-                            token_list,
-                            text_list,
-                        )
-                    )
-                )
+    store = CountStore(counts_dir)
+
+    print("Compiling frequency information from IcePaHC...")
+    icepahc_c = store.load_or_count(
+        "icepahc",
+        icepahc_file_list,
+        count_icepahc,
+        icepahc_version + ":" + backend_identity(tagger_backend),
+        vocab,
+    )
 
-            for sent_info in token_list:
-                text_id = "/".join(sent_info.split(":")[0].split("/")[-2:])
-                sent_id = ".".join(
-                    [
-                        "/".join(text_id.split("/")[-2:]).split(".")[0],
-                        sent_info.split(":")[1],
-                    ]
-                )
-                sent_no = sent_info.split(":")[1]
-                genre = sent_info.split(":")[2]
-                year = sent_info.split(":")[3]
-                author_year = sent_info.split(":")[4]
-                author_sex = sent_info.split(":")[5]
-                tup = []
-                vector = []
-                for word in token_list[sent_info]:
-                    lemma_tuple = str(word[1]) + ", " + str(word[0])
-                    output_tuple = (
-                        lemma_tuple,
-                        c[lemma_tuple],
-                        icepahc_c[lemma_tuple],
-                        giga_c[lemma_tuple],
-                    )
-                    tup.append(str(output_tuple))
-                    vector.append(
-                        str(
-                            (
-                                c[lemma_tuple],
-                                icepahc_c[lemma_tuple],
-                                giga_c[lemma_tuple],
-                            )
-                        )
-                    )
-                output = [
+    print("Compiling frequency information from the Gigaword Corpus...")
+    giga_c = store.load_or_count(
+        "giga", giga_file_list, count_giga, giga_version, vocab
+    )
+
+    print("Compiling frequency information from the MÍM corpus...")
+    mim_files = [full_fname for full_fname, folder, year in read_file_list()]
+    c = store.load_or_count(
+        "mim", [file_list] + mim_files, count_mim, mim_version, vocab
+    )
+
+    with instrument.stage("write mim"), open_sentence_writer(
+        output_file,
+        vocab,
+        ("mim", "icepahc", "giga"),
+        compression_threads,
+        counters=(c, icepahc_c, giga_c),
+        measures=frequency_measures,
+    ) as out:
+        for full_fname, folder, year in read_file_list():
+            text_id = "/".join(full_fname.split("/")[-2:])
+            genre = folder
+            author_year = ""
+            author_sex = ""
+            for sent_no, text, ids in text_sentences(full_fname):
+                sent_id = ".".join([text_id.split(".")[0], sent_no])
+                out.write(
                     text_id,
                     sent_id,
                     sent_no,
@@ -231,12 +199,12 @@ def compile_full_frequency(output_file):
                     year,
                     author_year,
                     author_sex,
-                    " ".join(text_list[sent_info]),
-                    " ".join(tup),
-                    " ".join(vector),
-                ]
-                output_file.write("\t".join(output))
-                output_file.write("\n")
+                    " ".join(text),
+                    ids,
+                )
 
 
-compile_full_frequency(output_file)
+if __name__ == "__main__":
+    if instrument_interval is not None:
+        instrument.enable(instrument_interval)
+    compile_full_frequency(output_file)
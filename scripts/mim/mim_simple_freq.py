@@ -7,15 +7,31 @@ the following information:
     Lemma
     Word category, including the gender if the lemma in question is a noun
     The lemma's frequency
+    If frequency_measures is set, the lemma's frequency per million words, on the Zipf scale and on a log scale
+
+The files can be counted in parallel with --workers N. The output is the same for any number of workers.
+
+With --incremental, the counts of each file are kept in checkpoint_file, and only files which have been added or
+changed since the last run are counted. The counts of files which have been removed are dropped. The output is the
+same as that of a full run.
+
+With --top K, only the K most frequent lemmas are written. Lemmas with the same frequency are sorted by lemma, so
+the output is the same on every run.
 
 """
 
 from collections import Counter
-import xml.etree.ElementTree
-import csv
+import os
 import sys
-import operator
-import re
+import argparse
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from lemmafreq import instrument
+from lemmafreq.corpora import mim_sentences, read_mim_file_list
+from lemmafreq.parallel import count_files
+from lemmafreq.checkpoint import Checkpoint
+from lemmafreq.freqlist import write_freq_list
 
 # Directory where MIM is stored. This directory contains
 # a fileList.txt file that is provided with the corpus and
@@ -25,59 +41,100 @@ file_list = "{}fileList.txt".format(basedir)
 
 # Path of output file
 output_file = "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/mim_simple_freq.tsv"
-
-# XML namespace
-ns = {"tei": "http://www.tei-c.org/ns/1.0"}
+# Counts of each file, kept between runs with --incremental
+checkpoint_file = "/Users/torunnarnardottir/Vinna/LemmaFrequency/output/counts/mim_simple_checkpoint.sqlite"
+# Add the frequency measures of each lemma to the output (requires numpy, see lemmafreq/measures.py)
+frequency_measures = False
+# Seconds between the progress lines of each stage of the run, None to record nothing (see lemmafreq/instrument.py)
+instrument_interval = None
 
 
 def text_words(teifile):
     """
     Function to extract lemma occurances from tei xml file
     """
-    root = xml.etree.ElementTree.parse(teifile).getroot()
-    for aword in root.findall(".//tei:w", ns):
-        lemma = aword.get("lemma")
-        tag = aword.get("type")
-
-        # handling for a unicode character in the MÍM files
-        if lemma != " ":
-            # if noun, include gender with tag
-            if tag[0] == "n":
-                tag = tag[:2]
-            else:
-                tag = tag[0]
-
+    for sent_no, text, lemmas, simple_lemmas in mim_sentences(teifile):
+        for lemma, tag in simple_lemmas:
             yield "{}\t{}".format(lemma, tag)
 
 
-# counter object that updates frequencies for lemmas file by file
-c = Counter()
-
-with open(file_list) as f:
-    # the file list included with the corpus is tab delimited
-    reader = csv.DictReader(f, delimiter="\t")
-
-    for text_count, item in enumerate(reader):
-        folder = item["Folder"]
-        fname = item["File Name"]
-        full_fname = "{}{}/{}".format(basedir, folder, fname)
+def count_file(teifile):
+    """
+    Function to count lemma occurances in a tei xml file, returns a list of (lemma and tag, count) pairs
+    """
+    return list(Counter(text_words(teifile)).items())
 
-        # update counter with words from the current text
-        c.update((text_words(full_fname)))
 
-        # display progress
-        sys.stdout.write("\rTexts processed: {}".format(text_count))
-        sys.stdout.flush()
+def read_file_list():
+    """
+    Function to get the paths of the files in the MÍM corpus from the file list included with the corpus
+    """
+    return [
+        full_fname
+        for full_fname, folder, date in read_mim_file_list(file_list, basedir)
+    ]
 
-# finally, write blank line because of flush.
-print()
 
-# sort frequency list in reverse order by counts (most frequent first)
-sorted_words = reversed(sorted(c.items(), key=operator.itemgetter(1)))
+def count_texts(files, workers=1, incremental=False, progress=None):
+    """
+    Function to count lemma occurances in files with workers processes. If incremental is set, only the files added
+    or changed since the last incremental run are counted and the counts of each file are kept in checkpoint_file.
+    Otherwise progress is called with the number of files counted so far, see count_files(). Returns the counter
+    and the number of files counted
+    """
+    if incremental:
+        checkpoint = Checkpoint(checkpoint_file)
+        counted = checkpoint.update_counts(files, count_file, workers=workers)
+        return checkpoint.totals(files), counted
+    c = count_files(text_words, files, workers=workers, progress=progress)
+    return c, len(files)
 
-# make tab formatted entries for output file
-allwords = ["{}\t{}".format(x[0], x[1]) for x in sorted_words]
 
-# write output to file
-with open(output_file, "w") as f:
-    f.write("\n".join(allwords))
+def show_progress(text_count):
+    """
+    Function to display the number of texts processed
+    """
+    sys.stdout.write("\rTexts processed: {}".format(text_count))
+    sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--workers", type=int, default=1, help="number of processes to count with"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only count files added or changed since the last incremental run",
+    )
+    parser.add_argument(
+        "--top", type=int, help="only write the TOP most frequent lemmas"
+    )
+    args = parser.parse_args()
+    if instrument_interval is not None:
+        instrument.enable(instrument_interval)
+
+    full_fnames = read_file_list()
+
+    start = time.time()
+    # counter object with the frequencies of lemmas in all texts
+    with instrument.stage("count mim"):
+        c, counted = count_texts(
+            full_fnames, args.workers, args.incremental, progress=show_progress
+        )
+        if not args.incremental:
+            # finally, write blank line because of flush.
+            print()
+    elapsed = time.time() - start
+
+    print(
+        "Processed {} of {} texts in {:.1f} seconds with {} worker(s)".format(
+            counted, len(full_fnames), elapsed, args.workers
+        )
+    )
+
+    # write the frequency list, most frequent first
+    write_freq_list(
+        c, output_file, top=args.top, measures=frequency_measures, corpus="mim"
+    )
@@ -0,0 +1,127 @@
+"""
+Shared fixtures for the tests. The scripts are loaded from their files with load_script(), so each test gets its
+own copy of the module-level configuration and vocabulary, and the configuration can be pointed at the small
+corpora in tests/data.
+"""
+
+import importlib.util
+import os
+import shutil
+import sys
+
+import pytest
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+sys.path.insert(0, os.path.join(root, "scripts"))
+sys.path.insert(0, os.path.join(root, "benchmarks"))
+
+from lemmafreq import taggers
+from malvinnsla_standin import tag_text
+
+
+class StandinTagger(taggers.Tagger):
+    """
+    Tagger which tags each line in-process as the stand-in for the malvinnsla API does
+    """
+
+    def tag_batch(self, texts):
+        return [tag_text(text) for text in texts]
+
+
+def load_script(path, **config):
+    """
+    Function to load a script from its path relative to the scripts directory as a new module, with the
+    module-level configuration in config replacing that of the script
+    """
+    name = "_test_" + os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(root, "scripts", path)
+    )
+    module = importlib.util.module_from_spec(spec)
+    # registered so the functions of the script can be sent to worker processes
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    for key, value in config.items():
+        setattr(module, key, value)
+    return module
+
+
+@pytest.fixture
+def giga_dir():
+    """
+    The small Gigaword corpus in tests/data/rmh, with three files in two genres, one of them without a date
+    """
+    return os.path.join(data_dir, "rmh") + "/"
+
+
+@pytest.fixture
+def giga_files(giga_dir):
+    files = []
+    for directory, subdirectories, names in os.walk(giga_dir):
+        files.extend(os.path.join(directory, name) for name in names)
+    return sorted(files)
+
+
+@pytest.fixture
+def giga_config(tmp_path, giga_dir, giga_files, mim_dir):
+    """
+    Configuration of giga_get_lemma_freq.py with the small Gigaword and MÍM corpora, no IcePaHC and all output in
+    tmp_path
+    """
+    return dict(
+        basedir=giga_dir,
+        file_list=giga_files,
+        icepahc_file_list=[],
+        tag_cache=None,
+        mim_basedir=mim_dir,
+        mim_file_list=mim_dir + "fileList.txt",
+        output_file=str(tmp_path / "giga_full_freq.tsv"),
+        counts_dir=str(tmp_path / "counts") + "/",
+        checkpoint_file=str(tmp_path / "counts" / "giga_checkpoint.sqlite"),
+        shard_dir=str(tmp_path / "shards") + "/",
+        year_cube=str(tmp_path / "giga_year_cube.bin"),
+    )
+
+
+@pytest.fixture
+def giga(giga_config):
+    """
+    giga_get_lemma_freq.py loaded with giga_config
+    """
+    return load_script("gigaword/giga_get_lemma_freq.py", **giga_config)
+
+
+@pytest.fixture
+def mim_dir():
+    """
+    The small MÍM corpus in tests/data/MIM, with two texts in two folders and their file list. One word has a
+    blank lemma, which is counted in the per-sentence output but not in the simple frequency list
+    """
+    return os.path.join(data_dir, "MIM") + "/"
+
+
+@pytest.fixture
+def icepahc_dir(tmp_path):
+    """
+    A copy of the small IcePaHC corpus in tests/data/icepahc, with two texts, which the tests can change. Returns
+    the txt directory, as basedir in the IcePaHC scripts
+    """
+    shutil.copytree(os.path.join(data_dir, "icepahc"), str(tmp_path / "icepahc"))
+    return str(tmp_path / "icepahc" / "txt") + "/"
+
+
+@pytest.fixture
+def icepahc_files(icepahc_dir):
+    return sorted(os.listdir(icepahc_dir))
+
+
+@pytest.fixture
+def standin_tagger(monkeypatch):
+    """
+    Makes get_tagger() return a StandinTagger for every backend, so IcePaHC can be tagged without the API
+    """
+    monkeypatch.setattr(taggers, "make_tagger", lambda backend="http": StandinTagger())
+    taggers.get_tagger.cache_clear()
+    yield
+    taggers.get_tagger.cache_clear()
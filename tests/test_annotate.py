@@ -0,0 +1,100 @@
+"""
+Tests of the Annotator in lemmafreq/annotate.py, whose output must be the same as that of annotate_tokens(), the
+per-token formatting the writers use without numpy
+"""
+
+import pytest
+
+from lemmafreq.annotate import Annotator, annotate_tokens
+from lemmafreq.vocab import Counts, Vocabulary
+
+pytest.importorskip("numpy")
+
+# keys which repr() escapes or quotes differently, and keys which it does not change
+lemmas = [
+    ("hestur", "nken"),
+    ("it's", "x"),
+    ('"gæsalappir"', "nvfn"),
+    ("a\\b", "e"),
+    ("bæði ' og \"", "c"),
+    ("tab\tinn", "e"),
+    ("🐎", "e"),
+    (None, "pl"),
+    ("", "pl"),
+]
+
+
+def make_counts(vocab, scales):
+    """
+    Function to count the IDs of the vocabulary in a corpus for each scale, with large and zero counts
+    """
+    counters = []
+    for scale in scales:
+        c = Counts(vocab)
+        for i in range(len(vocab)):
+            c[i] = (i * scale) % 7 * 2**33 + i * scale
+        counters.append(c)
+    return counters
+
+
+def make_sentences(n_ids):
+    sentences = []
+    for n in range(40):
+        sentences.append([(n * 5 + k * 3) % n_ids for k in range(n % 6)])
+    return sentences
+
+
+def by_token(vocab, counters, sentences):
+    return [
+        list(annotate_tokens(vocab, ids, [c.lookup(ids) for c in counters]))
+        for ids in sentences
+    ]
+
+
+def assert_same_bytes(annotated, expected):
+    assert [[s.encode("utf-8") for s in row] for row in annotated] == [
+        [s.encode("utf-8") for s in row] for row in expected
+    ]
+
+
+@pytest.mark.parametrize("scales", [(1,), (1, 3), (1, 7, 3)])
+def test_annotate_is_annotate_tokens(scales):
+    vocab = Vocabulary()
+    for lemma, tag in lemmas:
+        vocab.intern(lemma, tag)
+    counters = make_counts(vocab, scales)
+    sentences = make_sentences(len(vocab))
+    annotator = Annotator(vocab, counters)
+
+    # in several batches, so IDs formatted in one batch are reused in the next
+    annotated = []
+    for i in range(0, len(sentences), 16):
+        annotated.extend(annotator.annotate(sentences[i : i + 16]))
+
+    assert_same_bytes(annotated, by_token(vocab, counters, sentences))
+    assert ["", ""] in annotated
+
+
+@pytest.mark.parametrize("scales", [(1,), (1, 7, 3)])
+def test_ids_added_after_the_annotator_have_no_counts(scales):
+    vocab = Vocabulary()
+    for lemma, tag in lemmas[:3]:
+        vocab.intern(lemma, tag)
+    counters = make_counts(vocab, scales)
+    annotator = Annotator(vocab, counters)
+    before = make_sentences(len(vocab))
+    annotated = annotator.annotate(before)
+
+    # enough new IDs to grow the matrix more than once
+    for batch in range(3):
+        for lemma, tag in lemmas[3:]:
+            vocab.intern("{}{}".format(lemma, batch), tag)
+        # the IDs just added, and IDs from before
+        sentences = make_sentences(len(vocab)) + [[len(vocab) - 1, 1]]
+        annotated += annotator.annotate(sentences)
+        before += sentences
+
+    assert_same_bytes(annotated, by_token(vocab, counters, before))
+    assert annotated[-1][0] == "('2, pl'{}) (\"it's, x\"{})".format(
+        ", 0" * len(scales), "".join(", {}".format(c[1]) for c in counters)
+    )
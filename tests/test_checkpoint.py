@@ -0,0 +1,118 @@
+"""
+Tests of the Checkpoint in lemmafreq/checkpoint.py, and of resuming the full output of giga_get_lemma_freq.py from
+it, which must give the same counts and output as an uninterrupted run
+"""
+
+from collections import Counter
+import os
+import shutil
+
+from lemmafreq.checkpoint import Checkpoint
+from lemmafreq.tei import iter_sentences
+from lemmafreq.vocab import Vocabulary
+
+
+class CountFile:
+    """
+    Count function for update_counts() which counts the words of a file and records the files counted
+    """
+
+    def __init__(self):
+        self.files = []
+
+    def __call__(self, file):
+        self.files.append(file)
+        with open(file, encoding="utf-8") as f:
+            return list(Counter(words(f.read())).items())
+
+
+def words(text):
+    # each word as the key of a lemma, as the scripts count them
+    return ["{}, w".format(word) for word in text.split()]
+
+
+def one_pass(files):
+    c = Counter()
+    for file in files:
+        with open(file, encoding="utf-8") as f:
+            c.update(words(f.read()))
+    return c
+
+
+def test_only_new_and_changed_files_are_counted(tmp_path, giga_files):
+    files = []
+    for n, file in enumerate(giga_files):
+        files.append(str(tmp_path / "file{}.xml".format(n)))
+        shutil.copy(file, files[-1])
+    path = str(tmp_path / "checkpoint.sqlite")
+    count_file = CountFile()
+
+    assert Checkpoint(path).update_counts(files[:2], count_file) == 2
+    checkpoint = Checkpoint(path)
+    with open(files[0], "a", encoding="utf-8") as f:
+        f.write("\n")
+    # a file which is touched but not changed is not counted again
+    stat = os.stat(files[1])
+    os.utime(files[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert checkpoint.update_counts(files, count_file) == 2
+    assert count_file.files == files[:2] + [files[0], files[2]]
+    assert checkpoint.update_counts(files, count_file) == 0
+    assert checkpoint.totals(files) == one_pass(files)
+    assert list(checkpoint.totals(files).items()) == list(one_pass(files).items())
+    vocab = Vocabulary()
+    assert list(checkpoint.totals(files, vocab).items()) == list(
+        one_pass(files).items()
+    )
+
+
+def test_counts_of_another_version_or_removed_files_are_dropped(tmp_path, giga_files):
+    path = str(tmp_path / "checkpoint.sqlite")
+    count_file = CountFile()
+    Checkpoint(path, "v1").update_counts(giga_files, count_file)
+
+    checkpoint = Checkpoint(path, "v1")
+    checkpoint.update_counts(giga_files[1:], count_file)
+    assert checkpoint.totals(giga_files[1:]) == one_pass(giga_files[1:])
+    assert len(list(checkpoint.db.execute("SELECT path FROM files"))) == 2
+
+    assert Checkpoint(path, "v2").update_counts(giga_files, count_file) == 3
+
+
+def test_output_position_is_kept_for_the_same_digest(tmp_path):
+    output = tmp_path / "out.tsv"
+    output.write_text("0123456789")
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.sqlite"))
+
+    assert checkpoint.output_position(str(output), "a") == (0, 0)
+    checkpoint.save_output_position(str(output), "a", 2, 6)
+    assert checkpoint.output_position(str(output), "a") == (2, 6)
+    assert checkpoint.output_position(str(output), "b") == (0, 0)
+    output.write_text("0123")
+    assert checkpoint.output_position(str(output), "a") == (0, 0)
+
+
+def test_interrupted_output_is_resumed_after_the_last_file_written(
+    giga, giga_files, capsys
+):
+    giga.compile_full_frequency(giga.output_file)
+    with open(giga.output_file, "rb") as f:
+        complete = f.read()
+
+    # as if the run had stopped partway through the second file, after the position of the first was saved
+    first_rows = len(list(iter_sentences(giga_files[0])))
+    offset = len(b"".join(complete.splitlines(keepends=True)[:first_rows]))
+    with open(giga.output_file, "wb") as f:
+        f.write(complete[:offset] + b"unfinished row\t")
+    checkpoint = giga.Checkpoint(giga.checkpoint_file, giga.giga_version)
+    digest = checkpoint.db.execute("SELECT digest FROM outputs").fetchone()[0]
+    checkpoint.save_output_position(giga.output_file, digest, 1, offset)
+    capsys.readouterr()
+
+    giga.compile_full_frequency(giga.output_file)
+
+    assert (
+        "Resuming {} after 1 files".format(giga.output_file) in capsys.readouterr().out
+    )
+    with open(giga.output_file, "rb") as f:
+        assert f.read() == complete
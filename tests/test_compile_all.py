@@ -0,0 +1,143 @@
+"""
+Tests of compile_all.py, which must write the same output as the scripts of each corpus, since it counts the
+corpora with the same functions from lemmafreq/corpora.py
+"""
+
+import os
+
+import pytest
+
+from conftest import load_script
+from lemmafreq.freqlist import write_freq_list
+
+
+def read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@pytest.fixture
+def corpora(icepahc_dir, icepahc_files, mim_dir, giga_dir, giga_files):
+    """
+    Configuration of the corpora shared by compile_all.py and the scripts of each corpus
+    """
+    return dict(
+        icepahc_dir=icepahc_dir,
+        icepahc_files=icepahc_files,
+        mim_dir=mim_dir,
+        mim_file_list=mim_dir + "fileList.txt",
+        giga_dir=giga_dir,
+        giga_files=giga_files,
+    )
+
+
+@pytest.fixture
+def compiled(tmp_path, corpora, standin_tagger):
+    """
+    The output directory of compile_all.py, run with the simple, full, genre and cube outputs
+    """
+    output_dir = str(tmp_path / "compile_all") + "/"
+    os.makedirs(output_dir)
+    compile_all = load_script(
+        "compile_all.py",
+        icepahc_basedir=corpora["icepahc_dir"],
+        mim_basedir=corpora["mim_dir"],
+        mim_file_list=corpora["mim_file_list"],
+        giga_basedir=corpora["giga_dir"],
+        giga_file_list=corpora["giga_files"],
+        tag_cache=None,
+        output_dir=output_dir,
+        counts_dir=str(tmp_path / "compile_all_counts") + "/",
+        index_file=None,
+        sentence_store=None,
+    )
+    compile_all.compile_all(("simple", "full", "genre", "cube"))
+    return output_dir
+
+
+@pytest.fixture
+def separate(tmp_path, corpora, standin_tagger):
+    """
+    The output directory of the scripts of each corpus, run with the same corpora
+    """
+    output_dir = str(tmp_path / "separate") + "/"
+    os.makedirs(output_dir + "giga_genre_freq")
+    icepahc_paths = [corpora["icepahc_dir"] + file for file in corpora["icepahc_files"]]
+
+    icepahc_simple = load_script(
+        "icepahc/icepahc_simple_freq.py", basedir=corpora["icepahc_dir"], tag_cache=None
+    )
+    write_freq_list(
+        icepahc_simple.count_texts(corpora["icepahc_files"]),
+        output_dir + "icepahc_simple_freq.tsv",
+        corpus="icepahc",
+    )
+    mim_simple = load_script(
+        "mim/mim_simple_freq.py",
+        basedir=corpora["mim_dir"],
+        file_list=corpora["mim_file_list"],
+    )
+    c, counted = mim_simple.count_texts(mim_simple.read_file_list())
+    write_freq_list(c, output_dir + "mim_simple_freq.tsv", corpus="mim")
+    giga_simple = load_script("gigaword/giga_simple_freq.py")
+    c, counted = giga_simple.count_texts(corpora["giga_files"])
+    write_freq_list(c, output_dir + "giga_simple_freq.tsv", corpus="giga")
+
+    icepahc = load_script(
+        "icepahc/icepahc_get_lemma_freq.py",
+        basedir=corpora["icepahc_dir"],
+        file_list=corpora["icepahc_files"],
+        mim_basedir=corpora["mim_dir"],
+        mim_file_list=corpora["mim_file_list"],
+        giga_file_list=corpora["giga_files"],
+        tag_cache=None,
+        counts_dir=str(tmp_path / "icepahc_counts") + "/",
+        index_file=None,
+    )
+    icepahc.compile_full_freq(output_dir + "icepahc_full_freq.tsv")
+    mim = load_script(
+        "mim/mim_get_lemma_freq.py",
+        basedir=corpora["mim_dir"],
+        file_list=corpora["mim_file_list"],
+        icepahc_file_list=icepahc_paths,
+        giga_file_list=corpora["giga_files"],
+        tag_cache=None,
+        counts_dir=str(tmp_path / "mim_counts") + "/",
+    )
+    mim.compile_full_frequency(output_dir + "mim_full_freq.tsv")
+    giga = load_script(
+        "gigaword/giga_get_lemma_freq.py",
+        basedir=corpora["giga_dir"],
+        file_list=corpora["giga_files"],
+        icepahc_file_list=icepahc_paths,
+        tag_cache=None,
+        mim_basedir=corpora["mim_dir"],
+        mim_file_list=corpora["mim_file_list"],
+        counts_dir=str(tmp_path / "giga_counts") + "/",
+        checkpoint_file=str(tmp_path / "giga_counts" / "giga_checkpoint.sqlite"),
+        year_cube=output_dir + "giga_year_cube.bin",
+    )
+    # the year cube is written by compile_full_frequency(), with the same digest as compile_all.py gives it
+    giga.compile_full_frequency(output_dir + "giga_full_freq.tsv")
+    giga.compile_genre_frequency(output_dir + "giga_genre_freq/")
+    return output_dir
+
+
+def test_compile_all_writes_the_output_of_each_script(compiled, separate):
+    # the small MÍM corpus has a word with a blank lemma, which is only counted in the per-sentence output
+    names = [
+        "icepahc_simple_freq.tsv",
+        "mim_simple_freq.tsv",
+        "giga_simple_freq.tsv",
+        "icepahc_full_freq.tsv",
+        "mim_full_freq.tsv",
+        "giga_full_freq.tsv",
+        "giga_year_cube.bin",
+    ]
+    genres = sorted(os.listdir(separate + "giga_genre_freq"))
+    assert genres == ["giga_Adjud_freq.tsv", "giga_News1_freq.tsv"]
+    assert sorted(os.listdir(compiled + "giga_genre_freq")) == genres
+    names.extend("giga_genre_freq/" + genre for genre in genres)
+
+    for name in names:
+        assert read_bytes(compiled + name) == read_bytes(separate + name), name
@@ -0,0 +1,78 @@
+"""
+Tests of the CountStore in lemmafreq/countstore.py, which must only count a corpus again when its files change
+"""
+
+from collections import Counter
+import os
+
+from lemmafreq.countstore import CountStore, manifest_digest
+from lemmafreq.vocab import Vocabulary
+
+
+def make_files(tmp_path, n_files):
+    files = []
+    for n in range(n_files):
+        path = tmp_path / "corpus" / "file{}.xml".format(n)
+        path.parent.mkdir(exist_ok=True)
+        path.write_text("text {}".format(n))
+        files.append(str(path))
+    return files
+
+
+class Count:
+    """
+    Count function which records how often it is called
+    """
+
+    def __init__(self, c):
+        self.c = c
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.c
+
+
+def test_counts_are_loaded_until_the_files_change(tmp_path):
+    files = make_files(tmp_path, 3)
+    store = CountStore(str(tmp_path / "counts"))
+    count = Count(Counter({"hestur, nk": 3, "kona, nv": 1}))
+
+    assert store.load_or_count("giga", files, count, "v1") == count.c
+    assert store.load_or_count("giga", files, count, "v1") == count.c
+    assert count.calls == 1
+
+    with open(files[0], "a") as f:
+        f.write(" changed")
+    store.load_or_count("giga", files, count, "v1")
+    store.load_or_count("giga", files[1:], count, "v1")
+    store.load_or_count("giga", files[1:], count, "v2")
+    assert count.calls == 4
+    # only the latest counts of a corpus are kept
+    assert os.listdir(str(tmp_path / "counts")) == [
+        os.path.basename(store.path("giga", files[1:], "v2"))
+    ]
+
+
+def test_counts_of_each_corpus_are_kept_apart(tmp_path):
+    files = make_files(tmp_path, 2)
+    store = CountStore(str(tmp_path / "counts"))
+    store.save("giga", files, Counter({"hestur, nk": 3}))
+    store.save("mim", files, Counter({"kona, nv": 2}))
+
+    vocab = Vocabulary()
+    assert list(store.load("giga", files, vocab=vocab).items()) == [("hestur, nk", 3)]
+    assert list(store.load("mim", files, vocab=vocab).items()) == [("kona, nv", 2)]
+    assert store.load("icepahc", files) is None
+
+
+def test_the_digest_depends_on_the_files_and_not_their_order(tmp_path):
+    files = make_files(tmp_path, 3)
+    digest = manifest_digest(files, "v1")
+
+    assert manifest_digest(files[::-1], "v1") == digest
+    assert manifest_digest(files, "v2") != digest
+    assert manifest_digest(files[:2], "v1") != digest
+    stat = os.stat(files[1])
+    os.utime(files[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert manifest_digest(files, "v1") != digest
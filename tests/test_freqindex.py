@@ -0,0 +1,85 @@
+"""
+Tests of the FreqIndex in lemmafreq/freqindex.py, whose lookups must give the frequencies of the simple frequency
+list it was built from
+"""
+
+from collections import Counter
+
+import pytest
+
+from lemmafreq.freqindex import FreqIndex, build_index, index_path
+from lemmafreq.freqlist import read_freq_list, write_freq_list
+
+counts = Counter(
+    {
+        "hestur\tnk": 40,
+        "hestur\tnv": 3,
+        "hesta\tnk": 2,
+        "Ísland\tnhe-s": 12,
+        "ísland\tnhe": 1,
+        "á\tao": 25,
+        "3.5\tta": 7,
+        "\tpl": 4,
+        "😀\te": 1,
+    }
+)
+
+
+@pytest.fixture(params=[False, True], ids=["plain", "measures"])
+def index(request, tmp_path):
+    path = str(tmp_path / "giga_simple_freq.tsv")
+    write_freq_list(counts, path, measures=request.param)
+    with FreqIndex(build_index(path)) as index:
+        yield index
+
+
+def test_every_lemma_has_its_frequency(index):
+    assert len(index) == len(counts)
+    keys = [index.key(i) for i in range(len(index))]
+    assert keys == sorted(keys)
+    for key, count in counts.items():
+        assert index.get(*key.split("\t")) == count
+    assert index.get("hestur", "hk") == 0
+    assert index.get("", "") == 0
+    assert index.get("😀😀", "e") == 0
+
+
+def test_get_many_is_get_for_each_pair(index):
+    pairs = [tuple(key.split("\t")) for key in counts] + [("nei", "x"), ("", "pl")]
+    pairs = pairs[::-1] + pairs
+
+    assert index.get_many(pairs) == [index.get(lemma, tag) for lemma, tag in pairs]
+    assert index.get_many([]) == []
+
+
+def test_prefix_gives_each_word_category_of_a_lemma(index):
+    assert list(index.prefix("hestur\t")) == [
+        ("hestur", "nk", 40),
+        ("hestur", "nv", 3),
+    ]
+    assert [lemma for lemma, tag, count in index.prefix("hest")] == [
+        "hesta",
+        "hestur",
+        "hestur",
+    ]
+    assert list(index.prefix("zzz")) == []
+
+
+def test_index_is_replaced_when_built_again(tmp_path):
+    path = str(tmp_path / "mim_simple_freq.tsv")
+    write_freq_list(counts, path)
+    assert index_path(path) == str(tmp_path / "mim_simple_freq.idx")
+    with FreqIndex(build_index(path)) as old:
+        write_freq_list(Counter({"kona\tnv": 9}), path)
+        build_index(path)
+        # an index already open still reads the old file
+        assert old.get("hestur", "nk") == 40
+    with FreqIndex(index_path(path)) as new:
+        assert list(new.prefix("")) == list(read_freq_list(path))
+
+
+def test_other_files_are_not_read_as_an_index(tmp_path):
+    path = tmp_path / "giga_simple_freq.tsv"
+    path.write_bytes(b"x" * 64)
+    with pytest.raises(ValueError, match="not a frequency index"):
+        FreqIndex(str(path))
@@ -0,0 +1,137 @@
+"""
+Tests of the per-sentence output of mim_get_lemma_freq.py and icepahc_get_lemma_freq.py, which must have one row
+for each sentence in the corpus, with the counts of the whole corpora in every row
+"""
+
+from collections import Counter
+import os
+import re
+
+import pytest
+
+from conftest import load_script
+from lemmafreq.tei import iter_sentences
+
+
+def read_rows(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.rstrip("\n").split("\t") for line in f]
+
+
+def row_counts(row):
+    # the (lemma, tag) and counts in each corpus of each word in the tuple column
+    return [
+        (lemma, tuple(int(count) for count in counts))
+        for lemma, *counts in re.findall(r"\('([^']*)', (\d+), (\d+), (\d+)\)", row[8])
+    ]
+
+
+def simple_counts(path, files):
+    # counts of the lemmas in files as the simple frequency script at path counts them
+    script = load_script(path)
+    return Counter(
+        word.replace("\t", ", ") for file in files for word in script.text_words(file)
+    )
+
+
+def check_final_counts(rows, column, other_counts):
+    # each word has the count of the whole corpus in its column, not the count of the sentences read so far
+    occurences = Counter(lemma for row in rows for lemma, counts in row_counts(row))
+    for row in rows:
+        for lemma, counts in row_counts(row):
+            assert counts[column] == occurences[lemma]
+            assert [counts[i] for i in range(3) if i != column] == [
+                c[lemma] for c in other_counts
+            ]
+
+
+@pytest.fixture
+def mim(tmp_path, mim_dir, giga_files):
+    return load_script(
+        "mim/mim_get_lemma_freq.py",
+        basedir=mim_dir,
+        file_list=mim_dir + "fileList.txt",
+        icepahc_file_list=[],
+        giga_file_list=giga_files,
+        tag_cache=None,
+        output_file=str(tmp_path / "mim_full_freq.tsv"),
+        counts_dir=str(tmp_path / "counts") + "/",
+    )
+
+
+@pytest.fixture
+def icepahc(tmp_path, icepahc_dir, icepahc_files, mim_dir, giga_files, standin_tagger):
+    icepahc = load_script(
+        "icepahc/icepahc_get_lemma_freq.py",
+        basedir=icepahc_dir,
+        file_list=icepahc_files,
+        mim_basedir=mim_dir,
+        mim_file_list=mim_dir + "fileList.txt",
+        giga_file_list=giga_files,
+        tag_cache=None,
+        output_file_total=str(tmp_path / "icepahc_full_freq.tsv"),
+        counts_dir=str(tmp_path / "counts") + "/",
+        index_file=None,
+    )
+    return icepahc
+
+
+def test_mim_output_has_one_row_per_sentence_with_final_counts(
+    mim, mim_dir, giga_files
+):
+    mim.compile_full_frequency(mim.output_file)
+
+    rows = read_rows(mim.output_file)
+    files = [full_fname for full_fname, folder, year in mim.read_file_list()]
+    sentences = [
+        sent_no
+        for file in files
+        for sent_no, words in iter_sentences(file, tag_attr="type", id_attr="n")
+    ]
+    assert len(rows) == len(sentences) == 5
+    assert [row[1] for row in rows] == [
+        "blogg/blogg1.1",
+        "blogg/blogg1.2",
+        "visindavefur/visindavefur1.1",
+        "visindavefur/visindavefur1.2",
+        "visindavefur/visindavefur1.3",
+    ]
+    assert [row[4] for row in rows] == ["2008", "2008", "2006", "2006", "2006"]
+    check_final_counts(
+        rows, 0, [Counter(), simple_counts("gigaword/giga_simple_freq.py", giga_files)]
+    )
+    assert dict(row_counts(rows[0]))["hestur, nk"] == (4, 0, 4)
+
+
+def test_icepahc_output_has_one_row_per_sentence_with_final_counts(
+    icepahc, icepahc_dir, icepahc_files, mim_dir, giga_files
+):
+    icepahc.compile_full_freq(icepahc.output_file_total)
+
+    rows = read_rows(icepahc.output_file_total)
+    lines = []
+    for file in icepahc_files:
+        with open(os.path.join(icepahc_dir, file), encoding="utf-8") as f:
+            lines.extend(line.rstrip("\n") for line in f)
+    assert [row[7] for row in rows] == lines
+    assert [row[1] for row in rows] == [
+        "firstgrammar.1",
+        "firstgrammar.2",
+        "firstgrammar.3",
+        "thorlakur.11",
+        "thorlakur.12",
+    ]
+    mim_files = [
+        mim_dir + "blogg/blogg1.xml",
+        mim_dir + "visindavefur/visindavefur1.xml",
+    ]
+    check_final_counts(
+        rows,
+        0,
+        [
+            simple_counts("mim/mim_simple_freq.py", mim_files),
+            simple_counts("gigaword/giga_simple_freq.py", giga_files),
+        ],
+    )
+    assert dict(row_counts(rows[1]))["sá, s"] == (2, 0, 0)
+    assert dict(row_counts(rows[0]))["hestur, nk"] == (1, 4, 4)
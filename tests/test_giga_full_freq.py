@@ -0,0 +1,90 @@
+"""
+Tests of the per-sentence output of giga_get_lemma_freq.py, which must have exactly one row for each sentence in
+the corpus, however many files it has
+"""
+
+import pytest
+
+from lemmafreq.tei import iter_sentences
+
+
+def sentence_ids(files):
+    return [sent_id for file in files for sent_id, words in iter_sentences(file)]
+
+
+def read_rows(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.rstrip("\n").split("\t") for line in f]
+
+
+def test_full_output_has_one_row_per_sentence(giga, giga_files):
+    giga.compile_full_frequency(giga.output_file)
+
+    rows = read_rows(giga.output_file)
+    assert len(rows) == len(sentence_ids(giga_files)) == 7
+    assert [row[1] for row in rows] == [
+        file_id.split(".")[0] + "." + ".".join(file_id.split(".")[-2:])
+        for file_id in sentence_ids(giga_files)
+    ]
+
+
+def test_full_output_is_not_extended_by_a_second_run(giga, giga_files):
+    giga.compile_full_frequency(giga.output_file)
+    with open(giga.output_file, "rb") as f:
+        first = f.read()
+    giga.compile_full_frequency(giga.output_file)
+
+    with open(giga.output_file, "rb") as f:
+        assert f.read() == first
+    assert len(read_rows(giga.output_file)) == len(sentence_ids(giga_files))
+
+
+class RowRecorder:
+    """
+    Stand-in for a sentence writer which keeps the rows written to it
+    """
+
+    def __init__(self):
+        self.rows = []
+
+    def write(self, *fields_and_ids):
+        self.rows.append(fields_and_ids)
+
+
+def test_each_sentence_is_written_once_per_file(giga, giga_files):
+    # the rows written for each file, which grew with the number of files read so far before
+    out = RowRecorder()
+    for file in giga_files:
+        written = len(out.rows)
+        giga.write_sentences(out, file, giga.get_genre(file))
+        assert len(out.rows) - written == len(sentence_ids([file]))
+    assert len(out.rows) == len(sentence_ids(giga_files))
+
+
+def test_genre_output_has_one_row_per_sentence_of_the_genre(giga, giga_files, tmp_path):
+    giga.compile_genre_frequency(str(tmp_path) + "/")
+
+    for genre in ("News1", "Adjud"):
+        files = [file for file in giga_files if giga.get_genre(file) == genre]
+        rows = read_rows(str(tmp_path / "giga_{}_freq.tsv".format(genre)))
+        assert len(rows) == len(sentence_ids(files))
+        assert {row[3] for row in rows} == {genre}
+
+
+def test_genre_writers_are_closed_when_writing_fails(giga, giga_files, tmp_path):
+    write_sentences = giga.write_sentences
+
+    def failing_write_sentences(out, file, genre):
+        if genre == "News1":
+            raise OSError("No space left on device")
+        write_sentences(out, file, genre)
+
+    giga.write_sentences = failing_write_sentences
+    with pytest.raises(OSError):
+        giga.compile_genre_frequency(str(tmp_path) + "/")
+
+    # the sentences written before the failure are in the output of their genre
+    files = [file for file in giga_files if giga.get_genre(file) == "Adjud"]
+    rows = read_rows(str(tmp_path / "giga_Adjud_freq.tsv"))
+    assert len(rows) == len(sentence_ids(files))
+    assert read_rows(str(tmp_path / "giga_News1_freq.tsv")) == []
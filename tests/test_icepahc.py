@@ -0,0 +1,120 @@
+"""
+Tests of the SentenceIndex in lemmafreq/icepahc.py, which must give the same sentence IDs and metadata as reading
+the .psd and .info files, and only read the files of texts which have changed
+"""
+
+import os
+
+import pytest
+
+from lemmafreq import icepahc
+from lemmafreq.icepahc import SentenceIndex, read_info, sentence_ids, text_path
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    # the texts whose .psd file is read by the index
+    files = []
+    read = icepahc.sentence_ids
+
+    def recording_sentence_ids(basedir, file):
+        files.append(file)
+        return read(basedir, file)
+
+    monkeypatch.setattr(icepahc, "sentence_ids", recording_sentence_ids)
+    return files
+
+
+def assert_indexed(index, basedir, files):
+    assert sorted(index.texts) == sorted(files)
+    for file in files:
+        assert index.sentence_ids(file) == sentence_ids(basedir, file)
+        assert index.info(file) == read_info(text_path(basedir, file, "info", ".info"))
+        with open(basedir + file, encoding="utf-8") as f:
+            assert index.lines(file) == len(f.readlines())
+
+
+def open_index(path, basedir, files):
+    index = SentenceIndex(path, basedir, files)
+    index.close()
+    return index
+
+
+def test_index_has_the_ids_and_metadata_of_each_text(icepahc_dir, icepahc_files):
+    index = open_index(None, icepahc_dir, icepahc_files)
+
+    assert index.indexed == 2
+    assert_indexed(index, icepahc_dir, icepahc_files)
+    assert index.sentence_id("1210.thorlakur.rel-sag.txt", 1) == "thorlakur.12"
+    assert index.info("1150.firstgrammar.sci-lin.txt") == ("sci-lin", "1150", "1100")
+
+
+def test_unchanged_texts_are_not_read_again(
+    icepahc_dir, icepahc_files, tmp_path, reads
+):
+    path = str(tmp_path / "index" / "icepahc_index.sqlite")
+    open_index(path, icepahc_dir, icepahc_files)
+    assert reads == icepahc_files
+
+    del reads[:]
+    index = open_index(path, icepahc_dir, icepahc_files)
+
+    assert index.indexed == 0
+    assert reads == []
+    assert_indexed(index, icepahc_dir, icepahc_files)
+
+
+@pytest.mark.parametrize(
+    "directory, extension", [("txt", ".txt"), ("psd", ".psd"), ("info", ".info")]
+)
+def test_only_changed_texts_are_read_again(
+    icepahc_dir, icepahc_files, tmp_path, reads, directory, extension
+):
+    path = str(tmp_path / "icepahc_index.sqlite")
+    open_index(path, icepahc_dir, icepahc_files)
+    changed = "1210.thorlakur.rel-sag.txt"
+    changed_path = text_path(icepahc_dir, changed, directory, extension)
+    with open(changed_path, "a", encoding="utf-8") as f:
+        if directory == "psd":
+            f.write("( (IP-MAT (. .))\n  (ID 1210.THORLAKUR.REL-SAG,.40))\n\n")
+        elif directory == "info":
+            f.write("Genre:\tlaw\n")
+        else:
+            f.write("Og svo var það .\n")
+
+    del reads[:]
+    index = open_index(path, icepahc_dir, icepahc_files)
+
+    assert index.indexed == 1
+    assert reads == [changed]
+    assert_indexed(index, icepahc_dir, icepahc_files)
+
+
+def test_a_text_is_read_again_when_only_its_modification_time_changes(
+    icepahc_dir, icepahc_files, tmp_path, reads
+):
+    path = str(tmp_path / "icepahc_index.sqlite")
+    open_index(path, icepahc_dir, icepahc_files)
+    psd_path = text_path(icepahc_dir, icepahc_files[0], "psd", ".psd")
+    stat = os.stat(psd_path)
+    os.utime(psd_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    del reads[:]
+    index = open_index(path, icepahc_dir, icepahc_files)
+
+    assert index.indexed == 1
+    assert reads == [icepahc_files[0]]
+
+
+def test_texts_which_are_not_listed_are_removed(
+    icepahc_dir, icepahc_files, tmp_path, reads
+):
+    path = str(tmp_path / "icepahc_index.sqlite")
+    open_index(path, icepahc_dir, icepahc_files)
+
+    del reads[:]
+    index = open_index(path, icepahc_dir, icepahc_files[1:])
+
+    assert index.indexed == 0
+    assert reads == []
+    assert_indexed(index, icepahc_dir, icepahc_files[1:])
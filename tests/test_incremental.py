@@ -0,0 +1,99 @@
+"""
+Tests of the --incremental mode of giga_simple_freq.py and mim_simple_freq.py, which must write the same frequency
+list as a full run of the same files after files have been added or removed
+"""
+
+import os
+import shutil
+
+import pytest
+
+from conftest import load_script
+from lemmafreq.freqlist import write_freq_list
+
+
+@pytest.fixture
+def giga_corpus(tmp_path, giga_dir):
+    """
+    giga_simple_freq.py and a function setting the files of the corpus, a copy of the small Gigaword corpus
+    """
+    shutil.copytree(giga_dir, str(tmp_path / "rmh"))
+    files = []
+    for directory, subdirectories, names in os.walk(str(tmp_path / "rmh")):
+        files.extend(os.path.join(directory, name) for name in names)
+    files.sort()
+    script = load_script(
+        "gigaword/giga_simple_freq.py",
+        checkpoint_file=str(tmp_path / "counts" / "giga_simple_checkpoint.sqlite"),
+    )
+
+    def set_files(n_files):
+        return files[:n_files]
+
+    return script, set_files
+
+
+@pytest.fixture
+def mim_corpus(tmp_path, mim_dir):
+    """
+    mim_simple_freq.py and a function setting the files of the corpus, a copy of the small MÍM corpus, by
+    rewriting its file list
+    """
+    shutil.copytree(mim_dir, str(tmp_path / "MIM"))
+    file_list = str(tmp_path / "MIM" / "fileList.txt")
+    with open(file_list, encoding="utf-8") as f:
+        header, *rows = f.readlines()
+    script = load_script(
+        "mim/mim_simple_freq.py",
+        basedir=str(tmp_path / "MIM") + "/",
+        file_list=file_list,
+        checkpoint_file=str(tmp_path / "counts" / "mim_simple_checkpoint.sqlite"),
+    )
+
+    def set_files(n_files):
+        with open(file_list, "w", encoding="utf-8") as f:
+            f.writelines([header] + rows[:n_files])
+        return script.read_file_list()
+
+    return script, set_files
+
+
+def freq_list(script, files, path, **kwargs):
+    c, counted = script.count_texts(files, **kwargs)
+    write_freq_list(c, path)
+    with open(path, "rb") as f:
+        return f.read(), counted
+
+
+@pytest.mark.parametrize("corpus", ["giga_corpus", "mim_corpus"])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_incremental_list_follows_added_and_removed_files(
+    request, corpus, workers, tmp_path
+):
+    script, set_files = request.getfixturevalue(corpus)
+    incremental = str(tmp_path / "incremental.tsv")
+    full = str(tmp_path / "full.tsv")
+
+    files = set_files(1)
+    original, counted = freq_list(
+        script, files, incremental, workers=workers, incremental=True
+    )
+    assert counted == 1
+    assert original == freq_list(script, files, full, workers=workers)[0]
+
+    # only the added file is counted
+    files = set_files(2)
+    added, counted = freq_list(
+        script, files, incremental, workers=workers, incremental=True
+    )
+    assert counted == 1
+    assert added != original
+    assert added == freq_list(script, files, full, workers=workers)[0]
+
+    # the counts of the removed file are dropped
+    files = set_files(1)
+    removed, counted = freq_list(
+        script, files, incremental, workers=workers, incremental=True
+    )
+    assert counted == 0
+    assert removed == original
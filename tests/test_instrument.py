@@ -0,0 +1,93 @@
+"""
+Tests of the stage instrumentation in lemmafreq/instrument.py, which must record the tokens and sentences read in
+each stage without changing the output of the scripts
+"""
+
+import io
+import json
+
+import pytest
+
+from lemmafreq import instrument
+from lemmafreq.instrument import Histogram, Instruments
+from lemmafreq.tei import iter_sentences
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    # instruments which log every call, installed as enable() would but without the summary at exit
+    instruments = Instruments(interval=0.0, log_file=io.StringIO())
+    monkeypatch.setattr(instrument, "instruments", instruments)
+    return instruments
+
+
+def log_lines(instruments):
+    return [json.loads(line) for line in instruments.log_file.getvalue().splitlines()]
+
+
+def test_nothing_is_recorded_until_enabled():
+    assert instrument.instruments is None
+    assert instrument.stage("count giga") is instrument.no_stage
+    with instrument.stage("count giga"):
+        instrument.count(10)
+        instrument.latency("tagger", 0.5)
+    instrument.count_tagged([{"paragraphs": []}])
+
+
+def test_tokens_and_sentences_are_added_to_the_innermost_stage(recorded, giga_files):
+    words = [len(w) for file in giga_files for sent_id, w in iter_sentences(file)]
+    with instrument.stage("outer"):
+        with instrument.stage("read giga"):
+            for file in giga_files:
+                list(iter_sentences(file))
+        instrument.count(5, 2)
+
+    outer, read = recorded.stages["outer"], recorded.stages["read giga"]
+    assert (read.tokens, read.sentences) == (sum(words), len(words))
+    assert (outer.tokens, outer.sentences) == (5, 2)
+    assert outer.seconds >= read.seconds > 0
+    assert read.peak_rss_mb is None or read.peak_rss_mb > 0
+
+    progress = log_lines(recorded)[-1]
+    assert progress["event"] == "progress"
+    assert progress["stage"] == "outer"
+    assert "read giga" in recorded.summary()
+
+
+def test_tagged_words_are_counted_as_tokens(recorded):
+    tagged = [
+        {"paragraphs": [{"sentences": [[{"word": "Hestur"}, {"word": "."}]]}]},
+        {"paragraphs": [{"sentences": []}]},
+    ]
+    with instrument.stage("tag"):
+        instrument.count_tagged(tagged)
+
+    assert (recorded.stages["tag"].tokens, recorded.stages["tag"].sentences) == (2, 2)
+
+
+def test_latencies_are_kept_in_buckets_of_powers_of_two():
+    histogram = Histogram()
+    for seconds in [0.0005, 0.003, 0.003, 0.010, 0.100]:
+        histogram.add(seconds)
+
+    record = histogram.record()
+    assert record["calls"] == 5
+    assert record["buckets"] == {"<1": 1, "<4": 2, "<16": 1, "<128": 1}
+    assert record["p50_ms"] == 4.0
+    assert record["max_ms"] == 100.0
+    assert histogram.quantile(1.0) == 0.1
+
+
+def test_output_is_the_same_with_instrumentation(giga, recorded, tmp_path):
+    giga.compile_full_frequency(giga.output_file)
+    with open(giga.output_file, "rb") as f:
+        instrumented = f.read()
+
+    assert recorded.stages["write giga"].sentences == 7
+    instrument.disable()
+    giga.output_file = str(tmp_path / "plain.tsv")
+    giga.counts_dir = str(tmp_path / "plain_counts") + "/"
+    giga.checkpoint_file = str(tmp_path / "plain_counts" / "checkpoint.sqlite")
+    giga.compile_full_frequency(giga.output_file)
+    with open(giga.output_file, "rb") as f:
+        assert f.read() == instrumented
@@ -0,0 +1,100 @@
+"""
+Tests of the simple frequency lists in lemmafreq/freqlist.py, with and without the measures of
+lemmafreq/measures.py
+"""
+
+from collections import Counter
+import math
+
+import pytest
+
+from lemmafreq.freqlist import read_freq_list, write_freq_list
+from lemmafreq.measures import compute, format_measures, read_totals, totals_path
+
+numpy = pytest.importorskip("numpy")
+
+counts = Counter(
+    {
+        "hestur\tnken": 40,
+        "kona\tnven": 25,
+        ".\tpl": 25,
+        "3.5\tta": 7,
+        "fara\tsfg3eþ": 1,
+        "Ófeigur\tnken-s": 2,
+    }
+)
+tokens = sum(counts.values())
+types = len(counts)
+
+
+def expected_list(top=None):
+    items = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:top]
+    return [tuple(key.split("\t")) + (count,) for key, count in items]
+
+
+def zipf(count, tokens, types):
+    return math.log10((count + 1) / (tokens + types) * 10**9)
+
+
+@pytest.mark.parametrize("measures", [False, True])
+@pytest.mark.parametrize("top", [None, 3])
+def test_read_freq_list_reads_what_was_written(tmp_path, measures, top):
+    path = str(tmp_path / "giga_simple_freq.tsv")
+    write_freq_list(counts, path, top=top, measures=measures)
+
+    assert list(read_freq_list(path)) == expected_list(top)
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    assert not text.endswith("\n")
+    assert {len(line.split("\t")) for line in text.split("\n")} == {3 + 3 * measures}
+
+
+def test_measures_are_written_with_the_totals(tmp_path):
+    path = str(tmp_path / "giga_simple_freq.tsv")
+    write_freq_list(counts, path, top=2, measures=True, corpus="giga")
+
+    with open(path, encoding="utf-8") as f:
+        lines = [line.split("\t") for line in f.read().split("\n")]
+    for lemma, tag, count, per_million, zipf_value, log in lines:
+        count = int(count)
+        # the measures are computed from the size of the whole corpus, not of the top lemmas written
+        assert per_million == "%.4f" % (count / tokens * 10**6)
+        assert zipf_value == "%.3f" % zipf(count, tokens, types)
+        assert log == "%.3f" % math.log10(count + 1)
+    assert read_totals(path) == {"giga": (tokens, types)}
+    assert totals_path(path) == str(tmp_path / "giga_simple_freq.totals.tsv")
+    assert totals_path(path + ".zst") == totals_path(path)
+
+
+def test_compute_is_the_formula_for_each_corpus():
+    matrix = numpy.array([[0, 5], [1, 0], [10, 95], [89, 0]])
+    tokens = [100, 100]
+    types = [3, 2]
+
+    per_million, zipf_values, log = compute(
+        matrix, numpy.array(tokens), numpy.array(types)
+    )
+
+    for row, column in numpy.ndindex(matrix.shape):
+        count = int(matrix[row, column])
+        assert per_million[row, column] == pytest.approx(count / tokens[column] * 1e6)
+        assert zipf_values[row, column] == pytest.approx(
+            zipf(count, tokens[column], types[column])
+        )
+        assert log[row, column] == pytest.approx(math.log10(count + 1))
+    # a lemma which is not in a corpus still has a Zipf value, which is below that of any lemma in it
+    assert zipf_values[0, 0] == pytest.approx(math.log10(1e9 / 103))
+    assert zipf_values[0, 0] < zipf_values[1, 0]
+
+
+def test_an_empty_corpus_has_no_measures():
+    matrix = numpy.array([[3, 0], [0, 0], [7, 0]])
+    tokens, types = numpy.array([10, 0]), numpy.array([2, 0])
+
+    measures = compute(matrix, tokens, types)
+
+    for values in measures:
+        assert numpy.isnan(values[:, 1]).all()
+        assert not numpy.isnan(values[:, 0]).any()
+    assert format_measures(measures)[1][:, 1].tolist() == ["nan", "nan", "nan"]
+    assert all(numpy.isnan(compute(numpy.array([0, 0]), 0, 0)[1]))
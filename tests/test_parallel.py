@@ -0,0 +1,49 @@
+"""
+Tests of the parallel counting in lemmafreq/parallel.py, whose output must be the same as that of a serial run for
+any number of workers
+"""
+
+from collections import Counter
+
+import pytest
+
+from conftest import load_script
+from lemmafreq.freqlist import write_freq_list
+from lemmafreq.parallel import count_files, merge_counters, split_chunks
+
+
+def read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_parallel_counts_are_written_as_a_serial_run(giga_files, tmp_path, workers):
+    simple = load_script("gigaword/giga_simple_freq.py")
+    # enough files for several chunks of more than one file
+    files = giga_files * 5
+    progress = []
+
+    serial = count_files(simple.text_words, files, workers=1)
+    parallel = count_files(
+        simple.text_words, files, workers=workers, progress=progress.append
+    )
+
+    assert list(parallel.items()) == list(serial.items())
+    write_freq_list(serial, str(tmp_path / "serial.tsv"))
+    write_freq_list(parallel, str(tmp_path / "parallel.tsv"))
+    assert read_bytes(str(tmp_path / "parallel.tsv")) == read_bytes(
+        str(tmp_path / "serial.tsv")
+    )
+    assert progress[-1] == len(files)
+    assert len(progress) == len(split_chunks(files, workers * 4))
+
+
+def test_chunks_are_merged_in_order():
+    chunks = split_chunks(range(10), 4)
+    assert chunks == [[0, 1, 2], [3, 4, 5], [6, 7], [8, 9]]
+
+    counters = [Counter(str(i) for i in chunk) for chunk in chunks]
+    merged = merge_counters(counters)
+    assert list(merged) == [str(i) for i in range(10)]
+    assert merge_counters([]) == Counter()
@@ -0,0 +1,120 @@
+"""
+Tests of the SentenceStore in lemmafreq/sentencestore.py, which annotates lines of the infoTheoryTestV2 file with
+the lemmas of their sentence and the lemma counts, as add_freq_V2() did
+"""
+
+from array import array
+
+import pytest
+
+from lemmafreq import sentencestore
+from lemmafreq.sentencestore import SentenceStore, icepahc_digest
+from lemmafreq.vocab import Counts, Vocabulary
+
+# the sentences of the store and the lemmas of each
+sentences = {
+    "firstgrammar.1": ("Hestur fór heim .", [("hestur", "nken"), ("fara", "sfg3eþ")]),
+    "firstgrammar.12": ("Hestur sá 'hest' .", [("hestur", "nken"), ("'", "pl")]),
+    "bandamenn.26.11": ("Ófeigur kvað .", [("Ófeigur", "nken-s"), ("kveða", "sfg3eþ")]),
+    "bandamenn.26": ("Ekkert .", []),
+}
+
+
+@pytest.fixture
+def store():
+    vocab = Vocabulary()
+    c = Counts(vocab)
+    rows = []
+    for sent_id, (text, lemmas) in sentences.items():
+        ids = array("i", [vocab.intern(lemma, tag) for lemma, tag in lemmas])
+        c.update(ids)
+        rows.append((sent_id, text, ids))
+    store = SentenceStore(None)
+    store.fill(rows, c, "digest")
+    yield store
+    store.close()
+
+
+def annotated(line, *lemmas):
+    """
+    Function to build the annotated form of a line with the keys and counts of lemmas, as add_freq_V2() did, with
+    str() of a (key, count) tuple for each lemma
+    """
+    return "{}:{}:{}\n".format(
+        line,
+        "".join("{} ".format((key, count)) for key, count in lemmas),
+        "".join("{} ".format(count) for key, count in lemmas),
+    )
+
+
+def test_lines_are_annotated_with_the_lemmas_of_their_sentence(store):
+    lines = [
+        "0.5:1.2:FIRSTGRAMMAR:1\n",
+        "0.5:1.2:Z:XXXGENRE@\n",
+        "0.3:4.1:FirstGrammar:12\n",
+        "0.5:1.2:FIRSTGRAMMAR:1\n",
+    ]
+
+    assert list(store.annotate(lines)) == [
+        annotated("0.5:1.2:FIRSTGRAMMAR:1", ("hestur, nken", 2), ("fara, sfg3eþ", 1)),
+        annotated("0.3:4.1:FirstGrammar:12", ("hestur, nken", 2), ("', pl", 1)),
+        annotated("0.5:1.2:FIRSTGRAMMAR:1", ("hestur, nken", 2), ("fara, sfg3eþ", 1)),
+    ]
+    assert len(store) == 4
+    assert store.digest() == "digest"
+
+
+def test_sentence_ids_with_errors_are_normalized(store):
+    lines = [
+        "0.5:1.2:Z:NAR@1450.BANDAMENN.NAR-SAG,26.11\n",
+        "0.5:1.2:Z:NAR@1450.BANDAMENN.NAR-SAG,.26\n",
+    ]
+
+    assert list(store.annotate(lines)) == [
+        annotated(lines[0].rstrip("\n"), ("Ófeigur, nken-s", 1), ("kveða, sfg3eþ", 1)),
+        annotated(lines[1].rstrip("\n")),
+    ]
+
+
+def test_the_output_does_not_depend_on_the_batch_size(store, monkeypatch):
+    lines = ["0.5:1.2:FIRSTGRAMMAR:{}\n".format(n) for n in (1, 12, 1, 12, 12)]
+    lines.append("0.5:1.2:Z:XXXGENRE@\n")
+    expected = list(store.annotate(lines))
+    monkeypatch.setattr(sentencestore, "chunk_size", 1)
+
+    assert list(store.annotate(lines, batch_size=2)) == expected
+    assert list(store.annotate([])) == []
+
+
+def test_a_sentence_which_is_not_in_the_store_is_a_key_error(store):
+    lines = ["0.5:1.2:FIRSTGRAMMAR:1\n", "0.5:1.2:THORLAKUR:3\n"]
+
+    with pytest.raises(KeyError, match="thorlakur.3"):
+        list(store.annotate(lines))
+
+
+def test_filling_the_store_replaces_its_contents(store):
+    vocab = Vocabulary()
+    c = Counts(vocab)
+    ids = array("i", [vocab.intern("kona", "nven")])
+    c.update(ids)
+    store.fill([("thorlakur.3", "Kona .", ids)], c, "other digest")
+
+    assert len(store) == 1
+    assert store.digest() == "other digest"
+    assert list(store.annotate(["0.5:1.2:THORLAKUR:3\n"])) == [
+        annotated("0.5:1.2:THORLAKUR:3", ("kona, nven", 1))
+    ]
+    with pytest.raises(KeyError):
+        list(store.annotate(["0.5:1.2:FIRSTGRAMMAR:1\n"]))
+
+
+def test_the_digest_changes_with_the_files_and_version(icepahc_dir, icepahc_files):
+    digest = icepahc_digest(icepahc_dir, icepahc_files, "v1")
+
+    assert icepahc_digest(icepahc_dir, icepahc_files, "v1") == digest
+    assert icepahc_digest(icepahc_dir, icepahc_files, "v2") != digest
+    assert icepahc_digest(icepahc_dir, icepahc_files[1:], "v1") != digest
+    with open(icepahc_dir + icepahc_files[0], "a", encoding="utf-8") as f:
+        f.write("Og meira .\n")
+    assert icepahc_digest(icepahc_dir, icepahc_files, "v1") != digest
@@ -0,0 +1,109 @@
+"""
+Tests of the sharded mode of the Gigaword scripts, in which each shard is counted by its own process, as on separate
+machines, and the shards are then merged
+"""
+
+import argparse
+from collections import Counter
+
+import pytest
+
+from conftest import load_script
+from lemmafreq.counts import write_counts
+from lemmafreq.parallel import parse_shard, shard_files
+
+
+def read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def load_giga(config, **changes):
+    return load_script("gigaword/giga_get_lemma_freq.py", **dict(config, **changes))
+
+
+@pytest.mark.parametrize("n_shards", [1, 2, 3, 4])
+def test_merged_shards_are_the_same_as_a_full_run(
+    giga, giga_config, tmp_path, n_shards
+):
+    giga.compile_full_frequency(giga.output_file)
+
+    for shard in range(n_shards):
+        load_giga(giga_config).compile_shard(shard, n_shards)
+    merged = str(tmp_path / "merged.tsv")
+    load_giga(giga_config).merge_shards(n_shards, merged)
+
+    assert read_bytes(merged) == read_bytes(giga.output_file)
+
+
+def test_shard_ids_without_counts_are_merged(giga, giga_config, tmp_path):
+    giga.compile_full_frequency(giga.output_file)
+
+    for shard in range(2):
+        shard_giga = load_giga(giga_config)
+        # IDs of a shard which have no count, e.g. interned while reading other corpora
+        shard_giga.vocab.intern("ekkert", "x")
+        shard_giga.compile_shard(shard, 2)
+        shard_giga.vocab.intern("ekki", "x")
+    merged = str(tmp_path / "merged.tsv")
+    load_giga(giga_config).merge_shards(2, merged)
+
+    assert read_bytes(merged) == read_bytes(giga.output_file)
+
+
+def test_merging_reports_missing_shards(giga_config):
+    load_giga(giga_config).compile_shard(0, 3)
+    load_giga(giga_config).compile_shard(2, 3)
+
+    with pytest.raises(FileNotFoundError, match="Shards 1 of 3 have not been counted"):
+        load_giga(giga_config).merge_shards(3, giga_config["output_file"])
+
+
+@pytest.fixture
+def giga_simple(tmp_path, giga_files):
+    return load_script(
+        "gigaword/giga_simple_freq.py",
+        file_list=giga_files,
+        shard_dir=str(tmp_path / "shards") + "/",
+    )
+
+
+def test_simple_shards_are_merged_in_order(giga_simple, giga_files, tmp_path):
+    (tmp_path / "shards").mkdir()
+    for shard in range(2):
+        files = shard_files(giga_files, shard, 2)
+        c = giga_simple.count_files(giga_simple.text_words, files)
+        write_counts(c, giga_simple.shard_path(shard, 2))
+
+    merged = giga_simple.merge_shards(2)
+    c = giga_simple.count_files(giga_simple.text_words, giga_files)
+
+    assert merged == c
+    assert list(merged) == list(c)
+
+
+def test_simple_merge_reports_missing_shards(giga_simple, tmp_path):
+    (tmp_path / "shards").mkdir()
+    write_counts(Counter({"hestur\tnk": 1}), giga_simple.shard_path(1, 2))
+
+    with pytest.raises(FileNotFoundError, match="Shards 0 of 2 have not been counted"):
+        giga_simple.merge_shards(2)
+
+
+@pytest.mark.parametrize(
+    "text, message",
+    [
+        ("1/4", None),
+        ("4/4", "Shard 4 is not between 0 and 3"),
+        ("fjórir", "A shard is given as I/N, e.g. 0/4, not fjórir"),
+    ],
+)
+def test_parse_shard_shows_its_message(text, message, capsys):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shard", type=parse_shard)
+    if message is None:
+        assert parser.parse_args(["--shard", text]).shard == (1, 4)
+        return
+    with pytest.raises(SystemExit):
+        parser.parse_args(["--shard", text])
+    assert message in capsys.readouterr().err
@@ -0,0 +1,70 @@
+"""
+Tests of the synthetic corpora in benchmarks/synthetic.py, which must always be the same for the same seed and be
+read by the scripts as the real corpora are
+"""
+
+import os
+
+from conftest import load_script
+from lemmafreq.corpora import read_mim_file_list
+from lemmafreq.icepahc import SentenceIndex
+from lemmafreq.tei import iter_sentences
+from synthetic import sizes, write_corpora
+
+
+def read_tree(root):
+    tree = dict()
+    for directory, subdirectories, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            with open(path, "rb") as f:
+                tree[os.path.relpath(path, root)] = f.read()
+    return tree
+
+
+def test_the_same_seed_gives_the_same_corpora(tmp_path):
+    write_corpora(str(tmp_path / "a"))
+    write_corpora(str(tmp_path / "b"))
+    write_corpora(str(tmp_path / "c"), seed=1)
+
+    a = read_tree(str(tmp_path / "a"))
+    assert a == read_tree(str(tmp_path / "b"))
+    assert a != read_tree(str(tmp_path / "c"))
+
+
+def test_the_scripts_read_the_synthetic_corpora(tmp_path, giga_config):
+    root = str(tmp_path / "corpora")
+    write_corpora(root)
+    size = sizes["small"]
+    basedir = os.path.join(root, "rmh") + "/"
+    files = sorted(
+        os.path.join(directory, name)
+        for directory, subdirectories, names in os.walk(basedir)
+        for name in names
+    )
+    giga_config.update(
+        basedir=basedir,
+        file_list=files,
+        mim_basedir=os.path.join(root, "MIM") + "/",
+        mim_file_list=os.path.join(root, "MIM", "fileList.txt"),
+    )
+    giga = load_script("gigaword/giga_get_lemma_freq.py", **giga_config)
+
+    assert len(files) == size["giga_files"]
+    mim_files = list(read_mim_file_list(giga.mim_file_list, giga.mim_basedir))
+    assert len(mim_files) == size["mim_files"]
+    giga.compile_full_frequency(giga.output_file)
+    with open(giga.output_file, encoding="utf-8") as f:
+        rows = f.read().splitlines()
+    assert len(rows) == sum(len(list(iter_sentences(file))) for file in files)
+    assert len(rows) == size["giga_files"] * size["sentences"]
+
+    txt_dir = os.path.join(root, "icepahc-v0.9", "txt") + "/"
+    texts = sorted(os.listdir(txt_dir))
+    index = SentenceIndex(None, txt_dir, texts)
+    assert len(texts) == size["icepahc_texts"]
+    for text in texts:
+        assert index.lines(text) == size["sentences"]
+        # as in IcePaHC, more IDs are read than there are lines
+        assert len(index.sentence_ids(text)) >= index.lines(text)
+    index.close()
@@ -0,0 +1,102 @@
+"""
+Tests of the tag cache in lemmafreq/tagcache.py, which must only call the tagger for lines it has not tagged with
+the same identity
+"""
+
+import pytest
+
+from lemmafreq.tagcache import CachedTagger, TagCache
+from lemmafreq.taggers import Tagger
+
+
+class StubTagger(Tagger):
+    """
+    Tagger which records the texts it tags
+    """
+
+    def __init__(self, identity="stub"):
+        self.identity = identity
+        self.texts = []
+
+    def tag_batch(self, texts):
+        self.texts.extend(texts)
+        return [
+            {"paragraphs": [{"sentences": [[{"word": text, "tag": self.identity}]]}]}
+            for text in texts
+        ]
+
+
+class Factory:
+    """
+    make_tagger() for a CachedTagger, which records the taggers it creates
+    """
+
+    def __init__(self, identity="stub"):
+        self.identity = identity
+        self.taggers = []
+
+    def __call__(self):
+        self.taggers.append(StubTagger(self.identity))
+        return self.taggers[-1]
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    # in a directory which does not exist yet, as the other stores are
+    return str(tmp_path / "cache" / "tag_cache.sqlite")
+
+
+def test_hits_and_misses_are_counted(cache_path):
+    factory = Factory()
+    tagger = CachedTagger(factory, "stub", TagCache(cache_path))
+
+    first = tagger.tag_batch(["Hestur .", "Kona .", "Hestur ."])
+    assert factory.taggers[0].texts == ["Hestur .", "Kona ."]
+    assert (tagger.cache.hits, tagger.cache.misses) == (0, 3)
+
+    second = tagger.tag_batch(["Kona .", "Barn .", "Hestur ."])
+    assert factory.taggers[0].texts == ["Hestur .", "Kona .", "Barn ."]
+    assert (tagger.cache.hits, tagger.cache.misses) == (2, 4)
+    assert tagger.stats() == "Tag cache: 2 hits, 4 misses"
+    assert second[0] == first[1] and second[2] == first[0]
+    assert len(factory.taggers) == 1
+
+
+def test_a_warm_run_never_creates_the_tagger(cache_path):
+    lines = ["Hestur .", "Kona .", "Barn ."]
+    expected = CachedTagger(Factory(), "stub", TagCache(cache_path)).tag_batch(lines)
+
+    factory = Factory()
+    tagger = CachedTagger(factory, "stub", TagCache(cache_path))
+
+    assert tagger.tag_batch(lines[::-1]) == expected[::-1]
+    assert tagger.tag_batch(lines) == expected
+    assert factory.taggers == []
+    assert (tagger.cache.hits, tagger.cache.misses) == (6, 0)
+
+
+def test_another_tagger_identity_misses(cache_path):
+    CachedTagger(Factory("http"), "http", TagCache(cache_path)).tag_batch(["Hestur ."])
+
+    factory = Factory("local")
+    tagger = CachedTagger(factory, "local", TagCache(cache_path))
+    tagged = tagger.tag_batch(["Hestur ."])
+
+    assert factory.taggers[0].texts == ["Hestur ."]
+    assert tagged[0]["paragraphs"][0]["sentences"][0][0]["tag"] == "local"
+    assert TagCache.key("http", "Hestur .") != TagCache.key("local", "Hestur .")
+
+
+def test_least_recently_used_lines_are_evicted(cache_path):
+    factory = Factory()
+    tagger = CachedTagger(factory, "stub", TagCache(cache_path, max_entries=3))
+    tagger.tag_batch(["a", "b", "c"])
+    # b is used again, so a is the least recently used line
+    tagger.tag_batch(["b"])
+    tagger.tag_batch(["d"])
+
+    assert tagger.cache.db.execute("SELECT COUNT(*) FROM tags").fetchone()[0] == 3
+    tagger.tag_batch(["b", "c", "d"])
+    assert factory.taggers[0].texts == ["a", "b", "c", "d"]
+    tagger.tag_batch(["a"])
+    assert factory.taggers[0].texts == ["a", "b", "c", "d", "a"]
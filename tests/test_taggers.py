@@ -0,0 +1,196 @@
+"""
+Tests of the taggers in lemmafreq/taggers.py. The HTTP tagger is tested against the stand-in for the malvinnsla API
+in benchmarks/malvinnsla_standin.py.
+"""
+
+import re
+import sys
+import types
+
+import pytest
+import requests
+
+from lemmafreq import taggers
+from lemmafreq.corpora import tagged_lemmas
+from lemmafreq.taggers import HTTPTagger, LocalTagger
+from malvinnsla_standin import Handler, start_server, tag_word
+
+empty = {"paragraphs": [{"sentences": []}]}
+
+
+@pytest.fixture(scope="module")
+def url():
+    server, url = start_server()
+    yield url
+    server.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def reset_handler():
+    Handler.delay = 0.0
+    Handler.failures = 0
+    Handler.join_lines = False
+    Handler.rotate = False
+    Handler.record = False
+    Handler.texts = []
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    # the waits between retries, which are not actually waited
+    waits = []
+    monkeypatch.setattr(taggers.time, "sleep", waits.append)
+    return waits
+
+
+def make_lines(n_lines):
+    return ["Lína{} hestur og kona .\n".format(i) for i in range(n_lines)]
+
+
+def first_words(tagged):
+    return [t["paragraphs"][0]["sentences"][0][0]["word"] for t in tagged]
+
+
+def test_batched_output_is_in_order_and_matches_line_by_line(url):
+    lines = make_lines(23)
+    serial = HTTPTagger(url, lines_per_request=1, concurrency=1).tag_batch(lines)
+    requests_before = Handler.requests
+    batched = HTTPTagger(url, lines_per_request=4, concurrency=3).tag_batch(lines)
+
+    assert batched == serial
+    assert first_words(batched) == ["Lína{}".format(i) for i in range(23)]
+    assert Handler.requests - requests_before == 6
+
+
+def test_blank_lines_have_an_empty_paragraph(url):
+    lines = ["Hestur er hér .\n", "\n", "   \n", "Kona .\n"]
+    tagged = HTTPTagger(url, lines_per_request=10).tag_batch(lines)
+
+    assert tagged[1] == tagged[2] == empty
+    assert [len(list(tagged_lemmas(t))) for t in tagged] == [3, 0, 0, 1]
+    assert HTTPTagger(url).tag_batch(["\n", ""]) == [empty, empty]
+
+
+@pytest.mark.parametrize("mode", ["join_lines", "rotate"])
+def test_mismatched_paragraphs_fall_back_to_one_line_at_a_time(url, mode):
+    lines = ["  Hestur er hér .\n", "\n", "Kona sér hest .  \n", "Og barn .\n"]
+    expected = HTTPTagger(url, lines_per_request=1).tag_batch(lines)
+    setattr(Handler, mode, True)
+    Handler.record = True
+
+    tagged = HTTPTagger(url, lines_per_request=10).tag_batch(lines)
+
+    assert tagged == expected
+    # the lines are sent together, then one at a time with the same text
+    sent = ["Hestur er hér .", "Kona sér hest .", "Og barn ."]
+    assert Handler.texts == ["\n".join(sent)] + sent
+
+
+def test_failed_requests_are_retried_with_backoff(url, sleeps):
+    lines = make_lines(3)
+    expected = HTTPTagger(url).tag_batch(lines)
+    Handler.failures = 2
+    requests_before = Handler.requests
+
+    tagged = HTTPTagger(url, concurrency=1, retries=3, backoff=0.5).tag_batch(lines)
+
+    assert tagged == expected
+    assert sleeps == [0.5, 1.0]
+    assert Handler.requests - requests_before == 3
+
+
+def test_requests_fail_after_the_last_retry(url, sleeps):
+    Handler.failures = 10
+    requests_before = Handler.requests
+
+    with pytest.raises(requests.HTTPError):
+        HTTPTagger(url, concurrency=1, retries=2, backoff=0.1).tag_batch(make_lines(1))
+
+    assert sleeps == [0.1, 0.2]
+    assert Handler.requests - requests_before == 3
+
+
+def test_backend_identity_is_the_identity_of_the_tagger(monkeypatch):
+    assert taggers.backend_identity("http") == HTTPTagger().identity
+    monkeypatch.setattr(taggers, "malvinnsla_url", "http://127.0.0.1:1")
+    assert taggers.backend_identity("http") == HTTPTagger().identity
+    assert taggers.backend_identity("http") == "http:http://127.0.0.1:1"
+    with pytest.raises(ValueError):
+        taggers.backend_identity("nope")
+
+
+class StubModel:
+    """
+    Stand-in for a model of the POS tagger, which tags as the stand-in server does
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def tag_bulk(self, sentences, batch_size):
+        self.calls.append((len(sentences), batch_size))
+        return [tuple(tag_word(word) for word in sentence) for sentence in sentences]
+
+
+def split_into_sentences(text):
+    # as the tokenizer package, a string of tokens separated by spaces for each sentence
+    sentence = []
+    for token in re.findall(r"\w+|[^\w\s]", text):
+        sentence.append(token)
+        if token in ".!?":
+            yield " ".join(sentence)
+            sentence = []
+    if sentence:
+        yield " ".join(sentence)
+
+
+@pytest.fixture
+def local_tagger(monkeypatch):
+    monkeypatch.setitem(
+        sys.modules,
+        "tokenizer",
+        types.SimpleNamespace(split_into_sentences=split_into_sentences),
+    )
+    return LocalTagger(StubModel(), lambda word, tag: word.lower(), batch_size=16)
+
+
+def test_local_tagger_has_the_output_of_the_api(url, local_tagger):
+    # one sentence on each line, which the stand-in server also tags as one sentence
+    lines = ["Hestur er hér .\n", "\n", "Kona sá hest !\n", "Og barn .\n"]
+    local = local_tagger.tag_batch(lines)
+
+    assert local == HTTPTagger(url).tag_batch(lines)
+    assert local[1] == empty
+    assert [list(tagged_lemmas(t)) for t in local] == [
+        list(tagged_lemmas(t)) for t in HTTPTagger(url).tag_batch(lines)
+    ]
+    assert local_tagger.model.calls == [(3, 16)]
+
+
+def test_local_tagger_keeps_the_sentences_of_each_text(local_tagger):
+    tagged = local_tagger.tag_batch(["Hestur er hér . Kona sá hest .", "Barn"])
+
+    assert [len(t["paragraphs"]) for t in tagged] == [1, 1]
+    sentences = tagged[0]["paragraphs"][0]["sentences"]
+    assert [[word["word"] for word in sentence] for sentence in sentences] == [
+        ["Hestur", "er", "hér", "."],
+        ["Kona", "sá", "hest", "."],
+    ]
+    assert sentences[0][0] == {"word": "Hestur", "tag": "nken", "lemma": "hestur"}
+    assert tagged[1]["paragraphs"][0]["sentences"] == [
+        [{"word": "Barn", "tag": "sfg3en", "lemma": "barn"}]
+    ]
+
+
+def test_local_identity_includes_the_package_versions(local_tagger, monkeypatch):
+    assert local_tagger.identity == taggers.backend_identity("local")
+    for package in taggers.local_packages:
+        assert "{}=".format(package) in local_tagger.identity
+
+    monkeypatch.setattr(
+        taggers,
+        "package_version",
+        lambda package: "2.0" if package == "nefnir" else "1.0",
+    )
+    assert taggers.backend_identity("local") != local_tagger.identity
+    assert "nefnir=2.0" in taggers.backend_identity("local")
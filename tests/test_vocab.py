@@ -0,0 +1,78 @@
+"""
+Tests of the interned lemma IDs and array-backed counts in lemmafreq/vocab.py, and of reading and writing counts in
+lemmafreq/counts.py, which must give the same keys and counts as counting "lemma, tag" strings in a Counter
+"""
+
+from collections import Counter
+
+from lemmafreq.counts import read_counts, write_counts
+from lemmafreq.vocab import Counts, Vocabulary
+
+tokens = [
+    ("hestur", "nk"),
+    ("kona", "nv"),
+    ("hestur", "nk"),
+    ("hestur", "nv"),
+    (None, "pl"),
+    ("None", "pl"),
+    ("a, b", "c"),
+    ("kona", "nv"),
+]
+
+
+def string_counts():
+    return Counter("{}, {}".format(lemma, tag) for lemma, tag in tokens)
+
+
+def id_counts(vocab):
+    c = Counts(vocab)
+    c.update([vocab.intern(lemma, tag) for lemma, tag in tokens])
+    return c
+
+
+def test_ids_are_given_in_the_order_pairs_are_first_seen():
+    vocab = Vocabulary()
+    ids = [vocab.intern(lemma, tag) for lemma, tag in tokens]
+
+    assert ids == [0, 1, 0, 2, 3, 3, 4, 1]
+    assert len(vocab) == 5
+    assert vocab.key(3) == "None, pl"
+    # a key with a comma in the lemma is split at the last comma
+    assert vocab.intern_key("a, b, c") == 4
+    assert vocab.intern_key("ný, nk") == 5
+
+
+def test_counts_are_those_of_a_counter_of_strings():
+    vocab = Vocabulary()
+    c = id_counts(vocab)
+
+    assert list(c.items()) == list(string_counts().items())
+    assert c.lookup([0, 1, 3, 4]) == [2, 2, 2, 1]
+    assert c[100] == 0
+
+
+def test_counts_grow_with_the_vocabulary():
+    vocab = Vocabulary()
+    c = id_counts(vocab)
+    new = vocab.intern("barn", "hk")
+
+    assert c[new] == 0
+    assert c.lookup([new]) == [0]
+    assert len(c.counts) == len(vocab)
+    c[vocab.intern("skip", "hk")] = 7
+    assert list(c.items())[-1] == ("skip, hk", 7)
+
+
+def test_counts_are_read_as_they_were_written(tmp_path):
+    vocab = Vocabulary()
+    c = id_counts(vocab)
+    for name in ("counts.tsv", "counts.tsv.gz"):
+        path = str(tmp_path / name)
+        write_counts(c, path)
+
+        assert read_counts(path) == string_counts()
+        assert list(read_counts(path).items()) == list(c.items())
+        other = Vocabulary()
+        assert list(read_counts(path, other).items()) == list(c.items())
+        # interned in the same vocabulary, the IDs are the same
+        assert read_counts(path, vocab).counts == c.counts
@@ -0,0 +1,170 @@
+"""
+Tests of the output files of lemmafreq/writers.py. Compressed output must decompress to the same text as an
+uncompressed file, a resumed file must continue from the offset it was truncated to, and a Parquet file must hold
+the same sentences and counts as the tsv output
+"""
+
+from array import array
+import gzip
+import re
+
+import pytest
+
+from lemmafreq.vocab import Vocabulary
+from lemmafreq.writers import ParquetWriter, open_output, vocab_path
+
+lines = ["{}\thestur\t('hestur, nk', {})\n".format(i, i * 7) for i in range(20000)]
+text = "".join(lines)
+
+
+def write_output(path, threads=0, offset=0, lines=lines):
+    out = open_output(path, threads, offset)
+    for line in lines:
+        out.write(line)
+    out.close()
+    return out.buffer.raw.bytes_written
+
+
+def test_uncompressed_output(tmp_path):
+    path = str(tmp_path / "out.tsv")
+
+    assert write_output(path) == len(text.encode("utf-8"))
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == text
+
+
+def test_gzip_output_decompresses_to_the_text(tmp_path):
+    path = str(tmp_path / "out.tsv.gz")
+
+    bytes_written = write_output(path)
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        assert f.read() == text
+    # the bytes written are counted before compression
+    assert bytes_written == len(text.encode("utf-8"))
+
+
+@pytest.mark.parametrize("threads", [0, 2])
+def test_zstd_output_decompresses_to_the_text(tmp_path, threads):
+    zstandard = pytest.importorskip("zstandard")
+    path = str(tmp_path / "out.tsv.zst")
+
+    bytes_written = write_output(path, threads)
+    with open(path, "rb") as f:
+        reader = zstandard.ZstdDecompressor().stream_reader(f)
+        assert reader.read().decode("utf-8") == text
+    assert bytes_written == len(text.encode("utf-8"))
+
+
+def test_compression_threads_are_passed_to_zstd(tmp_path, monkeypatch):
+    zstandard = pytest.importorskip("zstandard")
+    threads = []
+    compressor = zstandard.ZstdCompressor
+
+    def recording_compressor(**kwargs):
+        threads.append(kwargs["threads"])
+        return compressor(**kwargs)
+
+    monkeypatch.setattr(zstandard, "ZstdCompressor", recording_compressor)
+    write_output(str(tmp_path / "out.tsv.zst"), threads=3)
+    assert threads == [3]
+
+
+def test_resumed_output_is_truncated_to_the_offset(tmp_path):
+    path = str(tmp_path / "out.tsv")
+    write_output(path)
+    offset = len("".join(lines[:100]).encode("utf-8"))
+
+    # the lines after the offset, e.g. those written after the last checkpoint, are written again
+    bytes_written = write_output(path, offset=offset, lines=lines[100:150])
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "".join(lines[:150])
+    assert bytes_written == len("".join(lines[100:150]).encode("utf-8"))
+
+
+@pytest.mark.parametrize("name", ["out.tsv.gz", "out.tsv.zst", "out.parquet"])
+def test_compressed_output_cannot_be_resumed(tmp_path, name):
+    with pytest.raises(ValueError):
+        open_output(str(tmp_path / name), offset=10)
+
+
+def tsv_counts(path):
+    # the (lemma, tag) and counts in each corpus of each word in the tuple column of each row
+    with open(path, encoding="utf-8") as f:
+        return [
+            [
+                (lemma, [int(count) for count in counts.split(", ")])
+                for lemma, counts in re.findall(
+                    r"\('([^']*)', ([\d, ]+)\)", line.split("\t")[8]
+                )
+            ]
+            for line in f
+        ]
+
+
+def test_parquet_output_matches_the_tsv_output(giga, tmp_path):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    pyarrow = pytest.importorskip("pyarrow")
+    path = str(tmp_path / "giga_full_freq.parquet")
+    giga.compile_full_frequency(giga.output_file)
+    giga.compile_full_frequency(path)
+
+    table = parquet.read_table(path)
+    assert table.schema.field("year").type == pyarrow.int16()
+    assert table.schema.field("author_year").type == pyarrow.int16()
+    assert table.schema.field("lemma_ids").type == pyarrow.list_(pyarrow.int32())
+    for corpus in ("giga", "icepahc", "mim"):
+        assert table.schema.field(corpus + "_freq").type == pyarrow.list_(
+            pyarrow.int64()
+        )
+
+    rows = table.to_pylist()
+    with open(giga.output_file, encoding="utf-8") as f:
+        tsv_rows = [line.split("\t") for line in f]
+    assert [row["sent_id"] for row in rows] == [row[1] for row in tsv_rows]
+    # the Adjud file has no date and Gigaword texts have no author
+    assert [row["year"] for row in rows] == [None, None, 2016, 2016, 2016, 2017, 2017]
+    assert {row["author_year"] for row in rows} == {None}
+
+    vocab = parquet.read_table(vocab_path(path)).to_pylist()
+    assert [entry["lemma_id"] for entry in vocab] == list(range(len(vocab)))
+    keys = ["{}, {}".format(entry["lemma"], entry["tag"]) for entry in vocab]
+    assert [
+        [
+            (keys[i], [giga_freq, icepahc_freq, mim_freq])
+            for i, giga_freq, icepahc_freq, mim_freq in zip(
+                row["lemma_ids"], row["giga_freq"], row["icepahc_freq"], row["mim_freq"]
+            )
+        ]
+        for row in rows
+    ] == tsv_counts(giga.output_file)
+
+
+def test_parquet_rows_are_written_in_row_groups(tmp_path):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "out.parquet")
+    vocab = Vocabulary()
+    ids = array("i", [vocab.intern("hestur", "nk"), vocab.intern("vera", "s")])
+
+    with ParquetWriter(path, vocab, ("giga",), row_group_size=2) as out:
+        for sent_no in range(5):
+            out.write(
+                "t",
+                "t.{}".format(sent_no),
+                str(sent_no),
+                "News1",
+                "2016-01-01",
+                "",
+                "",
+                "Hestur er",
+                ids,
+                [[sent_no, 1]],
+            )
+
+    metadata = parquet.ParquetFile(path).metadata
+    sizes = [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+    assert sizes == [2, 2, 1]
+    rows = parquet.read_table(path).to_pylist()
+    assert [row["sent_no"] for row in rows] == ["0", "1", "2", "3", "4"]
+    assert [row["giga_freq"] for row in rows] == [[i, 1] for i in range(5)]
+    assert {row["year"] for row in rows} == {2016}
+    assert {row["author_year"] for row in rows} == {None}
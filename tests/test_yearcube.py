@@ -0,0 +1,145 @@
+"""
+Tests of the year cube written by compile_year_cube() in giga_get_lemma_freq.py and read by YearCube (see
+lemmafreq/yearcube.py), whose slices must match a recount of the corpus by year and genre
+"""
+
+from collections import Counter, defaultdict
+import os
+
+import pytest
+
+from lemmafreq import yearcube
+from lemmafreq.tei import source_year
+from lemmafreq.writers import parse_year
+from lemmafreq.yearcube import CubeBuilder, YearCube, write_cube
+
+pytest.importorskip("numpy")
+
+
+def recount(giga, files):
+    """
+    Function to count each lemma by year and genre from the sentences of files, returns a Counter of
+    (lemma, tag, year, genre) cells
+    """
+    cells = Counter()
+    for file in files:
+        year = parse_year(source_year(file)) or 0
+        genre = giga.get_genre(file)
+        for sent_no, text, ids in giga.text_sentences(file):
+            for i in ids:
+                lemma, tag = giga.vocab.key(i).rsplit(", ", 1)
+                cells[(lemma, tag, year, genre)] += 1
+    return cells
+
+
+def expected_top(cells, year, genre):
+    counts = Counter()
+    for (lemma, tag, cell_year, cell_genre), count in cells.items():
+        if cell_year == year and genre in (None, cell_genre):
+            counts[(lemma, tag)] += count
+    items = sorted(
+        counts.items(),
+        key=lambda item: (-item[1], (item[0][0] + "\t" + item[0][1]).encode("utf-8")),
+    )
+    return [(lemma, tag, count) for (lemma, tag), count in items]
+
+
+def assert_matches(cube, cells):
+    lemmas = defaultdict(list)
+    for (lemma, tag, year, genre), count in cells.items():
+        lemmas[(lemma, tag)].append((year, genre, count))
+    years = sorted({year for lemma, tag, year, genre in cells})
+    genres = sorted({genre for lemma, tag, year, genre in cells})
+
+    assert len(cube) == len(lemmas)
+    assert cube.years() == years
+    assert cube.genres() == genres
+    for (lemma, tag), lemma_cells in lemmas.items():
+        assert list(cube.cells(lemma, tag)) == sorted(lemma_cells)
+        for genre in genres + [None]:
+            counts = Counter()
+            for year, cell_genre, count in lemma_cells:
+                if genre in (None, cell_genre):
+                    counts[year] += count
+            assert cube.by_year(lemma, tag, genre) == dict(sorted(counts.items()))
+    for year in years + [1234]:
+        for genre in genres + [None, "Nope"]:
+            expected = expected_top(cells, year, genre)
+            for k in (1, 3, len(expected) + 1):
+                assert cube.top(year, k, genre) == expected[:k]
+    assert cube.by_year("ekki til", "x") == {}
+    assert list(cube.cells("ekki til", "x")) == []
+
+
+def test_cube_slices_match_a_recount(giga, giga_files):
+    giga.compile_year_cube(giga.Checkpoint(giga.checkpoint_file, "test"), giga_files)
+    cells = recount(giga, giga_files)
+
+    with YearCube(giga.year_cube) as cube:
+        assert_matches(cube, cells)
+        # the file without a date is counted in year 0
+        assert cube.years() == [0, 2016, 2017]
+        assert cube.top(0, 100) == expected_top(cells, 0, "Adjud")
+        assert cube.top(2016, 100, "Adjud") == []
+
+
+def test_cube_is_not_written_again_for_the_same_files(giga, giga_files, capsys):
+    checkpoint = giga.Checkpoint(giga.checkpoint_file, "test")
+    giga.compile_year_cube(checkpoint, giga_files)
+    mtime = os.stat(giga.year_cube).st_mtime_ns
+    capsys.readouterr()
+
+    giga.compile_year_cube(checkpoint, giga_files)
+    assert "is up to date" in capsys.readouterr().out
+    assert os.stat(giga.year_cube).st_mtime_ns == mtime
+
+    giga.compile_year_cube(checkpoint, giga_files[1:])
+    with YearCube(giga.year_cube) as cube:
+        assert_matches(cube, recount(giga, giga_files[1:]))
+
+
+def test_recount_for_the_cube_is_reported(giga, giga_files, capsys):
+    year_cube = giga.year_cube
+    giga.year_cube = None
+    giga.compile_full_frequency(giga.output_file)
+    # the counts of the corpus are read from counts_dir, but the checkpoint has been removed
+    os.remove(giga.checkpoint_file)
+    giga.year_cube = year_cube
+    capsys.readouterr()
+
+    giga.compile_full_frequency(giga.output_file)
+    out = capsys.readouterr().out
+    assert "Counting 3 of 3 files again for the year cube" in out
+    assert giga.checkpoint_file in out
+    with YearCube(year_cube) as cube:
+        assert_matches(cube, recount(giga, giga_files))
+
+    # the files are in the checkpoint now
+    os.remove(year_cube)
+    giga.compile_full_frequency(giga.output_file)
+    assert "again for the year cube" not in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("size", [1, 5])
+def test_merging_in_small_buffers_gives_the_same_cube(
+    giga, giga_files, tmp_path, monkeypatch, size
+):
+    files = giga_files * 2
+
+    def build(path):
+        cube = CubeBuilder()
+        for file in files:
+            ids = [i for sent_no, text, ids in giga.text_sentences(file) for i in ids]
+            cube.add(parse_year(source_year(file)), giga.get_genre(file), ids)
+        write_cube(path, cube, giga.vocab, "digest")
+        with open(path, "rb") as f:
+            return f.read()
+
+    whole = build(str(tmp_path / "whole.bin"))
+    monkeypatch.setattr(yearcube, "buffer_size", size)
+    assert build(str(tmp_path / "merged.bin")) == whole
+
+    cells = recount(giga, files)
+    with YearCube(str(tmp_path / "merged.bin")) as cube:
+        assert cube.digest() == "digest"
+        assert_matches(cube, cells)